@@ -3,7 +3,6 @@ Restaurant Ordering System - Main Application Entry Point
 Premium redesigned home page with logo and food showcase.
 """
 import streamlit as st
-import json
 from pathlib import Path
 
 # Page configuration
@@ -23,23 +22,9 @@ if "table_id" in st.query_params:
 
 # Data directory
 DATA_DIR = Path(__file__).parent / "data"
-SETTINGS_FILE = DATA_DIR / "settings.json"
 IMAGES_DIR = DATA_DIR / "images"
 
-def load_settings():
-    """Load app settings."""
-    try:
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except:
-        pass
-    return {"logo": None, "restaurant_name": "Restaurant", "theme": "dark_luxury"}
-
-def save_settings(settings):
-    """Save app settings."""
-    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(settings, f, ensure_ascii=False, indent=4)
+from utils.database import load_settings
 
 settings = load_settings()
 
@@ -286,19 +271,12 @@ if 'role' not in st.session_state:
 st.markdown('<div class="logo-container">', unsafe_allow_html=True)
 
 # Display logo if available
-logo_path = settings.get('logo')
-if logo_path and Path(logo_path).exists():
-    import base64
-    import mimetypes
-    
-    # Detect mime type
-    mime_type, _ = mimetypes.guess_type(logo_path)
-    if not mime_type:
-        mime_type = "image/png"
-        
-    with open(logo_path, "rb") as f:
-        data = base64.b64encode(f.read()).decode()
-    st.markdown(f'<img src="data:{mime_type};base64,{data}" class="logo-image">', unsafe_allow_html=True)
+from utils.images import image_src
+
+# Smallest stored variant of the logo that is sharp at its 250px display size
+logo_src = image_src(settings.get('logo'), 250)
+if logo_src:
+    st.markdown(f'<img src="{logo_src}" class="logo-image">', unsafe_allow_html=True)
 else:
     # Default elegant placeholder
     st.markdown("""
@@ -359,15 +337,10 @@ st.markdown('</div>', unsafe_allow_html=True)
 
 # Import database functions
 try:
-    from utils.database import load_menu
-    menu = load_menu()
+    from utils.database import get_featured_items
     
     # Get featured items
-    featured_items = []
-    for category, items in menu.items():
-        for item in items:
-            if item.get('featured', False) and item.get('available', True):
-                featured_items.append(item)
+    featured_items = get_featured_items(available_only=True)
     
     if featured_items:
         st.markdown('<div class="section-header">Featured Delicacies</div>', unsafe_allow_html=True)
@@ -376,21 +349,12 @@ try:
         cols = st.columns(3)
         for i, item in enumerate(featured_items):
             with cols[i % 3]:
-                image_src = item.get('image', '')
-                # Handle local vs remote images
-                if image_src and not image_src.startswith('http') and Path(image_src).exists():
-                    import base64
-                    # mimetypes already imported above or re-import
-                    import mimetypes
-                    mime_type, _ = mimetypes.guess_type(image_src)
-                    if not mime_type: mime_type = "image/png"
-                    with open(image_src, "rb") as f:
-                        data = base64.b64encode(f.read()).decode()
-                    image_src = f"data:{mime_type};base64,{data}"
+                # Remote URLs as they are, local images as their card-sized variant
+                food_src = image_src(item.get('image', ''), 400)
                 
                 st.markdown(f"""
                 <div class="food-card">
-                    <img src="{image_src}" class="food-image">
+                    <img src="{food_src}" class="food-image">
                     <div class="food-info">
                         <div class="food-name">{item['name'].get('en', 'Unknown')}</div>
                         <div class="food-price">{item['price']} SAR</div>
@@ -0,0 +1,163 @@
+"""
+Storage backend matrix: ops/sec and p50/p99 latency of the utils/database.py
+functions for each backend and restaurant size.
+
+    python benchmarks/bench_backends.py [--backends json json+journal memory sqlite]
+                                        [--sizes 1000 10000 100000] [--seconds 1]
+
+Every backend/size pair runs in its own process on a scratch copy of data/,
+first through the conformance checks (conformance.py), then with a history
+of that many orders. Each function is called until --seconds have passed
+(at least 3 calls) after one untimed warm-up call; per-call setup such as creating the order to pay is not
+timed. Reads are timed before writes, so they all see the same history.
+"""
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+from common import make_orders, scratch_data_dir, seed_database, worker_env
+from conformance import conformance_history, run_checks
+
+# Backend label -> settings of its worker process
+BACKENDS = {
+    "json": {"STORAGE_BACKEND": "json"},
+    "json+journal": {"STORAGE_BACKEND": "json", "ORDERS_JOURNAL": "true"},
+    "memory": {"STORAGE_BACKEND": "memory"},
+    "sqlite": {"STORAGE_BACKEND": "sqlite"},
+}
+
+ITEMS = [{"item_id": "ff01", "name": "Zinger Burger", "quantity": 1, "price": 25}]
+
+
+def measure(call: Callable, setup: Optional[Callable], seconds: float) -> Dict[str, float]:
+    call(*(setup() if setup else ()))  # warm-up: the first read after seeding loads the data
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while len(latencies) < 3 or time.perf_counter() < deadline:
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        call(*args)
+        latencies.append(time.perf_counter() - start)
+        if len(latencies) >= 100000:
+            break
+    latencies.sort()
+    return {
+        "ops": len(latencies) / sum(latencies),
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def cases(db, history: List[dict]) -> List[tuple]:
+    """(function name, call, per-call setup returning the call's arguments or None)."""
+    rng = random.Random(0)
+    item_ids = [item["item_id"] for items in db.load_menu().values() for item in items]
+    order_ids = [order["order_id"] for order in history]
+    week_ago = (date.today() - timedelta(days=7)).isoformat()
+
+    def new_order(table_id: int = 50):
+        return db.create_order(table_id, ITEMS, 25)
+
+    def edited_item():
+        item = db.get_menu_item(rng.choice(item_ids))
+        return item["item_id"], {**item, "price": round(item["price"] + 0.5, 2)}
+
+    def one_change():
+        seq = db.get_change_seq()
+        db.update_order_status(new_order()["order_id"], "Paid", "Cash")
+        return (seq,)
+
+    page_5 = None
+    for _ in range(4):
+        page_5 = db.query_orders(item="pz01", limit=25, cursor=page_5)[1]
+
+    return [
+        ("get_menu_snapshot", db.get_menu_snapshot, None),
+        ("get_menu_item", db.get_menu_item, lambda: (rng.choice(item_ids),)),
+        ("get_available_items", db.get_available_items, None),
+        ("get_active_deals", db.get_active_deals, None),
+        ("get_active_categories", db.get_active_categories, None),
+        ("get_order_by_id", db.get_order_by_id, lambda: (rng.choice(order_ids),)),
+        ("get_pending_orders", db.get_pending_orders, None),
+        ("get_orders_by_table", db.get_orders_by_table, lambda: (rng.randint(1, 20), True)),
+        ("get_open_tables", db.get_open_tables, None),
+        ("search_orders(status)", db.search_orders, lambda: (None, "Paid")),
+        ("load_live_orders", db.load_live_orders, None),
+        ("load_orders(7 days)", db.load_orders, lambda: (week_ago, None)),
+        ("get_paid_orders", db.get_paid_orders, None),
+        ("load_orders", db.load_orders, None),
+        ("query_orders(page 1)", lambda: db.query_orders(status="Paid", payment_method="Card", limit=25), None),
+        ("query_orders(page 5)", lambda: db.query_orders(item="pz01", limit=25, cursor=page_5), None),
+        ("count_orders", lambda: db.count_orders(start_date=week_ago, status="Paid"), None),
+        # Writes (each adds orders, so they come last)
+        ("update_menu_item", db.update_menu_item, edited_item),
+        ("set_availability_many(10)", db.set_availability_many, lambda: (rng.sample(item_ids, 10), True)),
+        ("create_order", new_order, lambda: (rng.randint(1, 20),)),
+        ("update_order_status", db.update_order_status,
+         lambda: (new_order()["order_id"], "Paid", "Cash")),
+        ("update_order_status_many(20)", db.update_order_status_many,
+         lambda: ([new_order()["order_id"] for _ in range(20)], "Paid", "Cash")),
+        ("close_table", db.close_table, lambda: (new_order(60)["table_id"], "Cash")),
+        ("changes_since", db.changes_since, one_change),
+    ]
+
+
+def run_worker(backend: str, size: int, seconds: float):
+    scratch_data_dir(**BACKENDS[backend])
+    from utils import database as db
+    failures = run_checks(db, conformance_history())
+    history = make_orders(size)
+    seed_database(db, history)
+    results = {name: measure(call, setup, seconds) for name, call, setup in cases(db, history)}
+    print(json.dumps({"failures": failures, "results": results}))
+
+
+def run_pair(backend: str, size: int, seconds: float) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", backend, "--sizes", str(size), "--seconds", str(seconds)],
+        env=worker_env(**BACKENDS[backend]), capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"failures": [f"worker crashed: {result.stderr.strip().splitlines()[-1:]}"], "results": {}}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="orders in the history")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per function")
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.sizes[0], args.seconds)
+        return
+
+    for size in args.sizes:
+        runs = {backend: run_pair(backend, size, args.seconds) for backend in args.backends}
+        print(f"\n{size} orders")
+        print(f"{'conformance':<30}" + "".join(
+            f"{backend + (' ok' if not run['failures'] else ' FAILED'):>27}" for backend, run in runs.items()))
+        print(f"{'function':<30}" + f"{'ops/s':>9}{'p50 ms':>9}{'p99 ms':>9}" * len(runs))
+        names = next((list(run["results"]) for run in runs.values() if run["results"]), [])
+        for name in names:
+            row = f"{name:<30}"
+            for run in runs.values():
+                stats = run["results"].get(name)
+                row += (f"{stats['ops']:>9.0f}{stats['p50']:>9.2f}{stats['p99']:>9.2f}"
+                        if stats else f"{'-':>27}")
+            print(row)
+        for backend, run in runs.items():
+            for failure in run["failures"]:
+                print(f"  {backend}: {failure}")
+
+
+if __name__ == "__main__":
+    main()
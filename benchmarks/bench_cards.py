@@ -0,0 +1,95 @@
+"""
+Menu and deal cards of the customer page: the per-rerun f-strings (the old
+Quick Menu and Deals tabs) versus the shared render cache of utils/cards.py.
+
+    python benchmarks/bench_cards.py [--reruns 1000]
+
+"bytes/rerun" is the card markup one rerun sends to the browser (the "All"
+category of the Quick Menu plus the Deals tab); "us/rerun" the time to
+produce it.
+"""
+import argparse
+import time
+
+from common import scratch_data_dir
+
+scratch_data_dir()
+
+from utils import cards
+from utils.database import get_catalog_snapshot
+
+
+def old_menu_card(item: dict) -> str:
+    name = item['name'].get('en', 'Unknown')
+    desc = item.get('description', {}).get('en', '')
+    price = item['price']
+    image_url = item.get('image', 'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400')
+    return f"""
+                <div class="menu-card">
+                    <img src="{image_url}" class="menu-image" alt="{name}" onerror="this.src='https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400'">
+                    <div class="menu-info">
+                        <div class="menu-name">{name}</div>
+                        <div class="menu-desc">{desc[:60] + '...' if len(desc) > 60 else desc}</div>
+                        <div class="menu-price">{price} SAR</div>
+                    </div>
+                </div>
+                """
+
+
+def old_deal_card(deal: dict) -> str:
+    discount = deal.get('discount_percent', 0)
+    original_price = round(deal['price'] / (1 - discount / 100), 2) if discount < 100 else deal['price']
+    return f"""
+                <div class="menu-card">
+                    <img src="{deal.get('image', 'https://images.unsplash.com/photo-1513104890138-7c749659a591?w=400')}" class="menu-image" onerror="this.src='https://images.unsplash.com/photo-1513104890138-7c749659a591?w=400'">
+                    <div class="menu-info">
+                        <div class="menu-name">{deal['name'].get('en', 'Deal')}</div>
+                        <div class="menu-desc">{deal.get('description', {}).get('en', '')}</div>
+                        <div class="menu-price">{deal['price']} SAR {f'<span style="text-decoration: line-through; color: #888; font-size: 0.8rem;">{original_price} SAR</span>' if discount > 0 else ''}</div>
+                    </div>
+                </div>
+                """
+
+
+def rerun_old(items, deals) -> list:
+    return [old_menu_card(item) for item in items] + [old_deal_card(deal) for deal in deals]
+
+
+def rerun_cached(items, deals, version) -> list:
+    return [cards.menu_card(item, version) for item in items] + [cards.deal_card(deal, version) for deal in deals]
+
+
+def per_rerun(fn, *args, reruns: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reruns):
+        fn(*args)
+    return (time.perf_counter() - start) / reruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=1000)
+    args = parser.parse_args()
+
+    snapshot = get_catalog_snapshot()
+    items = [item for items in snapshot.menu.values() for item in items if item.get('available', True)]
+    deals = list(snapshot.active_deals)
+    print(f"{len(items)} menu cards, {len(deals)} deal cards per rerun")
+
+    old = rerun_old(items, deals)
+    cold = per_rerun(rerun_cached, items, deals, snapshot.version, reruns=1)
+    new = rerun_cached(items, deals, snapshot.version)
+    rows = [
+        ("f-string per rerun", sum(len(m.encode()) for m in old), per_rerun(rerun_old, items, deals, reruns=args.reruns)),
+        ("render cache (first)", sum(len(m.encode()) for m in new), cold),
+        ("render cache (warm)", sum(len(m.encode()) for m in new),
+         per_rerun(rerun_cached, items, deals, snapshot.version, reruns=args.reruns)),
+    ]
+    print(f"{'':<22} {'bytes/rerun':>12} {'us/rerun':>10}")
+    for label, size, seconds in rows:
+        print(f"{label:<22} {size:>12} {seconds * 1e6:>10.1f}")
+    print(f"cache: {cards.get_render_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Menu item lookups: scanning every category (the old get_menu_item) versus
+the flattened Catalog, for menus of different sizes.
+
+    python benchmarks/bench_catalog.py [--sizes 50 500 5000] [--lookups 100000]
+
+"build ms" is the one-off cost of indexing a menu version.
+"""
+import argparse
+import random
+import time
+
+from common import scratch_data_dir, timed
+
+scratch_data_dir()
+
+from utils.catalog import Catalog
+
+
+def make_menu(size: int, categories: int = 10) -> dict:
+    return {f"Category {c}": [{"item_id": f"c{c}i{n}", "name": {"en": f"Item {n}"}, "price": 10.0,
+                               "available": n % 7 != 0, "featured": n % 50 == 0}
+                              for n in range(c, size, categories)]
+            for c in range(categories)}
+
+
+def scan(menu: dict, item_id: str):
+    for items in menu.values():
+        for item in items:
+            if item['item_id'] == item_id:
+                return item
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000], help="items on the menu")
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'items':>6} {'build ms':>9} {'scan us':>9} {'catalog us':>11}")
+    for size in args.sizes:
+        menu = make_menu(size)
+        ids = [random.choice(menu[category])["item_id"] for category in random.choices(list(menu), k=args.lookups)]
+        build = timed(Catalog, menu)
+        catalog = Catalog(menu)
+        assert all(catalog.get(item_id) is scan(menu, item_id) for item_id in ids[:1000])
+
+        start = time.perf_counter()
+        for item_id in ids:
+            scan(menu, item_id)
+        scanned = (time.perf_counter() - start) / len(ids)
+        start = time.perf_counter()
+        for item_id in ids:
+            catalog.get(item_id)
+        indexed = (time.perf_counter() - start) / len(ids)
+        print(f"{size:>6} {build * 1000:>9.2f} {scanned * 1e6:>9.2f} {indexed * 1e6:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Order write throughput under concurrent writers, with and without group commit.
+
+Each writer thread marks its own share of Pending orders as Paid through
+update_order_status, the way several cashier sessions clearing tables would.
+
+    python benchmarks/bench_group_commit.py [--writers 24] [--ops 25] [--history 2000]
+"""
+import argparse
+import threading
+import time
+
+from common import make_orders, scratch_data_dir
+
+scratch_data_dir()
+
+import config
+from utils import database as db, json_store
+from utils.group_commit import GroupCommit
+
+
+class _Unbatched:
+    """One lock round-trip and one durable write per operation (the old write path)."""
+
+    def submit(self, op):
+        result = json_store._commit_order_writes([op])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def run(writers: int, ops: int, history: int, journal: bool, batched: bool) -> dict:
+    config.ORDERS_JOURNAL = journal
+    orders = make_orders(history, pending_ratio=0.0)
+    pending = make_orders(writers * ops, start_id=1001 + history, pending_ratio=1.0)
+    db.save_orders(orders + pending)
+
+    if batched:
+        json_store._order_writes = GroupCommit(json_store._commit_order_writes,
+                                               config.ORDER_COMMIT_WINDOW_MS / 1000)
+    else:
+        json_store._order_writes = _Unbatched()
+
+    failures = []
+    barrier = threading.Barrier(writers)
+
+    def writer(n: int):
+        barrier.wait()
+        for order in pending[n * ops:(n + 1) * ops]:
+            if not db.update_order_status(order["order_id"], "Paid", "Cash"):
+                failures.append(order["order_id"])
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    paid = sum(1 for order in db.load_orders() if order["status"] == "Paid")
+    return {
+        "elapsed": elapsed,
+        "throughput": writers * ops / elapsed,
+        "batches": getattr(json_store._order_writes, "batches", writers * ops),
+        "ok": not failures and paid == history + writers * ops,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=24)
+    parser.add_argument("--ops", type=int, default=25, help="updates per writer")
+    parser.add_argument("--history", type=int, default=2000, help="settled orders already stored")
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers x {args.ops} updates, {args.history} orders of history, "
+          f"window {config.ORDER_COMMIT_WINDOW_MS} ms")
+    print(f"{'storage':<10} {'write path':<14} {'seconds':>8} {'updates/s':>10} {'writes':>7}  ok")
+    for journal in (False, True):
+        for batched in (False, True):
+            result = run(args.writers, args.ops, args.history, journal, batched)
+            print(f"{'journal' if journal else 'snapshot':<10} {'group commit' if batched else 'one by one':<14} "
+                  f"{result['elapsed']:>8.2f} {result['throughput']:>10.0f} {result['batches']:>7}  {result['ok']}")
+
+
+if __name__ == "__main__":
+    main()
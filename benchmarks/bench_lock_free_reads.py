@@ -0,0 +1,99 @@
+"""
+Reader latency while a writer keeps rewriting the data files, with readers
+taking the writers' file lock versus lock-free snapshot reads.
+
+One writer process repeatedly saves orders.json and menu.json; reader
+processes poll pending orders and the menu like page reruns do.
+
+    python benchmarks/bench_lock_free_reads.py [--readers 4] [--history 20000] [--seconds 5]
+"""
+import argparse
+import multiprocessing
+import statistics
+import time
+
+from common import make_orders, scratch_data_dir
+
+scratch_data_dir()
+
+import config
+from utils import database as db, json_store
+
+
+def writer(lock_free: bool, orders, seconds: float, results):
+    config.LOCK_FREE_READS = lock_free
+    menu = db.load_menu()
+    deadline = time.perf_counter() + seconds
+    writes = 0
+    while time.perf_counter() < deadline:
+        orders[writes % len(orders)]["table_id"] = writes % 20 + 1
+        db.save_orders(orders)
+        db.save_menu(menu)
+        writes += 1
+    results.put(("writes", writes))
+
+
+def reader(lock_free: bool, seconds: float, results):
+    config.LOCK_FREE_READS = lock_free
+    deadline = time.perf_counter() + seconds
+    latencies = []
+    while time.perf_counter() < deadline:
+        signature = json_store._order_index.snapshot_signature
+        start = time.perf_counter()
+        db.get_pending_orders()
+        db.get_menu_snapshot()
+        # Only reads that found a new orders.json version have to wait for (or parse) anything
+        latencies.append((time.perf_counter() - start, json_store._order_index.snapshot_signature != signature))
+        time.sleep(0.01)
+    results.put(("reads", latencies))
+
+
+def run(lock_free: bool, readers: int, seconds: float, orders) -> dict:
+    config.LOCK_FREE_READS = lock_free
+    db.save_orders(orders)
+    # Spawned, not forked: file locks can't be inherited across fork
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=writer, args=(lock_free, orders, seconds, results))]
+    processes += [context.Process(target=reader, args=(lock_free, seconds, results)) for _ in range(readers)]
+    for process in processes:
+        process.start()
+    writes, latencies = 0, []
+    for _ in processes:
+        kind, value = results.get()
+        if kind == "writes":
+            writes = value
+        else:
+            latencies.extend(value)
+    for process in processes:
+        process.join()
+    reloads = sorted(elapsed for elapsed, reloaded in latencies if reloaded) or [0.0]
+    return {
+        "writes": writes,
+        "reads": len(latencies),
+        "reloads": len(reloads),
+        "mean": statistics.mean(reloads) * 1000,
+        "p50": statistics.median(reloads) * 1000,
+        "max": reloads[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--history", type=int, default=20000, help="orders in orders.json")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration per mode")
+    args = parser.parse_args()
+
+    orders = make_orders(args.history)
+    print(f"1 writer, {args.readers} readers, {args.history} orders, {args.seconds:.0f} s per mode")
+    print(f"{'':<10} {'':>7} {'':>7} {'--- reads that reloaded orders ---':>36}")
+    print(f"{'reads':<10} {'writes':>7} {'reads':>7} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9}")
+    for lock_free in (False, True):
+        result = run(lock_free, args.readers, args.seconds, orders)
+        print(f"{'lock-free' if lock_free else 'locked':<10} {result['writes']:>7} {result['reads']:>7} "
+              f"{result['reloads']:>7} {result['mean']:>9.1f} {result['p50']:>9.1f} {result['max']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
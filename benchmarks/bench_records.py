@@ -0,0 +1,54 @@
+"""
+Memory held by an order history as parsed JSON dicts versus the compact
+records of utils/records.py, plus the cost of converting between them.
+
+    python benchmarks/bench_records.py [--sizes 10000 100000]
+
+Both are measured with tracemalloc from a parse of the same JSON text, so
+the dicts carry their own copy of every string as they do when orders.json
+is loaded.
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from common import make_orders, scratch_data_dir, timed
+
+scratch_data_dir()
+
+from utils import records
+
+
+def allocated(build):
+    """(result, bytes still allocated by build())."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'orders':>8} {'dicts MB':>9} {'records MB':>11} {'saved':>6} {'decode s':>9} {'encode s':>9}")
+    for size in args.sizes:
+        text = json.dumps(make_orders(size))
+        dicts, dict_bytes = allocated(lambda: json.loads(text))
+        # Parse again so the records don't share strings with `dicts`
+        decoded, record_bytes = allocated(lambda: records.decode_orders(json.loads(text)))
+        assert decoded == dicts
+        decode = timed(records.decode_orders, dicts)
+        encode = timed(records.plain, decoded)
+        print(f"{size:>8} {dict_bytes / 1e6:>9.1f} {record_bytes / 1e6:>11.1f} "
+              f"{1 - record_bytes / dict_bytes:>6.0%} {decode:>9.2f} {encode:>9.2f}")
+        del dicts, decoded
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
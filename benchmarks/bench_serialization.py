@@ -0,0 +1,52 @@
+"""
+Save/load time and file size of an order history in each DATA_FORMAT.
+
+    python benchmarks/bench_serialization.py [--sizes 10000 100000 1000000]
+
+Formats whose library isn't installed (orjson, msgpack) are reported as skipped.
+1M orders need a few GB of memory.
+"""
+import argparse
+import gc
+import tempfile
+from pathlib import Path
+
+from common import make_orders, scratch_data_dir, timed
+
+scratch_data_dir()
+
+from utils import serialization
+
+
+def available(fmt: str) -> bool:
+    if fmt == "orjson":
+        return serialization.orjson is not None
+    if fmt == "msgpack":
+        return serialization.msgpack is not None
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    path = Path(tempfile.mkdtemp(prefix="foodhub-bench-")) / "orders.json"
+    print(f"{'orders':>9} {'format':<9} {'save s':>8} {'load s':>8} {'size MB':>9}")
+    for size in args.sizes:
+        orders = make_orders(size)
+        for fmt in serialization.FORMATS:
+            if not available(fmt):
+                print(f"{size:>9} {fmt:<9} {'skipped (not installed)':>27}")
+                continue
+            save = timed(serialization.write_atomic, path, orders, fmt)
+            gc.collect()
+            load = timed(serialization.read, path)
+            print(f"{size:>9} {fmt:<9} {save:>8.2f} {load:>8.2f} {path.stat().st_size / 1e6:>9.1f}")
+        del orders
+        gc.collect()
+    path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Shared helpers for the benchmark scripts.
+Benchmarks run against a scratch copy of data/ so the real files are never touched:
+call scratch_data_dir() before importing config or utils.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+def scratch_data_dir(**env) -> Path:
+    """
+    Copy data/ to a temp dir and point DATA_DIR (plus any extra settings) at it.
+    Worker processes started by a benchmark reuse their parent's copy.
+    """
+    if os.environ.get("BENCH_DATA_DIR"):
+        data_dir = Path(os.environ["BENCH_DATA_DIR"])
+    else:
+        data_dir = Path(tempfile.mkdtemp(prefix="foodhub-bench-")) / "data"
+        shutil.copytree(BASE_DIR / "data", data_dir)
+        os.environ["BENCH_DATA_DIR"] = str(data_dir)
+    os.environ["DATA_DIR"] = str(data_dir)
+    for key, value in env.items():
+        os.environ[key] = str(value)
+    return data_dir
+
+
+def make_orders(count: int, start_id: int = 1001, pending_ratio: float = 0.05,
+                days: int = 90, seed: int = 0) -> List[Dict]:
+    """Synthetic order history shaped like data/orders.json, oldest first."""
+    rng = random.Random(seed)
+    items = [("ff01", "Zinger Burger", 25), ("ff03", "French Fries", 12), ("pz01", "Pepperoni Pizza", 45),
+             ("pz05", "Meat Lovers Pizza", 55), ("mb02", "BBQ Ribs", 85), ("te02", "Green Tea", 10),
+             ("ic05", "Sundae Special", 25)]
+    start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days) / max(count, 1)
+    orders = []
+    for n in range(count):
+        lines = [{"item_id": item_id, "name": name, "quantity": rng.randint(1, 3), "price": price}
+                 for item_id, name, price in rng.sample(items, rng.randint(1, 4))]
+        timestamp = start + step * n
+        pending = rng.random() < pending_ratio
+        orders.append({
+            "order_id": start_id + n,
+            "table_id": rng.randint(1, 20),
+            "items": lines,
+            "total_price": float(sum(line["price"] * line["quantity"] for line in lines)),
+            "status": "Pending" if pending else "Paid",
+            "payment_method": None if pending else rng.choice(["Cash", "Card"]),
+            "timestamp": timestamp.isoformat(),
+            "paid_timestamp": None if pending else (timestamp + timedelta(minutes=20)).isoformat()
+        })
+    return orders
+
+
+def timed(fn, *args, **kwargs) -> float:
+    """Wall-clock seconds for one call."""
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def seed_database(db, orders: List[Dict]):
+    """
+    Load the catalog files of the scratch data/ and the given order history
+    into the configured backend (an empty SQLite database starts with neither).
+    """
+    import config
+    from utils import serialization
+    db.save_menu(serialization.read(config.MENU_FILE))
+    db.save_deals(serialization.read(config.DEALS_FILE))
+    db.save_categories(serialization.read(config.CATEGORIES_FILE))
+    db.save_orders(orders)
+
+
+def worker_env(**env) -> Dict[str, str]:
+    """Environment for a benchmark subprocess that needs its own scratch copy of data/."""
+    child = {key: value for key, value in os.environ.items() if key != "BENCH_DATA_DIR"}
+    child.update({key: str(value) for key, value in env.items()})
+    return child
@@ -0,0 +1,345 @@
+"""
+Conformance checks for the storage backends (utils/storage.py): every
+backend has to give the same answers through the utils/database.py API.
+
+    python benchmarks/conformance.py [--backends json json+archive memory sqlite]
+
+Each backend runs in its own process on a scratch copy of data/
+(json+archive is the JSON backend with order archival turned on, json+daily
+the same with daily partitions).
+bench_backends.py runs the same checks before timing a backend.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+from typing import Callable, List
+
+from common import make_orders, scratch_data_dir, seed_database, worker_env
+
+# Backend label -> settings of its worker process
+BACKENDS = {
+    "json": {"STORAGE_BACKEND": "json"},
+    "json+archive": {"STORAGE_BACKEND": "json", "ORDERS_ARCHIVE_AFTER_DAYS": "7"},
+    "json+daily": {"STORAGE_BACKEND": "json", "ORDERS_ARCHIVE_AFTER_DAYS": "7", "ORDERS_PARTITION": "day"},
+    "memory": {"STORAGE_BACKEND": "memory"},
+    "sqlite": {"STORAGE_BACKEND": "sqlite"},
+}
+
+
+class Checker:
+    def __init__(self):
+        self.failures: List[str] = []
+
+    def expect(self, condition: bool, description: str):
+        if not condition:
+            self.failures.append(description)
+
+
+def check_catalog(db, c: Checker):
+    menu = db.load_menu()
+    category = next(iter(menu))
+    first = menu[category][0]
+    c.expect(db.get_menu_item(first["item_id"]) == first, "get_menu_item returns the stored item")
+    c.expect(db.get_menu_item("missing") is None, "get_menu_item of an unknown ID is None")
+    reads = [db.get_menu_item(first["item_id"]), db.get_available_items(), db.get_featured_items(),
+             db.get_active_deals(), db.get_active_categories()]
+    deals = db.get_active_deals()
+    if deals:
+        reads.append(db.get_deal(deals[0]["deal_id"]))
+    c.expect(all(type(x) is dict for x in [reads[0], reads[1], *reads[2], *reads[3], *reads[4], *reads[5:]])
+             and all(type(i) is dict for items in reads[1].values() for i in items) and json.dumps(reads),
+             "catalog getters return plain, JSON-serializable dicts")
+
+    item = {"item_id": "zz01", "name": {"en": "Test Dish", "ur": "", "ar": ""}, "price": 10.0,
+            "available": False, "featured": False}
+    c.expect(db.add_menu_item(category, item), "add_menu_item succeeds")
+    c.expect(db.get_menu_item("zz01") == item, "added menu item is readable (cache invalidated)")
+    c.expect("zz01" not in [i["item_id"] for items in db.get_available_items().values() for i in items],
+             "get_available_items leaves out unavailable items")
+    c.expect(db.update_menu_item("zz01", {**item, "price": 12.5}), "update_menu_item succeeds")
+    c.expect(db.get_menu_item("zz01")["price"] == 12.5, "updated menu item is readable")
+    c.expect(not db.update_menu_item("missing", item), "update_menu_item of an unknown ID is False")
+    c.expect(db.get_catalog().category_of("zz01") == category, "get_catalog maps the item to its category")
+    c.expect(db.set_item_featured("zz01", True) and "zz01" in [i["item_id"] for i in db.get_featured_items()],
+             "set_item_featured adds the item to the featured items")
+    c.expect("zz01" not in [i["item_id"] for i in db.get_featured_items(available_only=True)],
+             "get_featured_items(available_only=True) leaves out unavailable items")
+    c.expect(db.delete_menu_item("zz01") and db.get_menu_item("zz01") is None, "delete_menu_item removes the item")
+    second = {**item, "item_id": "zz02"}
+    c.expect(db.upsert_menu_items({category: [item, second]}), "upsert_menu_items adds items")
+    c.expect(db.get_menu_item("zz02") == second, "upserted item is readable")
+    other = next((cat for cat in menu if cat != category), category)
+    c.expect(db.upsert_menu_items({other: [{**item, "price": 11.0}]}) and
+             db.get_catalog().category_of("zz01") == other and db.get_menu_item("zz01")["price"] == 11.0,
+             "upsert_menu_items replaces an item and moves it to the given category")
+    c.expect(db.set_availability_many(["zz01", "zz02", "missing"], True) == ["zz01", "zz02"],
+             "set_availability_many returns the items it found")
+    c.expect(all(db.get_menu_item(i)["available"] for i in ("zz01", "zz02")), "set_availability_many updates them")
+    c.expect(db.delete_menu_item("zz01") and db.delete_menu_item("zz02"), "bulk-added items can be deleted")
+    c.expect(db.load_menu() == menu, "menu is back to its original content")
+    menu_copy = db.load_menu()
+    menu_copy[category].clear()
+    c.expect(db.load_menu() == menu, "load_menu returns a copy")
+
+    deal_id = db.get_next_deal_id()
+    c.expect(deal_id not in [d["deal_id"] for d in db.load_deals()], "get_next_deal_id is unused")
+    deal = {"deal_id": deal_id, "name": {"en": "Test Deal"}, "price": 5.0, "active": True}
+    c.expect(db.add_deal(deal), "add_deal succeeds")
+    c.expect(db.get_deal(deal_id)["order"] == max(d.get("order", 0) for d in db.load_deals()),
+             "add_deal assigns the next display order")
+    c.expect(deal_id in [d["deal_id"] for d in db.get_active_deals()], "active deal is listed")
+    c.expect(db.update_deal(deal_id, {**db.get_deal(deal_id), "active": False}), "update_deal succeeds")
+    c.expect(deal_id not in [d["deal_id"] for d in db.get_active_deals()], "inactive deal is not listed")
+    c.expect(db.delete_deal(deal_id) and db.get_deal(deal_id) is None, "delete_deal removes the deal")
+
+    category_entry = {"id": "test_cat", "name": "Test", "active": True, "order": db.get_next_category_order()}
+    c.expect(db.add_category(category_entry), "add_category succeeds")
+    active = db.get_active_categories()
+    c.expect(active[-1]["id"] == "test_cat", "get_active_categories is sorted by order")
+    c.expect(db.update_category("test_cat", {**category_entry, "active": False}), "update_category succeeds")
+    c.expect("test_cat" not in [x["id"] for x in db.get_active_categories()], "inactive category is not listed")
+    ids = [x["id"] for x in sorted(db.load_categories(), key=lambda x: x.get("order", 999))]
+    c.expect(db.reorder_categories(["test_cat", ids[1]]) and
+             [x["id"] for x in sorted(db.load_categories(), key=lambda x: x["order"])] ==
+             ["test_cat", ids[1]] + [i for i in ids if i not in ("test_cat", ids[1])],
+             "reorder_categories puts the given IDs first, the rest in their current order")
+    c.expect(db.delete_category("test_cat") and "test_cat" not in [x["id"] for x in db.load_categories()],
+             "delete_category removes the category")
+
+    snapshot = db.get_catalog_snapshot()
+    c.expect(db.get_catalog_snapshot() is snapshot, "get_catalog_snapshot is shared until the catalog changes")
+    misses = db.get_cache_stats()["misses"]
+    c.expect(db.add_category({**category_entry, "id": "snap_cat"}), "add_category succeeds")
+    published = db.get_catalog_snapshot()
+    c.expect(published.version > snapshot.version and "snap_cat" in [x["id"] for x in published.categories]
+             and published.menu is snapshot.menu, "a save publishes a new snapshot that keeps the unchanged parts")
+    c.expect(db.get_cache_stats()["misses"] == misses, "a published save is not read back")
+    c.expect("snap_cat" not in [x["id"] for x in snapshot.categories], "an older snapshot is left as it was")
+    try:
+        published.menu[category][0]["price"] = 0
+        c.failures.append("snapshot menu items can be modified")
+    except TypeError:
+        pass
+    db.delete_category("snap_cat")
+
+    settings = db.load_settings()
+    misses = db.get_cache_stats()["misses"]
+    c.expect(db.save_settings({**settings, "restaurant_name": "Conformance"}) and
+             db.load_settings()["restaurant_name"] == "Conformance", "save_settings is read back by load_settings")
+    c.expect(db.get_cache_stats()["misses"] == misses, "saved settings are not read back from the file")
+    db.load_settings()["restaurant_name"] = "Changed"
+    c.expect(db.load_settings()["restaurant_name"] == "Conformance", "load_settings returns a copy")
+    db.save_settings(settings)
+
+
+def check_orders(db, c: Checker, history: List[dict]):
+    c.expect(len(db.load_orders()) == len(history), "load_orders returns the whole history")
+    start = (date.today() - timedelta(days=6)).isoformat()
+    in_range = [o for o in history if o["timestamp"][:10] >= start]
+    c.expect(sorted(o["order_id"] for o in db.load_orders(start, date.today())) ==
+             sorted(o["order_id"] for o in in_range), "load_orders filters by date range")
+    sample = history[len(history) // 2]
+    stored = db.get_order_by_id(sample["order_id"])
+    c.expect(stored is not None and stored["items"] == sample["items"], "get_order_by_id returns the order")
+    c.expect(db.get_order_by_id(10 ** 9) is None, "get_order_by_id of an unknown ID is None")
+    pending = [o["order_id"] for o in history if o["status"] == "Pending"]
+    c.expect(sorted(o["order_id"] for o in db.get_pending_orders()) == sorted(pending),
+             "get_pending_orders returns exactly the Pending orders")
+
+    totals = {}
+    for order in history:
+        if order["status"] == "Pending":
+            totals[order["table_id"]] = round(totals.get(order["table_id"], 0) + order["total_price"], 2)
+    c.expect({t: round(v, 2) for t, v in db.get_open_tables().items()} == totals,
+             "get_open_tables sums the Pending orders per table")
+
+    items = [{"item_id": "ff01", "name": "Zinger Burger", "quantity": 2, "price": 25}]
+    order = db.create_order(99, items, 50)
+    c.expect(order["order_id"] > max(o["order_id"] for o in history), "create_order assigns a new ID")
+    c.expect(order["status"] == "Pending" and order["items"] == items, "create_order stores a Pending order")
+    c.expect(db.get_order_by_id(order["order_id"])["total_price"] == 50, "created order is readable")
+    c.expect(db.get_next_order_id() > order["order_id"], "get_next_order_id is above created IDs")
+    c.expect(db.get_table_total(99) == 50, "get_table_total includes the new order")
+    second = db.create_order(99, items, 50)
+    c.expect([o["order_id"] for o in db.get_orders_by_table(99, open_only=True)] ==
+             [order["order_id"], second["order_id"]], "get_orders_by_table lists the table's open orders")
+
+    seq = db.get_change_seq()
+    c.expect(db.update_order_status(order["order_id"], "Paid", "Card"), "update_order_status succeeds")
+    paid = db.get_order_by_id(order["order_id"])
+    c.expect(paid["status"] == "Paid" and paid["payment_method"] == "Card" and paid["paid_timestamp"],
+             "update_order_status sets status, payment method and paid time")
+    c.expect(not db.update_order_status(10 ** 9, "Paid", "Cash"), "update_order_status of an unknown ID is False")
+    new_seq, changed = db.changes_since(seq)
+    c.expect([o["order_id"] for o in changed] == [order["order_id"]] and new_seq > seq,
+             "changes_since returns only the updated order")
+    c.expect(db.changes_since(new_seq)[1] == [], "changes_since the returned number is empty")
+    reads = [db.load_orders()[:5], db.get_pending_orders()[:5], [paid], changed]
+    c.expect(all(type(o) is dict for orders in reads for o in orders) and json.dumps(reads),
+             "orders are returned as plain, JSON-serializable dicts")
+
+    third = db.create_order(97, items, 50)
+    fourth = db.create_order(97, items, 50)
+    seq = db.get_change_seq()
+    c.expect(db.update_order_status_many([third["order_id"], fourth["order_id"], 10 ** 9], "Paid", "Cash") ==
+             [third["order_id"], fourth["order_id"]], "update_order_status_many returns the updated IDs")
+    c.expect(all(db.get_order_by_id(o["order_id"])["status"] == "Paid" for o in (third, fourth)) and
+             97 not in db.get_open_tables(), "update_order_status_many pays every order")
+    c.expect(sorted(o["order_id"] for o in db.changes_since(seq)[1]) == [third["order_id"], fourth["order_id"]],
+             "update_order_status_many shows up in the change feed")
+    with db.transaction("orders") as orders:
+        orders[:] = [o for o in orders if o["order_id"] not in (third["order_id"], fourth["order_id"])]
+
+    c.expect(db.close_table(99, "Cash") == [second["order_id"]], "close_table pays the open orders")
+    c.expect(99 not in db.get_open_tables() and db.get_table_total(99) == 0, "closed table owes nothing")
+    c.expect(db.close_table(99, "Cash") == [], "close_table on a settled table pays nothing")
+    c.expect(len(db.get_orders_by_table(99)) == 2, "get_orders_by_table includes paid orders")
+
+    c.expect([o["order_id"] for o in db.search_orders(order_id=order["order_id"])] == [order["order_id"]],
+             "search_orders by ID")
+    c.expect(db.search_orders(order_id=order["order_id"], status="Pending") == [],
+             "search_orders by ID and another status is empty")
+    paid_ids = {o["order_id"] for o in history if o["status"] == "Paid"} | {order["order_id"], second["order_id"]}
+    c.expect({o["order_id"] for o in db.search_orders(status="Paid")} == paid_ids, "search_orders by status")
+    c.expect({o["order_id"] for o in db.get_paid_orders()} == paid_ids, "get_paid_orders")
+
+    check_query(db, c)
+
+    with db.transaction("orders") as orders:
+        for o in orders:
+            if o["order_id"] == order["order_id"]:
+                o["table_id"] = 98
+        orders[:] = [o for o in orders if o["order_id"] != second["order_id"]]
+    c.expect(db.get_order_by_id(order["order_id"])["table_id"] == 98, "transaction('orders') writes changes")
+    c.expect(db.get_order_by_id(second["order_id"]) is None, "transaction('orders') deletes removed orders")
+    before = len(db.load_orders())
+    try:
+        with db.transaction("orders") as orders:
+            orders.clear()
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    c.expect(len(db.load_orders()) == before, "an aborted transaction writes nothing")
+
+
+def check_query(db, c: Checker):
+    everything = sorted(db.load_orders(), key=lambda o: (o["timestamp"], o["order_id"]), reverse=True)
+    start = (date.today() - timedelta(days=20)).isoformat()
+    end = (date.today() - timedelta(days=5)).isoformat()
+    criteria = [
+        ({}, lambda o: True),
+        ({"start_date": start, "end_date": end}, lambda o: start <= o["timestamp"][:10] <= end),
+        ({"status": "Paid", "payment_method": "Card"},
+         lambda o: o["status"] == "Paid" and o["payment_method"] == "Card"),
+        ({"table_id": 7, "min_total": 50, "max_total": 120}, lambda o: o["table_id"] == 7 and 50 <= o["total_price"] <= 120),
+        ({"item": "pz01", "start_date": start}, lambda o: o["timestamp"][:10] >= start and
+         any(line["item_id"] == "pz01" for line in o["items"])),
+        ({"item": "Green Tea"}, lambda o: any(line["name"] == "Green Tea" for line in o["items"])),
+        ({"status": "Refunded"}, lambda o: False),
+    ]
+    for given, wanted in criteria:
+        expected = [o["order_id"] for o in everything if wanted(o)]
+        got, cursor, pages = [], None, 0
+        while True:
+            page, cursor = db.query_orders(**given, limit=17, cursor=cursor)
+            got += [o["order_id"] for o in page]
+            pages += 1
+            if cursor is None or pages > 100:
+                break
+        c.expect(got == expected, f"query_orders({given}) pages through the matches newest first")
+        c.expect(db.count_orders(**given) == len(expected), f"count_orders({given})")
+    page, cursor = db.query_orders(limit=5)
+    db.create_order(5, [{"item_id": "ff01", "name": "Zinger Burger", "quantity": 1, "price": 25}], 25)
+    c.expect([o["order_id"] for o in db.query_orders(limit=5, cursor=cursor)[0]] ==
+             [o["order_id"] for o in everything[5:10]], "a cursor survives new orders")
+
+
+def check_upkeep(db, c: Checker):
+    import config
+    now = datetime.now()
+    stale = (now - timedelta(days=10)).isoformat()
+    pending = db.get_pending_orders()
+    expected = sorted(o["order_id"] for o in pending if o["timestamp"] < stale)
+    c.expect(db.expire_pending_orders(timeout_hours=0) == [], "expire_pending_orders with no timeout does nothing")
+    c.expect(sorted(db.expire_pending_orders(timeout_hours=24 * 10)) == expected,
+             "expire_pending_orders returns the Pending orders older than the timeout")
+    c.expect(all(db.get_order_by_id(order_id)["status"] == "Expired" for order_id in expected) and
+             not any(o["order_id"] in expected for o in db.get_pending_orders()),
+             "expired orders are no longer Pending")
+    c.expect(db.expire_pending_orders(timeout_hours=24 * 10) == [], "expire_pending_orders again expires nothing")
+
+    everything = sorted(o["order_id"] for o in db.load_orders())
+    paid = sorted(o["order_id"] for o in db.search_orders(status="Paid"))
+    count = db.count_orders(status="Paid")
+    archived = db.archive_orders()
+    c.expect(sorted(o["order_id"] for o in db.load_orders()) == everything, "archive_orders keeps every order")
+    c.expect(sorted(o["order_id"] for o in db.search_orders(status="Paid")) == paid and
+             db.count_orders(status="Paid") == count, "archived orders are still searched and counted")
+    c.expect(all(db.get_order_by_id(order_id) is not None for order_id in everything[:20]),
+             "get_order_by_id finds archived orders")
+    if config.ORDERS_ARCHIVE_AFTER_DAYS:
+        cutoff = (now - timedelta(days=config.ORDERS_ARCHIVE_AFTER_DAYS)).isoformat()
+        live = db.load_live_orders()
+        c.expect(not any(o["status"] != "Pending" and o["timestamp"] < cutoff for o in live),
+                 "load_live_orders leaves out archived orders")
+        c.expect({o["order_id"] for o in db.load_orders() if o["timestamp"] >= cutoff} <=
+                 {o["order_id"] for o in live}, "orders younger than ORDERS_ARCHIVE_AFTER_DAYS stay live")
+        c.expect(all(o["order_id"] in {l["order_id"] for l in live} for o in db.get_pending_orders()),
+                 "load_live_orders keeps every Pending order")
+        c.expect(config.STORAGE_BACKEND != "json" or archived > 0, "archive_orders moves old settled orders")
+
+
+def run_checks(db, history: List[dict]) -> List[str]:
+    """Seed the backend with the catalog files and `history`, run every check, return the failures."""
+    seed_database(db, history)
+    c = Checker()
+    for check in (check_catalog, lambda db, c: check_orders(db, c, history), check_upkeep):
+        try:
+            check(db, c)
+        except Exception as e:
+            c.failures.append(f"raised {type(e).__name__}: {e}")
+    return c.failures
+
+
+def conformance_history() -> List[dict]:
+    return make_orders(300, pending_ratio=0.2, days=30, seed=1)
+
+
+def run_backends(backends: List[str], worker: Callable[[str], List[str]]) -> bool:
+    ok = True
+    for backend in backends:
+        failures = worker(backend)
+        print(f"{backend:<14} {'ok' if not failures else f'{len(failures)} failure(s)'}")
+        for failure in failures:
+            print(f"    - {failure}")
+        ok = ok and not failures
+    return ok
+
+
+def _subprocess_worker(backend: str) -> List[str]:
+    result = subprocess.run([sys.executable, __file__, "--worker", backend],
+                            env=worker_env(**BACKENDS[backend]), capture_output=True, text=True)
+    if result.returncode != 0:
+        return [f"worker crashed: {result.stderr.strip().splitlines()[-1:]}"]
+    return [line[2:] for line in result.stdout.splitlines() if line.startswith("! ")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        scratch_data_dir(**BACKENDS[args.worker])
+        from utils import database as db
+        for failure in run_checks(db, conformance_history()):
+            print(f"! {failure}")
+        return
+    sys.exit(0 if run_backends(args.backends, _subprocess_worker) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,8 +12,8 @@ load_dotenv()
 # Base directory
 BASE_DIR = Path(__file__).parent
 
-# Data directory
-DATA_DIR = BASE_DIR / "data"
+# Data directory (overridable, e.g. to point benchmarks at scratch data)
+DATA_DIR = Path(os.getenv('DATA_DIR', BASE_DIR / "data"))
 
 # Data files
 MENU_FILE = DATA_DIR / "menu.json"
@@ -22,8 +22,63 @@ DEALS_FILE = DATA_DIR / "deals.json"
 CATEGORIES_FILE = DATA_DIR / "categories.json"
 SETTINGS_FILE = DATA_DIR / "settings.json"
 
-# Images directory
+# Storage backend (see utils/storage.py): "json" (files above), "sqlite" (run
+# `python -m utils.sqlite_store` to migrate) or "memory" (process-local, seeded from the files)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json').lower()
+DATABASE_FILE = DATA_DIR / "restaurant.db"
+
+# Data file format: "pretty" (indented JSON), "compact" (JSON without whitespace),
+# "orjson" (compact JSON via orjson if installed) or "msgpack" (needs msgpack).
+# Files are read in whichever format they are in, so this can be changed at any time
+DATA_FORMAT = os.getenv('DATA_FORMAT', 'pretty').lower()
+
+# Writers publish data files by temp file + rename; with LOCK_FREE_READS readers
+# open the current version without taking the writers' file lock
+LOCK_FREE_READS = os.getenv('LOCK_FREE_READS', 'true').lower() in ('1', 'true', 'yes')
+
+# Watch DATA_DIR for writes by other processes (needs watchdog) so the catalog and
+# settings caches are invalidated by notification instead of stat-ing files per call
+DATA_WATCHER = os.getenv('DATA_WATCHER', 'true').lower() in ('1', 'true', 'yes')
+
+# Order journal (JSON backend): append order writes to a JSONL file and
+# periodically fold it into orders.json instead of rewriting the history
+ORDERS_JOURNAL = os.getenv('ORDERS_JOURNAL', 'false').lower() in ('1', 'true', 'yes')
+ORDERS_JOURNAL_FILE = DATA_DIR / "orders.journal.jsonl"
+
+# Order archival: settled (non-Pending) orders older than this many days leave the
+# live set for the archive, where history, search and analytics still find them (0 keeps them).
+# When set, this age is the only archive cutoff; younger orders stay live across period roll-overs
+ORDERS_ARCHIVE_AFTER_DAYS = int(os.getenv('ORDERS_ARCHIVE_AFTER_DAYS', '0'))
+
+# Pending orders left unpaid for this many hours are marked Expired (0 never expires them)
+PENDING_ORDER_TIMEOUT_HOURS = float(os.getenv('PENDING_ORDER_TIMEOUT_HOURS', '0'))
+
+# Order partitions (JSON backend): "day" or "month" moves settled orders of past
+# periods out of orders.json into data/orders/<period>.json; empty keeps one file.
+# The partitions are the JSON backend's archive, so archival defaults to monthly ones;
+# with ORDERS_ARCHIVE_AFTER_DAYS set they only pick the file an archived order goes to.
+ORDERS_PARTITION = os.getenv('ORDERS_PARTITION', 'month' if ORDERS_ARCHIVE_AFTER_DAYS else '').lower()
+ORDERS_PARTITION_DIR = DATA_DIR / "orders"
+
+# Group commit (JSON backend): order writes arriving within this window share one durable write
+ORDER_COMMIT_WINDOW_MS = float(os.getenv('ORDER_COMMIT_WINDOW_MS', '2'))
+
+# Background order maintenance (journal compaction, archival, expiry of pending orders)
+ORDER_MAINTENANCE_INTERVAL = int(os.getenv('ORDER_MAINTENANCE_INTERVAL', '60'))  # seconds
+
+# Memory-mapped columnar order snapshot used by the admin analytics
+ORDER_COLUMNS_DIR = DATA_DIR / "columns"
+
+# Order ID counter (JSON backend); each process reserves ORDER_ID_BLOCK_SIZE IDs at a time
+ORDERS_SEQUENCE_FILE = DATA_DIR / "orders.seq"
+ORDER_ID_BLOCK_SIZE = int(os.getenv('ORDER_ID_BLOCK_SIZE', '1'))
+
+# Change sequence counter (JSON backend): every order write is stamped with the next number
+ORDERS_CHANGES_FILE = DATA_DIR / "orders.changes.seq"
+
+# Images directory; resized WebP variants of the uploads go in IMAGE_VARIANTS_DIR (see utils/images.py)
 IMAGES_DIR = DATA_DIR / "images"
+IMAGE_VARIANTS_DIR = IMAGES_DIR / "variants"
 
 # Authentication
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
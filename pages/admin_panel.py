@@ -9,7 +9,6 @@ from datetime import datetime, timedelta
 import pandas as pd
 import plotly.express as px
 from io import BytesIO
-import json
 import base64
 import shutil
 import re
@@ -18,13 +17,16 @@ import re
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.database import (
-    load_menu, save_menu, add_menu_item, update_menu_item, delete_menu_item,
-    load_orders, get_paid_orders, get_pending_orders,
+    load_menu, add_menu_item, update_menu_item, delete_menu_item,
+    get_catalog, set_item_featured, set_availability_many,
+    get_pending_orders, get_order_frames, query_orders, count_orders,
     load_deals, save_deals, add_deal, update_deal, delete_deal, get_next_deal_id, get_next_deal_order,
     load_categories, save_categories, add_category, update_category, delete_category,
-    get_active_categories, get_next_category_order
+    get_active_categories, get_next_category_order,
+    load_settings, save_settings
 )
 from utils.auth import check_password, logout
+from utils.images import store_image, sweep_images, variant_path
 import config
 
 # Check authentication and role
@@ -39,40 +41,15 @@ if st.session_state.role != "admin":
 # Data directories
 DATA_DIR = Path(__file__).parent.parent / "data"
 IMAGES_DIR = DATA_DIR / "images"
-SETTINGS_FILE = DATA_DIR / "settings.json"
 
 # Ensure images directory exists
 IMAGES_DIR.mkdir(exist_ok=True)
 
-def load_settings():
-    """Load app settings."""
-    try:
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except:
-        pass
-    return {"logo": None, "restaurant_name": "Restaurant", "theme": "dark_luxury"}
-
-def save_settings(settings):
-    """Save app settings."""
-    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(settings, f, ensure_ascii=False, indent=4)
-
-def save_uploaded_file(uploaded_file, prefix="img"):
-    """Save uploaded file and return the path."""
+def save_uploaded_file(uploaded_file):
+    """Save uploaded file (once per distinct content) and return the path."""
     if uploaded_file is not None:
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        ext = Path(uploaded_file.name).suffix
-        filename = f"{prefix}_{timestamp}{ext}"
-        filepath = IMAGES_DIR / filename
-        
-        # Save file
-        with open(filepath, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        return str(filepath)
+        # Named by content hash; thumbnail/card/hero variants are written in the background
+        return store_image(bytes(uploaded_file.getbuffer()), Path(uploaded_file.name).suffix)
     return None
 
 # Translation dictionary
@@ -415,7 +392,7 @@ with tab1:
         
         current_logo = settings.get('logo')
         if current_logo and Path(current_logo).exists():
-            st.image(current_logo, width=200)
+            st.image(variant_path(current_logo, 200), width=200)
             if st.button("Remove Logo"):
                 settings['logo'] = None
                 save_settings(settings)
@@ -431,7 +408,7 @@ with tab1:
             settings['restaurant_name'] = new_name
             
             if uploaded_logo:
-                logo_path = save_uploaded_file(uploaded_logo, "logo")
+                logo_path = save_uploaded_file(uploaded_logo)
                 settings['logo'] = logo_path
             
             save_settings(settings)
@@ -463,16 +440,33 @@ with tab1:
         
         # Placeholder for df, if not defined from analytics tab
         if 'df' not in locals():
-            all_orders = load_orders()
-            paid_orders = [o for o in all_orders if o.get('status') == 'Paid']
-            if paid_orders:
-                df = pd.DataFrame(paid_orders)
-            else:
-                df = pd.DataFrame({'total_price': []})
+            frames = get_order_frames(status='Paid')
+            df = frames[0] if frames else pd.DataFrame({'total_price': []})
 
         st.metric(t('total_revenue'), f"{df['total_price'].sum():,.0f} SAR" if not df.empty else "0 SAR")
         st.metric(t('category_items'), total_cat_items)
 
+        st.markdown("### Stored Images")
+        # Scanning the images and catalogs only happens when asked for
+        if st.button("Find Unused Images", key="find_unused_images"):
+            unused_images = sweep_images(dry_run=True)
+            if unused_images is None:
+                st.session_state.pop('unused_images', None)
+                st.error("Could not read the menu, deals, categories or settings; no images were checked")
+            else:
+                st.session_state.unused_images = unused_images
+        unused_images = st.session_state.get('unused_images')
+        if unused_images is not None:
+            st.caption(f"{len(unused_images)} file(s) no longer used by the menu, deals, categories or logo")
+            if unused_images and st.button("Remove Unused Images", key="sweep_images"):
+                removed = sweep_images()
+                del st.session_state.unused_images
+                if removed is None:
+                    st.error("Could not read the menu, deals, categories or settings; no images were removed")
+                else:
+                    st.success(f"Removed {len(removed)} unused file(s)")
+                    st.rerun()
+
     st.divider()
     
     # NEW: Featured Delicacies Management
@@ -480,11 +474,8 @@ with tab1:
     st.info("Manage which items appear on the Home Page showcase.")
     
     # 1. Current Featured Items
-    featured_items = []
-    for category, items in menu.items():
-        for item in items:
-            if item.get('featured', False):
-                featured_items.append({"category": category, **item})
+    catalog = get_catalog()
+    featured_items = [{"category": category, **item} for category, item in catalog.featured]
     
     if featured_items:
         st.markdown("#### Currently Featured")
@@ -498,23 +489,15 @@ with tab1:
                 </div>
                 """, unsafe_allow_html=True)
                 if st.button(f"Remove", key=f"adm_rem_feat_{item['item_id']}"):
-                    for cat_name, cat_items in menu.items():
-                        for idx, m_item in enumerate(cat_items):
-                            if m_item['item_id'] == item['item_id']:
-                                menu[cat_name][idx]['featured'] = False
-                                break
-                    save_menu(menu)
+                    set_item_featured(item['item_id'], False)
                     st.success(f"Removed {item['name'].get('en')}!")
                     st.rerun()
     else:
         st.warning("No items are currently featured on the Home Page.")
         
     st.markdown("#### Add to Featured")
-    all_eligible = []
-    for cat, items in menu.items():
-        for itm in items:
-            if not itm.get('featured', False):
-                all_eligible.append(f"{itm['item_id']} - {itm['name'].get('en', 'Unknown')}")
+    all_eligible = [f"{itm['item_id']} - {itm['name'].get('en', 'Unknown')}"
+                    for itm in catalog.items.values() if not itm.get('featured', False)]
     
     col_sel, col_btn = st.columns([3, 1])
     with col_sel:
@@ -523,12 +506,7 @@ with tab1:
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("Add to Home", type="primary", use_container_width=True) and all_eligible:
             id_to_feat = item_to_feature.split(" - ")[0]
-            for cat_name, cat_items in menu.items():
-                for idx, m_item in enumerate(cat_items):
-                    if m_item['item_id'] == id_to_feat:
-                        menu[cat_name][idx]['featured'] = True
-                        break
-            save_menu(menu)
+            set_item_featured(id_to_feat, True)
             st.success("Added to Home Page!")
             st.rerun()
 
@@ -564,7 +542,7 @@ with tab2:
                 if st.form_submit_button(t('add_category'), type="primary"):
                     image_path = None
                     if new_cat_image:
-                        image_path = save_uploaded_file(new_cat_image, f"cat_{new_cat_id}")
+                        image_path = save_uploaded_file(new_cat_image)
                     
                     new_category = {
                         "id": new_cat_id.lower().replace(" ", "_"),
@@ -605,14 +583,14 @@ with tab2:
                         ed_active = st.checkbox("Active", value=cat.get('active', True), key=f"cat_active_{cat['id']}")
                         
                         if cat.get('image') and Path(cat['image']).exists():
-                            st.image(cat['image'], width=100)
+                            st.image(variant_path(cat['image'], 100), width=100)
                     
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.form_submit_button(t('save')):
                             image_path = cat.get('image')
                             if ed_image:
-                                image_path = save_uploaded_file(ed_image, f"cat_{cat['id']}")
+                                image_path = save_uploaded_file(ed_image)
                             
                             updated = {**cat, "name": ed_name, "icon": ed_icon, "description": ed_desc, 
                                        "order": ed_order, "active": ed_active, "image": image_path}
@@ -661,7 +639,7 @@ with tab3:
                 if st.form_submit_button(t('add_item'), type="primary"):
                     image_path = None
                     if image_file:
-                        image_path = save_uploaded_file(image_file, f"item_{new_item_id}")
+                        image_path = save_uploaded_file(image_file)
                     
                     new_item = {
                         "item_id": new_item_id,
@@ -685,6 +663,26 @@ with tab3:
     # Display items in selected category
     if selected_category and selected_category in menu:
         items = menu[selected_category]
+        
+        # Bulk availability toggle (one write for all selected items)
+        item_labels = {itm['item_id']: f"{itm['item_id']} - {itm['name'].get('en', 'Unknown')}" for itm in items}
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            bulk_ids = st.multiselect("Select items", options=list(item_labels), format_func=item_labels.get,
+                                      key=f"bulk_avail_{selected_category}")
+        with col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            if st.button("Mark Available", use_container_width=True, disabled=not bulk_ids):
+                set_availability_many(bulk_ids, True)
+                st.success(f"{len(bulk_ids)} items available!")
+                st.rerun()
+        with col3:
+            st.markdown("<br>", unsafe_allow_html=True)
+            if st.button("Mark Unavailable", use_container_width=True, disabled=not bulk_ids):
+                set_availability_many(bulk_ids, False)
+                st.success(f"{len(bulk_ids)} items unavailable!")
+                st.rerun()
+        
         for item in items:
             status = "🟢" if item.get('available', True) else "🔴"
             with st.expander(f"{status} {item['name'].get('en', 'Unknown')} - {item['price']} SAR"):
@@ -704,14 +702,14 @@ with tab3:
                             if current_img.startswith('http'):
                                 st.image(current_img, width=150)
                             elif Path(current_img).exists():
-                                st.image(current_img, width=150)
+                                st.image(variant_path(current_img, 150), width=150)
                     
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.form_submit_button(t('save')):
                             image_path = item.get('image', '')
                             if ed_image_file:
-                                image_path = save_uploaded_file(ed_image_file, f"item_{item['item_id']}")
+                                image_path = save_uploaded_file(ed_image_file)
                             
                             updated = {**item, "name": {"en": ed_name, "ur": "", "ar": ""}, "price": ed_price, 
                                        "description": {"en": ed_desc, "ur": "", "ar": ""}, "image": image_path, "available": ed_available}
@@ -808,7 +806,7 @@ with tab4:
                 if st.form_submit_button(t('add_deal'), type="primary"):
                     image_path = None
                     if deal_image:
-                        image_path = save_uploaded_file(deal_image, f"deal_{get_next_deal_id()}")
+                        image_path = save_uploaded_file(deal_image)
                     
                     new_deal = {
                         "deal_id": get_next_deal_id(),
@@ -902,14 +900,14 @@ with tab4:
                     st.info(f"💰 **Calculated Price:** {ed_calculated_price} SAR (Original: ~~{ed_total_original} SAR~~)")
                 
                 if deal.get('image') and Path(deal['image']).exists():
-                    st.image(deal['image'], width=150)
+                    st.image(variant_path(deal['image'], 150), width=150)
                 
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.form_submit_button(t('save')):
                         image_path = deal.get('image')
                         if ed_deal_image:
-                            image_path = save_uploaded_file(ed_deal_image, f"deal_{deal['deal_id']}")
+                            image_path = save_uploaded_file(ed_deal_image)
                         
                         updated = {**deal, "name": {"en": ed_name}, "description": {"en": ed_desc}, 
                                    "price": ed_calculated_price, "discount_percent": ed_discount, 
@@ -930,72 +928,113 @@ with tab4:
 with tab5:
     st.markdown(f'<p class="section-header">{t("order_history")}</p>', unsafe_allow_html=True)
     
-    orders = load_orders()
+    # Filters
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        status_filter = st.selectbox("Status", ["All", "Pending", "Paid", "Expired"])
+    with col2:
+        payment_filter = st.selectbox("Payment Method", ["All", "Cash", "Card"])
+    with col3:
+        date_range = st.date_input("Date Range", value=(datetime.now().date() - timedelta(days=7), datetime.now().date()))
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        table_filter = st.number_input("Table (0 = all)", min_value=0, step=1, value=0)
+    with col2:
+        min_total_filter = st.number_input("Min Total (SAR)", min_value=0.0, step=10.0, value=0.0)
+    with col3:
+        max_total_filter = st.number_input("Max Total (SAR, 0 = any)", min_value=0.0, step=10.0, value=0.0)
+    with col4:
+        history_catalog = get_catalog()
+        item_filter = st.selectbox("Contains Item", ["All"] + list(history_catalog.items),
+                                   format_func=lambda i: i if i == "All" else history_catalog.items[i]['name'].get('en', i))
+    
+    criteria = {
+        "start_date": date_range[0] if len(date_range) == 2 else None,
+        "end_date": date_range[1] if len(date_range) == 2 else None,
+        "status": None if status_filter == "All" else status_filter,
+        "payment_method": None if payment_filter == "All" else payment_filter,
+        "table_id": int(table_filter) or None,
+        "min_total": min_total_filter or None,
+        "max_total": max_total_filter or None,
+        "item": None if item_filter == "All" else item_filter,
+    }
+    
+    # Cursors of the pages seen so far; start over when the filters change
+    filter_key = repr(sorted(criteria.items()))
+    if st.session_state.get('history_filters') != filter_key:
+        st.session_state.history_filters = filter_key
+        st.session_state.history_cursors = [None]
+    cursors = st.session_state.history_cursors
+    
+    # Only the displayed page is fetched
+    page_size = 25
+    total_matches = count_orders(**criteria)
+    page_orders, next_cursor = query_orders(**criteria, limit=page_size, cursor=cursors[-1])
     
-    if not orders:
+    if not page_orders:
         st.info("No orders yet.")
     else:
-        # Filters
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            status_filter = st.selectbox("Status", ["All", "Pending", "Paid"])
-        with col2:
-            payment_filter = st.selectbox("Payment Method", ["All", "Cash", "Card"])
-        with col3:
-            date_range = st.date_input("Date Range", value=(datetime.now().date() - timedelta(days=7), datetime.now().date()))
-        
-        # Apply filters
-        filtered = orders.copy()
+        first = (len(cursors) - 1) * page_size + 1
+        st.markdown(f"**Showing {first}-{first + len(page_orders) - 1} of {total_matches} orders**")
         
-        if status_filter != "All":
-            filtered = [o for o in filtered if o.get('status') == status_filter]
+        df = pd.DataFrame({
+            "Order ID": [o['order_id'] for o in page_orders],
+            "Items": [", ".join(f"{line['name']} x{line['quantity']}" for line in o.get('items', []))
+                      for o in page_orders],
+            "Total (SAR)": [o.get('total_price', 0) for o in page_orders],
+            "Status": [o.get('status') for o in page_orders],
+            "Payment": [o.get('payment_method') for o in page_orders],
+            "Time": [pd.to_datetime(o.get('timestamp')).strftime('%Y-%m-%d %H:%M') if o.get('timestamp') else ''
+                     for o in page_orders]
+        })
         
-        if payment_filter != "All":
-            filtered = [o for o in filtered if o.get('payment_method') == payment_filter]
-        
-        if len(date_range) == 2:
-            start_date, end_date = date_range
-            filtered = [o for o in filtered if start_date <= datetime.fromisoformat(o.get('timestamp', datetime.now().isoformat())).date() <= end_date]
+        # Clean dataframe for Excel export (remove illegal XML characters)
+        def clean_excel_data(val):
+            if isinstance(val, str):
+                return re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', val)
+            return val
+            
+        st.dataframe(df.map(clean_excel_data), use_container_width=True, hide_index=True)
         
-        st.markdown(f"**Showing {len(filtered)} orders**")
+        col1, col2, col3 = st.columns([1, 1, 4])
+        with col1:
+            if st.button("◀ Newer", disabled=len(cursors) == 1, use_container_width=True):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            if st.button("Older ▶", disabled=next_cursor is None, use_container_width=True):
+                cursors.append(next_cursor)
+                st.rerun()
         
-        if filtered:
-            # Create DataFrame
-            df_data = []
-            for o in filtered:
-                items_str = ", ".join([f"{i['name']} x{i['quantity']}" for i in o.get('items', [])])
-                df_data.append({
-                    "Order ID": o.get('order_id'),
-                    "Items": items_str,
-                    "Total (SAR)": o.get('total_price', 0),
-                    "Status": o.get('status'),
-                    "Payment": o.get('payment_method', '-'),
-                    "Time": o.get('timestamp', '')[:16].replace('T', ' ')
-                })
-            
-            df = pd.DataFrame(df_data)
-            
-            # Clean dataframe for Excel export (remove illegal XML characters)
-            def clean_excel_data(val):
-                if isinstance(val, str):
-                    return re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', val)
-                return val
+        # Export every matching order, built only when asked for
+        if st.checkbox(f"Export all {total_matches} matching orders"):
+            frames = get_order_frames(**criteria)
+            if frames:
+                orders_df, lines_df = frames
+                line_labels = lines_df['name'].fillna('') + " x" + lines_df['quantity'].astype(str)
+                items_str = line_labels.groupby(lines_df['order_id']).agg(", ".join)
+                export_df = pd.DataFrame({
+                    "Order ID": orders_df['order_id'],
+                    "Items": orders_df['order_id'].map(items_str).fillna(''),
+                    "Total (SAR)": orders_df['total_price'],
+                    "Status": orders_df['status'],
+                    "Payment": orders_df['payment_method'],
+                    "Time": orders_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
+                }).iloc[::-1].map(clean_excel_data)
                 
-            df = df.map(clean_excel_data)
-            
-            st.dataframe(df, use_container_width=True, hide_index=True)
-            
-            # Export
-            col1, col2 = st.columns(2)
-            with col1:
-                csv = df.to_csv(index=False)
-                st.download_button("📥 Export CSV", csv, f"orders_{datetime.now().strftime('%Y%m%d')}.csv", "text/csv")
-            with col2:
-                buffer = BytesIO()
-                with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False, sheet_name='Orders')
-                buffer.seek(0)
-                st.download_button("📥 Export Excel", buffer.getvalue(), f"orders_{datetime.now().strftime('%Y%m%d')}.xlsx")
+                col1, col2 = st.columns(2)
+                with col1:
+                    csv = export_df.to_csv(index=False)
+                    st.download_button("📥 Export CSV", csv, f"orders_{datetime.now().strftime('%Y%m%d')}.csv", "text/csv")
+                with col2:
+                    buffer = BytesIO()
+                    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+                        export_df.to_excel(writer, index=False, sheet_name='Orders')
+                    buffer.seek(0)
+                    st.download_button("📥 Export Excel", buffer.getvalue(), f"orders_{datetime.now().strftime('%Y%m%d')}.xlsx")
+            else:
+                st.warning("Export needs NumPy for the order snapshot.")
 
 # =============================================================================
 # TAB 6: ANALYTICS (Category-specific top sellers)
@@ -1004,24 +1043,20 @@ with tab6:
     st.markdown(f'<p class="section-header">{t("analytics")}</p>', unsafe_allow_html=True)
     st.markdown('<p style="color: #d4af37; font-size: 0.9rem; margin-bottom: 1rem;">Analytics calculated from <strong>PAID orders only</strong></p>', unsafe_allow_html=True)
     
-    paid_orders = get_paid_orders()
+    # Date filter (a binary search on the order snapshot's sorted timestamps)
+    col1, col2 = st.columns([2, 2])
+    with col1:
+        analytics_range = st.date_input("Date Range", value=(datetime.now().date() - timedelta(days=30), datetime.now().date()), key="analytics_date")
+    
+    # Sliced from the memory-mapped order snapshot instead of parsing the history
+    frames = get_order_frames(*analytics_range, status='Paid') if len(analytics_range) == 2 else get_order_frames(status='Paid')
+    df, lines_df = frames if frames else (pd.DataFrame(), pd.DataFrame())
     
-    if not paid_orders:
+    if df.empty:
         st.info("No paid orders for analytics.")
     else:
-        df = pd.DataFrame(paid_orders)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
         df['date'] = df['timestamp'].dt.date
         
-        # Date filter
-        col1, col2 = st.columns([2, 2])
-        with col1:
-            analytics_range = st.date_input("Date Range", value=(datetime.now().date() - timedelta(days=30), datetime.now().date()), key="analytics_date")
-        
-        if len(analytics_range) == 2:
-            start_date, end_date = analytics_range
-            df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
-        
         # Key metrics (Removed Avg Order Value)
         st.markdown(f"### {t('key_metrics')}")
         col1, col2 = st.columns(2)
@@ -1038,15 +1073,8 @@ with tab6:
         st.divider()
         st.markdown("### Sales Breakdown")
         
-        # Process all items sold (Focusing on Deals)
-        all_sold_items = []
-        for items in df['items']:
-            for itm in items:
-                # Use display name as is, stripped of 'deal_' internal prefix for charts
-                name = itm.get('name', '').replace('(deal)', '').replace(' (deal)', '').strip()
-                all_sold_items.append(itm)
-        
-        sold_df = pd.DataFrame(all_sold_items)
+        # All items sold (one row per order line)
+        sold_df = lines_df
         
         if not sold_df.empty:
             st.markdown('<p style="color: #d4af37; font-weight: 600; font-size: 1.1rem; margin-bottom: 0.5rem;">Top Individual Items</p>', unsafe_allow_html=True)
@@ -1095,19 +1123,16 @@ with tab6:
                 item_category[item['name'].get('en', '')] = category
         
         # Get all items from orders
-        all_items = []
-        for _, row in df.iterrows():
-            for item in row.get('items', []):
-                item_name = item['name'].replace('(deal)', '').replace(' (deal)', '').strip()
-                all_items.append({
-                    'name': item_name, 
-                    'quantity': item['quantity'], 
-                    'revenue': item['price'] * item['quantity'],
-                    'category': item_category.get(item_name, 'Deals & Bundles' if str(item.get('item_id', '')).startswith('deal_') else 'Other')
-                })
+        item_names = lines_df['name'].fillna('').str.replace('(deal)', '', regex=False).str.strip()
+        is_deal = lines_df['item_id'].fillna('').str.startswith('deal_')
+        df_items = pd.DataFrame({
+            'name': item_names,
+            'quantity': lines_df['quantity'],
+            'revenue': lines_df['price'] * lines_df['quantity'],
+            'category': item_names.map(item_category).fillna(is_deal.map({True: 'Deals & Bundles', False: 'Other'}))
+        })
         
-        if all_items:
-            df_items = pd.DataFrame(all_items)
+        if not df_items.empty:
             
             # Overall Top Selling Items
             st.markdown(f"### {t('top_selling')} - Overall")
@@ -1190,7 +1215,7 @@ with tab6:
                 summary_df = summary_df.map(lambda x: re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', str(x)) if isinstance(x, str) else x)
                 summary_df.to_excel(writer, sheet_name='Summary', index=False)
                 
-                if all_items:
+                if not df_items.empty:
                     # Clean top items data
                     top_items_clean = top_items.copy().map(lambda x: re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', str(x)) if isinstance(x, str) else x)
                     top_items_clean.to_excel(writer, sheet_name='Top Items', index=False)
@@ -14,12 +14,18 @@ from utils.database import (
     get_pending_orders, 
     get_paid_orders, 
     update_order_status, 
-    load_orders,
+    update_order_status_many,
+    load_live_orders,
     get_order_by_id,
     search_orders,
     save_orders,
     get_deal,
-    get_menu_item
+    get_menu_item,
+    get_open_tables,
+    get_orders_by_table,
+    close_table,
+    get_change_seq,
+    changes_since
 )
 from utils.auth import check_password, logout # Added auth imports
 import config
@@ -268,7 +274,7 @@ with col1:
     search_id = st.number_input("Search by Order ID", min_value=0, value=0, step=1, 
                                  help="Enter order ID to search")
 with col2:
-    search_status = st.selectbox("Filter by Status", ["All", "Pending", "Paid"])
+    search_status = st.selectbox("Filter by Status", ["All", "Pending", "Paid", "Expired"])
 with col3:
     st.markdown("<br>", unsafe_allow_html=True)
     search_btn = st.button("Search", use_container_width=True)
@@ -310,18 +316,26 @@ if search_id > 0:
 
 st.divider()
 
-# Load data for both tabs
+# Announce orders placed since this cashier's last refresh (only the changes are fetched)
+if 'order_change_seq' not in st.session_state:
+    st.session_state.order_change_seq = get_change_seq()
+st.session_state.order_change_seq, changed_orders = changes_since(st.session_state.order_change_seq)
+new_orders = [o for o in changed_orders if o.get('status') == 'Pending']
+if new_orders:
+    st.toast("New orders: " + ", ".join(f"#{o['order_id']} (Table {o['table_id']})" for o in new_orders))
+
+# Filtering: Only show orders from the last 7 days
+one_week_ago = datetime.now() - timedelta(days=7)
+
+# Load data for both tabs. Paid orders by date, since the live set (the hot
+# shard) may cover less than a week, e.g. with daily partitions
 pending_orders_all = get_pending_orders()
-paid_orders_all = get_paid_orders()
+paid_orders_all = get_paid_orders(start_date=one_week_ago.date())
 
 # Sorting: Newest first
 pending_orders_all = sorted(pending_orders_all, key=lambda x: x.get('timestamp', ''), reverse=True)
 paid_orders_all = sorted(paid_orders_all, key=lambda x: x.get('timestamp', ''), reverse=True)
 
-# Filtering: Only show orders from the last 7 days
-from datetime import datetime, timedelta
-one_week_ago = datetime.now() - timedelta(days=7)
-
 def is_recent(order):
     try:
         ts = order.get('timestamp')
@@ -334,7 +348,7 @@ pending_orders = [o for o in pending_orders_all if is_recent(o)]
 paid_orders = [o for o in paid_orders_all if is_recent(o)]
 
 # Tabs for pending and paid orders
-tab1, tab2 = st.tabs(["Pending Orders", "Paid Orders"])
+tab1, tab2, tab3 = st.tabs(["Pending Orders", "Paid Orders", "Open Tables"])
 
 # =============================================================================
 # TAB 1: PENDING ORDERS
@@ -350,6 +364,23 @@ with tab1:
     if not pending_orders:
         st.info("No pending orders! All orders have been paid.")
     else:
+        # Pay several orders at once (one write instead of one per order)
+        with st.expander("Pay Selected Orders"):
+            order_labels = {o['order_id']: f"#{o['order_id']} - Table {o['table_id']} - {o['total_price']:.2f} SAR"
+                            for o in pending_orders}
+            selected_ids = st.multiselect("Orders", options=list(order_labels),
+                                          format_func=order_labels.get, key="pay_selected_ids")
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                bulk_method = st.selectbox("Payment", options=config.PAYMENT_METHODS, key="pay_selected_method")
+            with col2:
+                st.markdown("<br>", unsafe_allow_html=True)
+                if st.button("Pay Selected", type="primary", use_container_width=True, disabled=not selected_ids):
+                    paid_ids = update_order_status_many(selected_ids, "Paid", bulk_method)
+                    selected_total = sum(o['total_price'] for o in pending_orders if o['order_id'] in paid_ids)
+                    st.success(f"{len(paid_ids)} orders paid ({selected_total:.2f} SAR)!")
+                    st.rerun()
+
         for order in pending_orders:
             st.markdown(f"""
             <div class="order-card">
@@ -404,13 +435,11 @@ with tab2:
         if st.button("Refresh", key="refresh_paid", use_container_width=True):
             st.rerun()
     
-    paid_orders = get_paid_orders()
-    
     if not paid_orders:
         st.info("No paid orders yet.")
     else:
         # Sort by paid_timestamp (newest first)
-        paid_orders.sort(key=lambda x: x.get('paid_timestamp', ''), reverse=True)
+        paid_orders = sorted(paid_orders, key=lambda x: x.get('paid_timestamp') or '', reverse=True)
         
         # Show only recent orders
         recent_paid = paid_orders[:15]
@@ -474,11 +503,56 @@ with tab2:
                         except:
                             pass
 
+# =============================================================================
+# TAB 3: OPEN TABLES (running tab per table)
+# =============================================================================
+with tab3:
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.markdown('<p class="section-header">What Each Table Owes</p>', unsafe_allow_html=True)
+    with col2:
+        if st.button("Refresh", key="refresh_tables", use_container_width=True):
+            st.rerun()
+    
+    open_tables = get_open_tables()
+    
+    if not open_tables:
+        st.info("No open tables. Every order has been paid.")
+    else:
+        for table, owed in sorted(open_tables.items(), key=lambda x: str(x[0])):
+            table_orders = get_orders_by_table(table, open_only=True)
+            st.markdown(f"""
+            <div class="order-card">
+                <div style="display: flex; justify-content: space-between; align-items: center;">
+                    <div>
+                        <p class="table-number">Table {table}</p>
+                        <p style="color: #ffffff; margin: 0; opacity: 0.8;">{len(table_orders)} open order(s): {', '.join(f"#{o['order_id']}" for o in table_orders)}</p>
+                    </div>
+                    <div class="pending-badge">{owed:.2f} SAR</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                for order in table_orders:
+                    for item in order.get('items', []):
+                        subtotal = item['price'] * item['quantity']
+                        st.markdown(f'<p style="color: #ffffff; margin: 0 0 0.2rem 0;">• #{order["order_id"]} {item["name"]} x{item["quantity"]} = <span style="color: #d4af37; font-weight: 600;">{subtotal:.2f} SAR</span></p>', unsafe_allow_html=True)
+            with col2:
+                table_payment = st.selectbox("Payment", options=config.PAYMENT_METHODS, key=f"table_payment_{table}")
+                if st.button("Close Table", key=f"close_table_{table}", type="primary", use_container_width=True):
+                    paid_ids = close_table(table, table_payment)
+                    st.success(f"Table {table} closed ({len(paid_ids)} orders paid)!")
+                    st.rerun()
+            
+            st.divider()
+
 # Summary statistics
 st.divider()
 st.markdown('<p class="section-header">Today\'s Summary</p>', unsafe_allow_html=True)
 
-all_orders = load_orders()
+all_orders = load_live_orders()
 today = datetime.now().date()
 
 # Filter today's orders
@@ -11,11 +11,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.database import (
-    load_menu, create_order, get_menu_item,
-    load_categories, get_active_categories,
-    get_active_deals, get_deal
+    create_order, get_menu_item, get_order_by_id, get_orders_by_table,
+    load_categories, get_catalog_snapshot, get_deal
 )
 from utils.gemini_client import RestaurantChatbot
+from utils.cards import menu_card, deal_card
+from utils.images import image_src
 from utils.auth import check_password
 import config
 
@@ -409,16 +410,17 @@ if 'order_submitted' not in st.session_state:
 if 'active_order' not in st.session_state:
     st.session_state.active_order = None
 
-# Load data once
-menu = load_menu()
-categories = get_active_categories()
+# Shared, read-only catalog of this process (no per-session copy of the menu)
+catalog = get_catalog_snapshot()
+menu = catalog.menu
+categories = catalog.active_categories
 
 # Ensure chatbot is initialized
 if 'chatbot' not in st.session_state or st.session_state.chatbot is None:
     st.session_state.chatbot = RestaurantChatbot(
         menu_data=menu,
         table_id=table_id,
-        deals=get_active_deals()
+        deals=list(catalog.active_deals)
     )
 
 # Helper function to add item to cart
@@ -501,6 +503,17 @@ def format_bill():
 with st.sidebar:
     st.markdown('<p class="cart-header">Your Order</p>', unsafe_allow_html=True)
     
+    # Running tab: everything this table has ordered but not paid yet
+    open_table_orders = get_orders_by_table(table_id, open_only=True)
+    if open_table_orders:
+        table_owed = sum(o.get('total_price', 0) for o in open_table_orders)
+        st.markdown(f"""
+        <div style="background: rgba(212, 175, 55, 0.1); border: 1px solid rgba(212, 175, 55, 0.3); padding: 0.75rem; border-radius: 10px; margin-bottom: 1rem;">
+            <p style="color: #ffffff; margin: 0; font-size: 0.9rem;">Table {table_id} tab: {len(open_table_orders)} unpaid order(s)</p>
+            <p style="color: #d4af37; font-weight: 700; margin: 0.25rem 0 0 0;">{table_owed:.2f} SAR</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
     if st.session_state.order_submitted and st.session_state.active_order:
         st.success("✅ Order Submitted!")
         order = st.session_state.active_order
@@ -539,13 +552,10 @@ with st.sidebar:
                     item_details = get_menu_item(item['item_id'].split('_')[0])
                     
                 img_url = item_details.get('image', '') if item_details else ''
-                if img_url:
-                    if isinstance(img_url, str) and img_url.startswith('http'):
-                        st.markdown(f'<img src="{img_url}" class="bill-item-image">', unsafe_allow_html=True)
-                    elif isinstance(img_url, str) and Path(img_url).exists():
-                        st.markdown(f'<img src="{img_url}" class="bill-item-image">', unsafe_allow_html=True)
-                    else:
-                        st.markdown('<div class="bill-item-image" style="background: #222; display: flex; align-items: center; justify-content: center;"></div>', unsafe_allow_html=True)
+                # 60px thumbnail: the smallest variant of a local image, URLs as they are
+                img_src = image_src(img_url, 60) if isinstance(img_url, str) else ''
+                if img_src:
+                    st.markdown(f'<img src="{img_src}" class="bill-item-image">', unsafe_allow_html=True)
                 else:
                     st.markdown('<div class="bill-item-image" style="background: #222; display: flex; align-items: center; justify-content: center;"></div>', unsafe_allow_html=True)
             
@@ -577,9 +587,7 @@ with st.sidebar:
         
         # Payment Status and Download Bill
         if st.session_state.get('active_order'):
-            from utils.database import load_orders
-            all_orders = load_orders()
-            current_order = next((o for o in all_orders if o['order_id'] == st.session_state.active_order['order_id']), None)
+            current_order = get_order_by_id(st.session_state.active_order['order_id'])
             
             if current_order:
                 if current_order['status'] == "Paid":
@@ -607,6 +615,12 @@ with st.sidebar:
                         st.session_state.order_submitted = False
                         st.session_state.active_order = None
                         st.rerun()
+                elif current_order['status'] == "Expired":
+                    st.warning("⌛ This order expired before it was paid. Please place it again.")
+                    if st.button("New Order", type="primary", use_container_width=True):
+                        st.session_state.order_submitted = False
+                        st.session_state.active_order = None
+                        st.rerun()
                 else:
                     st.info("🕒 Order pending cashier confirmation...")
                     if st.button("Refresh Status"):
@@ -740,9 +754,7 @@ with tab1:
     with col4:
         if st.button("New Chat", use_container_width=True):
             st.session_state.chat_messages = []
-            menu = load_menu()
-            deals = get_active_deals()
-            st.session_state.chatbot = RestaurantChatbot(menu, table_id, deals)
+            st.session_state.chatbot = RestaurantChatbot(menu, table_id, list(catalog.active_deals))
             welcome = st.session_state.chatbot.get_welcome_message()
             st.session_state.chat_messages.append({"role": "assistant", "content": welcome})
             st.rerun()
@@ -780,7 +792,7 @@ with tab2:
 
     for i, cat in enumerate(active_cats):
         with cols[i + 1]:
-            cat_image = cat.get('image', 'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=200')
+            cat_image = image_src(cat.get('image'), 100) or 'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=200'
             is_selected = st.session_state.selected_menu_category == cat['name']
             
             st.markdown(f"""
@@ -815,20 +827,10 @@ with tab2:
         for i, item in enumerate(available_items):
             with cols[i % 3]:
                 name = item['name'].get('en', 'Unknown')
-                desc = item.get('description', {}).get('en', '')
                 price = item['price']
-                image_url = item.get('image', 'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400')
                 
-                st.markdown(f"""
-                <div class="menu-card">
-                    <img src="{image_url}" class="menu-image" alt="{name}" onerror="this.src='https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400'">
-                    <div class="menu-info">
-                        <div class="menu-name">{name}</div>
-                        <div class="menu-desc">{desc[:60] + '...' if len(desc) > 60 else desc}</div>
-                        <div class="menu-price">{price} SAR</div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+                # Rendered once per catalog version and shared by every session
+                st.markdown(menu_card(item, catalog.version), unsafe_allow_html=True)
                 
                 if st.button(f"Add to Cart", key=f"add_menu_{item['item_id']}_{i}", use_container_width=True):
                     new_qty = add_to_cart(item['item_id'], name, price)
@@ -841,7 +843,7 @@ with tab2:
 with tab3:
     st.markdown('<p class="section-header">Deals</p>', unsafe_allow_html=True)
     
-    active_deals = get_active_deals()
+    active_deals = catalog.active_deals
     
     if not active_deals:
         st.info("No active deals at the moment. Please check back later!")
@@ -850,20 +852,7 @@ with tab3:
         cols = st.columns(2)
         for idx, deal in enumerate(active_deals):
             with cols[idx % 2]:
-                # Calculate original price
-                discount = deal.get('discount_percent', 0)
-                original_price = round(deal['price'] / (1 - discount / 100), 2) if discount < 100 else deal['price']
-                
-                st.markdown(f"""
-                <div class="menu-card">
-                    <img src="{deal.get('image', 'https://images.unsplash.com/photo-1513104890138-7c749659a591?w=400')}" class="menu-image" onerror="this.src='https://images.unsplash.com/photo-1513104890138-7c749659a591?w=400'">
-                    <div class="menu-info">
-                        <div class="menu-name">{deal['name'].get('en', 'Deal')}</div>
-                        <div class="menu-desc">{deal.get('description', {}).get('en', '')}</div>
-                        <div class="menu-price">{deal['price']} SAR {f'<span style="text-decoration: line-through; color: #888; font-size: 0.8rem;">{original_price} SAR</span>' if discount > 0 else ''}</div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(deal_card(deal, catalog.version), unsafe_allow_html=True)
                 
                 # Interaction area for the deal
                 col_q, col_b = st.columns([1, 2])
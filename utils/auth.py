@@ -27,16 +27,8 @@ def check_password(role: str = "admin") -> bool:
         pw = st.session_state.get("password_input")
         
         # Load dynamic settings if they exist
-        import json
-        from pathlib import Path
-        settings = {}
-        settings_file = Path(__file__).parent.parent / "data" / "settings.json"
-        try:
-            if settings_file.exists():
-                with open(settings_file, 'r', encoding='utf-8') as f:
-                    settings = json.load(f)
-        except:
-            pass
+        from utils.database import load_settings
+        settings = load_settings()
             
         # Admin check (Settings -> Config fallback)
         admin_user = settings.get('admin_username', config.ADMIN_USERNAME)
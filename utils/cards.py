@@ -0,0 +1,106 @@
+"""
+HTML of the menu and deal cards on the customer page (Quick Menu and Deals
+tabs), rendered once per (item, language, catalog version) and shared by
+every session of the process, instead of being rebuilt by an f-string for
+each card on every rerun. The markup is compact (no template indentation)
+and escaped. Local images are inlined at the card's width (utils/images.py).
+See benchmarks/bench_cards.py for the bytes sent per rerun.
+"""
+import html
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from utils import images
+
+MENU_IMAGE_FALLBACK = "https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400"
+DEAL_IMAGE_FALLBACK = "https://images.unsplash.com/photo-1513104890138-7c749659a591?w=400"
+
+# Width of a card image in CSS pixels
+CARD_IMAGE_WIDTH = 400
+
+# catalog version -> {(kind, id, language): (markup, image file or None)}; only the two newest
+# versions are kept, so sessions still rendering the previous snapshot don't evict the current one.
+# The image file is kept only while the card shows an original whose variant is still to come.
+_rendered: Dict[int, Dict[tuple, Tuple[str, Optional[str]]]] = {}
+_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0}
+
+
+def _text(value, lang: str) -> str:
+    """A localized field ({"en": ..., "ur": ..., "ar": ...}) in `lang`, falling back to English."""
+    if isinstance(value, dict):
+        return value.get(lang) or value.get('en') or ''
+    return value or ''
+
+
+def _cached(version: int, key: tuple, image, render: Callable[[], str]) -> str:
+    """
+    The card for `key` in catalog `version`. Only a card still showing the
+    original of its image looks at the image store again, so it is redone
+    once the variant exists, whichever process wrote it.
+    """
+    cards = _rendered.get(version)
+    if cards is not None:
+        entry = cards.get(key)
+        if entry is not None and (entry[1] is None or _image_file(image) == entry[1]):
+            _counters["hits"] += 1
+            return entry[0]
+    _counters["misses"] += 1
+    path = _image_file(image)
+    markup = render()
+    with _lock:
+        if version not in _rendered:
+            for old in [v for v in _rendered if v < version - 1]:
+                del _rendered[old]
+        _rendered.setdefault(version, {})[key] = (markup, path if images.variant_pending(image, path) else None)
+    return markup
+
+
+def _image(image, fallback: str) -> str:
+    return html.escape(images.image_src(image, CARD_IMAGE_WIDTH) or fallback)
+
+
+def _image_file(image) -> Optional[str]:
+    """The file (or URL) a card's image is inlined from."""
+    return images.variant_path(image, CARD_IMAGE_WIDTH)
+
+
+def _card(image: str, fallback: str, name: str, desc: str, price: str) -> str:
+    return (f'<div class="menu-card"><img src="{image}" class="menu-image" alt="{name}" '
+            f'onerror="this.src=\'{fallback}\'"><div class="menu-info">'
+            f'<div class="menu-name">{name}</div><div class="menu-desc">{desc}</div>'
+            f'<div class="menu-price">{price}</div></div></div>')
+
+
+def menu_card(item: Dict, version: int, lang: str = "en") -> str:
+    """Card of a menu item in the Quick Menu grid."""
+    def render():
+        desc = _text(item.get('description'), lang)
+        if len(desc) > 60:
+            desc = desc[:60] + '...'
+        return _card(_image(item.get('image'), MENU_IMAGE_FALLBACK), MENU_IMAGE_FALLBACK,
+                     html.escape(_text(item.get('name'), lang) or 'Unknown'), html.escape(desc),
+                     f"{item['price']} SAR")
+
+    return _cached(version, ("item", item.get('item_id'), lang), item.get('image'), render)
+
+
+def deal_card(deal: Dict, version: int, lang: str = "en") -> str:
+    """Card of a deal in the Deals grid, with the undiscounted price struck through."""
+    def render():
+        discount = deal.get('discount_percent', 0)
+        price = f"{deal['price']} SAR"
+        if discount > 0:
+            original_price = round(deal['price'] / (1 - discount / 100), 2) if discount < 100 else deal['price']
+            price += (' <span style="text-decoration: line-through; color: #888; font-size: 0.8rem;">'
+                      f'{original_price} SAR</span>')
+        return _card(_image(deal.get('image'), DEAL_IMAGE_FALLBACK), DEAL_IMAGE_FALLBACK,
+                     html.escape(_text(deal.get('name'), lang) or 'Deal'),
+                     html.escape(_text(deal.get('description'), lang)), price)
+
+    return _cached(version, ("deal", deal.get('deal_id'), lang), deal.get('image'), render)
+
+
+def get_render_stats() -> Dict[str, int]:
+    """Card cache hit/miss counters for this process."""
+    return {**_counters, "cards": sum(len(cards) for cards in list(_rendered.values()))}
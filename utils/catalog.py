@@ -0,0 +1,106 @@
+"""
+Flattened view of the menu: item and category lookups by item_id, plus the
+available and featured item lists, computed once per menu version instead
+of walking every category on each lookup, and the catalog snapshot that
+bundles it with the deals and categories. See database.get_catalog_snapshot().
+"""
+from typing import Dict, List, Optional, Tuple
+
+
+class Catalog:
+    """
+    Indexes over one menu ({category: [items]}). The menu and its items are
+    shared, not copied: treat them as read-only. If an item_id appears more
+    than once, lookups return the first one, like a scan of the menu would.
+    """
+
+    def __init__(self, menu: Dict[str, List[Dict]]):
+        self.menu = menu
+        # item_id -> item, and its category and position in that category's list
+        self.items: Dict[str, Dict] = {}
+        self.positions: Dict[str, Tuple[str, int]] = {}
+        # category -> its items in menu order
+        self.by_category: Dict[str, List[Dict]] = {}
+        # category -> available items (categories with none are left out)
+        self.available: Dict[str, List[Dict]] = {}
+        # (category, item) of every featured item, in menu order
+        self.featured: List[Tuple[str, Dict]] = []
+
+        for category, items in menu.items():
+            self.by_category[category] = items
+            for index, item in enumerate(items):
+                item_id = item.get('item_id')
+                if item_id not in self.items:
+                    self.items[item_id] = item
+                    self.positions[item_id] = (category, index)
+                if item.get('featured', False):
+                    self.featured.append((category, item))
+            available = [item for item in items if item.get('available', True)]
+            if available:
+                self.available[category] = available
+
+    def get(self, item_id: str) -> Optional[Dict]:
+        return self.items.get(item_id)
+
+    def category_of(self, item_id: str) -> Optional[str]:
+        position = self.positions.get(item_id)
+        return position[0] if position else None
+
+    def locate(self, menu: Dict[str, List[Dict]], item_id: str) -> Optional[Tuple[str, int]]:
+        """
+        (category, index) of item_id in `menu`, a copy of this catalog's menu
+        that may have changed since; falls back to a scan if it has moved.
+        """
+        position = self.positions.get(item_id)
+        if position is not None:
+            category, index = position
+            items = menu.get(category, [])
+            if index < len(items) and items[index].get('item_id') == item_id:
+                return position
+        for category, items in menu.items():
+            for index, item in enumerate(items):
+                if item.get('item_id') == item_id:
+                    return category, index
+        return None
+
+    def featured_items(self, available_only: bool = False) -> List[Dict]:
+        return [item for _, item in self.featured if not available_only or item.get('available', True)]
+
+
+class CatalogSnapshot:
+    """
+    One published version of the whole catalog: the menu with its Catalog
+    indexes, the deals and the categories, plus the views every page asks
+    for. Shared by all sessions of the process and never modified; a change
+    is published as a new snapshot (see database.get_catalog_snapshot), so a
+    reader holding one always sees a consistent catalog.
+    """
+    __slots__ = ("version", "menu", "catalog", "deals", "categories",
+                 "active_deals", "active_categories", "deals_by_id")
+
+    def __init__(self, version: int, menu: Dict[str, List[Dict]], deals: List[Dict],
+                 categories: List[Dict], catalog: Catalog = None):
+        deals_by_id: Dict[str, Dict] = {}
+        for deal in deals:
+            deals_by_id.setdefault(deal['deal_id'], deal)
+        fields = {
+            "version": version,
+            "menu": menu,
+            # Reused from the previous snapshot when only deals or categories changed
+            "catalog": catalog if catalog is not None and catalog.menu is menu else Catalog(menu),
+            "deals": deals,
+            "categories": categories,
+            "active_deals": tuple(sorted((d for d in deals if d.get('active', False)),
+                                         key=lambda d: d.get('order', 999))),
+            "active_categories": tuple(sorted((c for c in categories if c.get('active', True)),
+                                              key=lambda c: c.get('order', 999))),
+            "deals_by_id": deals_by_id,
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CatalogSnapshot is read-only; publish a new one instead")
+
+    def get_deal(self, deal_id: str) -> Optional[Dict]:
+        return self.deals_by_id.get(deal_id)
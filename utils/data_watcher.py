@@ -0,0 +1,83 @@
+"""
+File-system watcher for config.DATA_DIR.
+Other processes (e.g. several Streamlit servers behind a load balancer)
+write the same data files; watchdog reports those writes as they happen, so
+the in-process caches of utils/database.py are invalidated within
+milliseconds and can skip the per-call stat of the file while it's watched.
+Without watchdog, or with DATA_WATCHER off, nothing is watched and the
+caches keep checking file signatures on every call.
+"""
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# file name in DATA_DIR -> callbacks run (on the watcher thread) when it changes
+_listeners: Dict[str, List[Callable[[], None]]] = {}
+_observer = None
+_start_lock = threading.Lock()
+
+
+class _DataDirHandler(FileSystemEventHandler):
+    """Maps every event in DATA_DIR to the listeners of the file it touched."""
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # Atomic replaces show up as a move of the temp file onto the data file
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                notify(Path(path).name)
+
+
+def subscribe(filename: str, callback: Callable[[], None]):
+    """Run callback whenever the file DATA_DIR/filename is written, replaced or removed."""
+    _listeners.setdefault(filename, []).append(callback)
+
+
+def notify(filename: str):
+    """Run the listeners of a file (called by the watcher; callable directly, e.g. in tests)."""
+    for callback in _listeners.get(filename, ()):
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error handling change of {filename}: {e}")
+
+
+def start() -> bool:
+    """Start watching DATA_DIR (once per process). Returns True if it's being watched."""
+    global _observer
+    if _observer is not None:
+        return True
+    if Observer is None or not config.DATA_WATCHER:
+        return False
+    with _start_lock:
+        if _observer is None:
+            try:
+                observer = Observer()
+                observer.daemon = True
+                observer.schedule(_DataDirHandler(), str(config.DATA_DIR), recursive=False)
+                observer.start()
+                _observer = observer
+            except Exception as e:
+                print(f"Error watching {config.DATA_DIR}: {e}")
+                return False
+    return True
+
+
+def active() -> bool:
+    """True while DATA_DIR is being watched."""
+    observer = _observer
+    return observer is not None and observer.is_alive()
@@ -1,184 +1,391 @@
 """
 Database utilities for managing menu, orders, and deals data.
-Uses JSON files with file locking for thread safety.
+Storage is delegated to the backend selected by config.STORAGE_BACKEND
+(JSON files, SQLite or in-memory; see utils/storage.py); this module adds
+caching, error handling and the business rules on top.
 """
-import json
-import os
+import copy
 import sys
+import threading
 import filelock
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Tuple, Union
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import config
+from utils import data_watcher, order_partitions, records, serialization, storage
+from utils.catalog import Catalog, CatalogSnapshot
 
-# File locks for thread safety
-menu_lock = filelock.FileLock(str(config.MENU_FILE) + ".lock")
-orders_lock = filelock.FileLock(str(config.ORDERS_FILE) + ".lock")
-deals_lock = filelock.FileLock(str(config.DEALS_FILE) + ".lock")
+_store = storage.get_backend()
+
+
+# =============================================================================
+# CATALOG CACHE
+# =============================================================================
+
+# name -> (signature, parsed data as read-only records); shared by every session in this process.
+# Holds "menu", "deals", "categories" and "settings".
+_catalog_cache: Dict[str, tuple] = {}
+_cache_counters = {"hits": 0, "misses": 0}
+_decoders = {"menu": records.decode_menu, "deals": records.decode_deals,
+             "categories": records.decode_categories, "settings": dict}
+# name -> number of invalidations, so a read that overlapped one isn't cached
+_cache_generations: Dict[str, int] = {}
+# Names whose files the data watcher reports changes of: their entries are trusted without a stat
+_watched: set = set()
+
+
+def _cache_version(name: str):
+    if name == "settings":
+        return serialization.file_signature(config.SETTINGS_FILE)
+    return _store.catalog_version(name)
+
+
+def _cached_catalog(name: str, reader):
+    """Return the cached parse of a catalog, re-reading only if it changed."""
+    entry = _catalog_cache.get(name)
+    if entry is not None and name in _watched and data_watcher.active():
+        # The watcher drops the entry as soon as the file changes
+        _cache_counters["hits"] += 1
+        return entry[1]
+    generation = _cache_generations.get(name, 0)
+    signature = _cache_version(name)
+    if entry is not None and entry[0] == signature:
+        _cache_counters["hits"] += 1
+        return entry[1]
+    _cache_counters["misses"] += 1
+    data = _decoders[name](reader())
+    # Keyed on the signature taken *before* reading, so a concurrent change
+    # can only cause an extra re-read, never a stale hit
+    if _cache_generations.get(name, 0) == generation:
+        _catalog_cache[name] = (signature, data)
+    return data
+
+
+def _publish_catalog(name: str, data):
+    """
+    Cache data just saved by this process as the current version of a
+    catalog, so no session has to re-read it. Caller holds the writers' lock,
+    so the signature taken now is the one of this write.
+    """
+    _catalog_cache[name] = (_cache_version(name), _decoders[name](copy.deepcopy(data)))
+
+
+def invalidate_catalog_cache(name: str = None):
+    """Drop one cached catalog ("menu", "deals", "categories", "settings") or all of them."""
+    for key in (list(_decoders) if name is None else [name]):
+        _cache_generations[key] = _cache_generations.get(key, 0) + 1
+        _catalog_cache.pop(key, None)
+
+
+def _on_data_file_changed(name: str):
+    """Data watcher callback: drop the entry unless it already is the file's current version."""
+    entry = _catalog_cache.get(name)
+    # Our own saves publish their signature, so they don't cost a re-read
+    if entry is None or entry[0] != _cache_version(name):
+        invalidate_catalog_cache(name)
+
+
+def start_data_watcher() -> bool:
+    """
+    Invalidate the catalog and settings caches when another process writes
+    their files (see utils/data_watcher.py). Returns True if the files are watched.
+    """
+    if _watched:
+        return True
+    if not data_watcher.start():
+        return False
+    files = {**_store.CATALOG_FILES, "settings": config.SETTINGS_FILE}
+    for name, path in files.items():
+        data_watcher.subscribe(path.name, lambda name=name: _on_data_file_changed(name))
+    # Entries cached before the watcher started may already be stale
+    invalidate_catalog_cache()
+    _watched.update(files)
+    return True
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Catalog cache hit/miss counters for this process."""
+    return {**_cache_counters, "entries": len(_catalog_cache), "watched": len(_watched)}
+
+
+# The snapshot sessions read from; replaced whole, never modified
+_snapshot: Optional[CatalogSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """
+    The current catalog (menu, deals and categories with their lookups),
+    shared by every session of this process. Read-only. A save in any session
+    publishes a new snapshot, which the others pick up on their next call.
+    """
+    global _snapshot
+    menu, deals, categories = get_menu_snapshot(), get_deals_snapshot(), get_categories_snapshot()
+    snapshot = _snapshot
+    if (snapshot is not None and snapshot.menu is menu and snapshot.deals is deals
+            and snapshot.categories is categories):
+        return snapshot
+    with _snapshot_lock:
+        # Versions are numbered in publish order, so one never names two different catalogs
+        previous = _snapshot
+        version = previous.version + 1 if previous is not None else 1
+        snapshot = CatalogSnapshot(version, menu, deals, categories,
+                                   catalog=previous.catalog if previous is not None else None)
+        # A single reference swap: readers see the old snapshot or the new one, never a mix
+        _snapshot = snapshot
+    return snapshot
+
+
+def read_catalogs() -> Tuple[Dict[str, List[Dict]], List[Dict], List[Dict], Dict]:
+    """
+    (menu, deals, categories, settings) read from storage, not the cache.
+    Unlike the load_* functions a read error is raised, not replaced by an
+    empty catalog, for callers that must not take a broken file for an empty one.
+    """
+    return _store.load_menu(), _store.load_deals(), _store.load_categories(), _read_settings()
 
 
 # =============================================================================
 # MENU MANAGEMENT
 # =============================================================================
 
-def load_menu() -> Dict[str, List[Dict]]:
-    """Load the complete menu from JSON file."""
+def get_menu_snapshot() -> Dict[str, List[Dict]]:
+    """Cached, shared menu. Read-only: use load_menu() to get a copy you can modify."""
     try:
-        with menu_lock:
-            if config.MENU_FILE.exists():
-                with open(config.MENU_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+        return _cached_catalog("menu", _store.load_menu)
     except Exception as e:
         print(f"Error loading menu: {e}")
     return {}
 
 
+def load_menu() -> Dict[str, List[Dict]]:
+    """Load the complete menu from JSON file."""
+    return copy.deepcopy(get_menu_snapshot())
+
+
 def save_menu(menu: Dict[str, List[Dict]]) -> bool:
-    """Save the complete menu to JSON file."""
+    """Save the complete menu to JSON file and publish it to every session."""
     try:
-        with menu_lock:
-            with open(config.MENU_FILE, 'w', encoding='utf-8') as f:
-                json.dump(menu, f, ensure_ascii=False, indent=4)
+        with _store.lock("menu"):
+            _store.save_menu(menu)
+            _publish_catalog("menu", menu)
         return True
     except Exception as e:
+        invalidate_catalog_cache("menu")
         print(f"Error saving menu: {e}")
         return False
 
 
+def get_catalog() -> Catalog:
+    """Item lookups and views over the cached menu, rebuilt only when the menu changes."""
+    return get_catalog_snapshot().catalog
+
+
 def get_menu_item(item_id: str) -> Optional[Dict]:
     """Get a specific menu item by ID."""
-    menu = load_menu()
-    for category, items in menu.items():
-        for item in items:
-            if item['item_id'] == item_id:
-                return item
-    return None
+    return records.plain(get_catalog().get(item_id))
 
 
 def add_menu_item(category: str, item: Dict) -> bool:
     """Add a new item to a category."""
-    menu = load_menu()
-    if category not in menu:
-        menu[category] = []
-    menu[category].append(item)
-    return save_menu(menu)
+    try:
+        with transaction("menu") as menu:
+            menu.setdefault(category, []).append(item)
+        return True
+    except Exception as e:
+        print(f"Error saving menu: {e}")
+        return False
 
 
 def update_menu_item(item_id: str, updated_item: Dict) -> bool:
     """Update an existing menu item."""
-    menu = load_menu()
-    for category, items in menu.items():
-        for i, item in enumerate(items):
-            if item['item_id'] == item_id:
-                menu[category][i] = updated_item
-                return save_menu(menu)
-    return False
+    try:
+        with transaction("menu") as menu:
+            position = get_catalog().locate(menu, item_id)
+            if position is None:
+                return False
+            category, index = position
+            menu[category][index] = updated_item
+        return True
+    except Exception as e:
+        print(f"Error saving menu: {e}")
+        return False
 
 
 def delete_menu_item(item_id: str) -> bool:
     """Delete a menu item by ID."""
-    menu = load_menu()
-    for category, items in menu.items():
-        for i, item in enumerate(items):
-            if item['item_id'] == item_id:
-                del menu[category][i]
-                return save_menu(menu)
-    return False
+    try:
+        with transaction("menu") as menu:
+            position = get_catalog().locate(menu, item_id)
+            if position is None:
+                return False
+            category, index = position
+            del menu[category][index]
+        return True
+    except Exception as e:
+        print(f"Error saving menu: {e}")
+        return False
+
+
+def set_item_featured(item_id: str, featured: bool) -> bool:
+    """Show or hide a menu item in the Home Page showcase."""
+    try:
+        with transaction("menu") as menu:
+            position = get_catalog().locate(menu, item_id)
+            if position is None:
+                return False
+            category, index = position
+            menu[category][index]['featured'] = featured
+        return True
+    except Exception as e:
+        print(f"Error saving menu: {e}")
+        return False
+
+
+def upsert_menu_items(items_by_category: Dict[str, List[Dict]]) -> bool:
+    """
+    Add or replace several menu items in one write ({category: [items]}).
+    An item already on the menu under another category moves to the given one.
+    """
+    try:
+        with transaction("menu") as menu:
+            catalog = get_catalog()
+            for category, items in items_by_category.items():
+                for item in items:
+                    position = catalog.locate(menu, item['item_id'])
+                    if position is not None and position[0] == category:
+                        menu[category][position[1]] = item
+                        continue
+                    if position is not None:
+                        del menu[position[0]][position[1]]
+                    menu.setdefault(category, []).append(item)
+        return True
+    except Exception as e:
+        print(f"Error saving menu: {e}")
+        return False
+
+
+def set_availability_many(item_ids: List[str], available: bool) -> List[str]:
+    """Mark several menu items (un)available in one write. Returns the IDs found on the menu."""
+    updated = []
+    try:
+        with transaction("menu") as menu:
+            catalog = get_catalog()
+            for item_id in dict.fromkeys(item_ids):
+                position = catalog.locate(menu, item_id)
+                if position is not None:
+                    category, index = position
+                    menu[category][index]['available'] = available
+                    updated.append(item_id)
+        return updated
+    except Exception as e:
+        print(f"Error saving menu: {e}")
+        return []
 
 
 def get_available_items(category: str = None) -> Dict[str, List[Dict]]:
     """Get only available items, optionally filtered by category."""
-    menu = load_menu()
-    result = {}
-    for cat, items in menu.items():
-        if category and cat != category:
-            continue
-        available = [item for item in items if item.get('available', True)]
-        if available:
-            result[cat] = available
-    return result
+    available = get_catalog().available
+    if category:
+        return {category: records.plain(available[category])} if category in available else {}
+    return records.plain(available)
+
+
+def get_featured_items(available_only: bool = False) -> List[Dict]:
+    """Items shown on the Home Page, in menu order."""
+    return records.plain(get_catalog().featured_items(available_only))
 
 
 # =============================================================================
 # DEALS MANAGEMENT
 # =============================================================================
 
-def load_deals() -> List[Dict]:
-    """Load all deals from JSON file."""
+def get_deals_snapshot() -> List[Dict]:
+    """Cached, shared deals list. Read-only: use load_deals() to get a copy you can modify."""
     try:
-        with deals_lock:
-            if config.DEALS_FILE.exists():
-                with open(config.DEALS_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+        return _cached_catalog("deals", _store.load_deals)
     except Exception as e:
         print(f"Error loading deals: {e}")
     return []
 
 
+def load_deals() -> List[Dict]:
+    """Load all deals from JSON file."""
+    return copy.deepcopy(get_deals_snapshot())
+
+
 def save_deals(deals: List[Dict]) -> bool:
-    """Save all deals to JSON file."""
+    """Save all deals to JSON file and publish them to every session."""
     try:
-        with deals_lock:
-            with open(config.DEALS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(deals, f, ensure_ascii=False, indent=4)
+        with _store.lock("deals"):
+            _store.save_deals(deals)
+            _publish_catalog("deals", deals)
         return True
     except Exception as e:
+        invalidate_catalog_cache("deals")
         print(f"Error saving deals: {e}")
         return False
 
 
 def get_active_deals() -> List[Dict]:
     """Get all active deals sorted by order."""
-    deals = load_deals()
-    active = [d for d in deals if d.get('active', False)]
-    return sorted(active, key=lambda x: x.get('order', 999))
+    return records.plain(get_catalog_snapshot().active_deals)
 
 
 def add_deal(deal: Dict) -> bool:
     """Add a new deal."""
-    deals = load_deals()
-    if 'order' not in deal:
-        deal['order'] = get_next_deal_order()
-    deals.append(deal)
-    return save_deals(deals)
+    try:
+        with transaction("deals") as deals:
+            if 'order' not in deal:
+                deal['order'] = max((d.get('order', 0) for d in deals), default=0) + 1
+            deals.append(deal)
+        return True
+    except Exception as e:
+        print(f"Error saving deals: {e}")
+        return False
 
 
 def update_deal(deal_id: str, updated_deal: Dict) -> bool:
     """Update an existing deal."""
-    deals = load_deals()
-    for i, deal in enumerate(deals):
-        if deal['deal_id'] == deal_id:
-            deals[i] = updated_deal
-            return save_deals(deals)
-    return False
+    try:
+        with transaction("deals") as deals:
+            for i, deal in enumerate(deals):
+                if deal['deal_id'] == deal_id:
+                    deals[i] = updated_deal
+                    return True
+        return False
+    except Exception as e:
+        print(f"Error saving deals: {e}")
+        return False
 
 
 def delete_deal(deal_id: str) -> bool:
     """Delete a deal by ID."""
-    deals = load_deals()
-    for i, deal in enumerate(deals):
-        if deal['deal_id'] == deal_id:
-            del deals[i]
-            return save_deals(deals)
-    return False
+    try:
+        with transaction("deals") as deals:
+            for i, deal in enumerate(deals):
+                if deal['deal_id'] == deal_id:
+                    del deals[i]
+                    return True
+        return False
+    except Exception as e:
+        print(f"Error saving deals: {e}")
+        return False
 
 
 def get_deal(deal_id: str) -> Optional[Dict]:
     """Get a specific deal by ID."""
-    deals = load_deals()
-    for deal in deals:
-        if deal['deal_id'] == deal_id:
-            return deal
-    return None
+    return records.plain(get_catalog_snapshot().get_deal(deal_id))
 
 
 def get_next_deal_id() -> str:
     """Generate the next deal ID."""
-    deals = load_deals()
+    deals = get_deals_snapshot()
     if not deals:
         return "d01"
     max_num = 0
@@ -193,7 +400,7 @@ def get_next_deal_id() -> str:
 
 def get_next_deal_order() -> int:
     """Get the next order number for a new deal."""
-    deals = load_deals()
+    deals = get_deals_snapshot()
     if not deals:
         return 1
     return max(d.get('order', 0) for d in deals) + 1
@@ -203,45 +410,146 @@ def get_next_deal_order() -> int:
 # ORDER MANAGEMENT
 # =============================================================================
 
-def load_orders() -> List[Dict]:
-    """Load all orders from JSON file."""
+def _iso_date(value: Union[str, date, None]) -> Optional[str]:
+    if value is None:
+        return None
+    return value[:10] if isinstance(value, str) else value.isoformat()[:10]
+
+
+def _order_dict(order):
+    """
+    An order as a plain dict. The JSON and memory backends index compact
+    records (utils/records.py); callers get dicts on every backend, which
+    they can serialize, modify or turn into DataFrames.
+    """
+    return order.to_dict() if isinstance(order, records.Record) else order
+
+
+def _order_dicts(orders) -> List[Dict]:
+    return [_order_dict(order) for order in orders]
+
+
+def load_orders(start_date: Union[str, date] = None, end_date: Union[str, date] = None) -> List[Dict]:
+    """
+    Load the order history, or only orders placed between start_date and end_date
+    (inclusive). With ORDERS_PARTITION set, only overlapping partitions are opened.
+    """
     try:
-        with orders_lock:
-            if config.ORDERS_FILE.exists():
-                with open(config.ORDERS_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+        return _order_dicts(_store.load_orders(_iso_date(start_date), _iso_date(end_date)))
+    except Exception as e:
+        print(f"Error loading orders: {e}")
+    return []
+
+
+def load_live_orders() -> List[Dict]:
+    """
+    Orders the cashier and customer pages work with: every Pending order plus
+    the settled ones not archived yet, i.e. younger than ORDERS_ARCHIVE_AFTER_DAYS
+    or else from the current partition period (all orders if neither is set).
+    """
+    try:
+        return _order_dicts(_store.load_live_orders())
     except Exception as e:
         print(f"Error loading orders: {e}")
     return []
 
 
 def save_orders(orders: List[Dict]) -> bool:
-    """Save all orders to JSON file."""
+    """Save orders (replaces the live orders; partitions are left as they are)."""
     try:
-        with orders_lock:
-            with open(config.ORDERS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(orders, f, ensure_ascii=False, indent=4)
+        _store.save_orders(orders)
         return True
     except Exception as e:
         print(f"Error saving orders: {e}")
         return False
 
 
+def compact_orders() -> bool:
+    """Fold the order journal into orders.json. Returns True if anything was folded."""
+    try:
+        return _store.compact_orders()
+    except Exception as e:
+        print(f"Error compacting orders: {e}")
+        return False
+
+
+def archive_orders(older_than_days: int = None) -> int:
+    """
+    Move settled orders out of the live set into the archive (the partition
+    files of the JSON backend): those placed more than older_than_days ago if
+    given, else ORDERS_ARCHIVE_AFTER_DAYS ago, else before the current partition
+    period. Archived orders still show up in load_orders, get_order_by_id,
+    search_orders and query_orders. Returns the number of orders moved.
+    """
+    before = None
+    if older_than_days is not None:
+        before = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+    try:
+        return _store.archive_orders(before)
+    except Exception as e:
+        print(f"Error archiving orders: {e}")
+        return 0
+
+
+def expire_pending_orders(timeout_hours: float = None) -> List[int]:
+    """
+    Mark Pending orders placed more than timeout_hours ago
+    (PENDING_ORDER_TIMEOUT_HOURS by default) as Expired, so abandoned orders
+    stop holding their table open. Returns the IDs of the expired orders.
+    """
+    hours = config.PENDING_ORDER_TIMEOUT_HOURS if timeout_hours is None else timeout_hours
+    if hours <= 0:
+        return []
+    before = (datetime.now() - timedelta(hours=hours)).isoformat()
+    try:
+        return _store.expire_pending_orders(before, _status_fields("Expired"))
+    except Exception as e:
+        print(f"Error expiring orders: {e}")
+        return []
+
+
+_maintenance_started = False
+
+
+def start_order_maintenance(interval: int = None):
+    """
+    Start the background thread that expires abandoned Pending orders,
+    archives settled ones and compacts the order journal (once per process,
+    only if any of them is enabled).
+    """
+    global _maintenance_started
+    if _maintenance_started:
+        return
+    if not (config.ORDERS_JOURNAL or order_partitions.archive_cutoff() or config.PENDING_ORDER_TIMEOUT_HOURS > 0):
+        return
+    _maintenance_started = True
+    interval = interval or config.ORDER_MAINTENANCE_INTERVAL
+
+    def run():
+        stop = threading.Event()
+        # First round after one interval, not while the app is still starting up
+        while not stop.wait(interval):
+            # Expire first, so orders expired in this round can be archived with the rest
+            expire_pending_orders()
+            archive_orders()
+            compact_orders()
+
+    threading.Thread(target=run, name="order-maintenance", daemon=True).start()
+
+
 def get_next_order_id() -> int:
-    """Generate the next order ID."""
-    orders = load_orders()
-    if not orders:
-        return 1001  # Start from 1001
-    max_id = max(order.get('order_id', 1000) for order in orders)
-    return max_id + 1
+    """Generate the next order ID (allocated from the order ID counter, never reused)."""
+    return _store.next_order_id()
 
 
 def create_order(table_id: int, items: List[Dict], total_price: float) -> Dict:
     """Create a new order with Pending status."""
     order = {
-        "order_id": get_next_order_id(),
+        # Assigned by the backend when the order is stored
+        "order_id": None,
         "table_id": table_id,
-        "items": items,
+        # Copy the lines so later cart edits can't leak into the stored order
+        "items": [dict(item) for item in items],
         "total_price": round(total_price, 2),
         "status": "Pending",
         "payment_method": None,
@@ -249,141 +557,484 @@ def create_order(table_id: int, items: List[Dict], total_price: float) -> Dict:
         "paid_timestamp": None
     }
     
-    orders = load_orders()
-    orders.append(order)
-    save_orders(orders)
-    return order
+    try:
+        order = _store.insert_order(order)
+    except Exception as e:
+        print(f"Error saving order: {e}")
+    return copy.deepcopy(order)
+
+
+def _status_fields(status: str, payment_method: str = None) -> Dict:
+    fields = {"status": status}
+    if status == "Paid":
+        fields["payment_method"] = payment_method
+        fields["paid_timestamp"] = datetime.now().isoformat()
+    return fields
 
 
 def update_order_status(order_id: int, status: str, payment_method: str = None) -> bool:
     """Update order status (e.g., mark as Paid)."""
-    orders = load_orders()
-    for order in orders:
-        if order['order_id'] == order_id:
-            order['status'] = status
-            if status == "Paid":
-                order['payment_method'] = payment_method
-                order['paid_timestamp'] = datetime.now().isoformat()
-            return save_orders(orders)
-    return False
+    try:
+        return _store.update_order_fields(order_id, _status_fields(status, payment_method))
+    except Exception as e:
+        print(f"Error updating order: {e}")
+        return False
+
+
+def update_order_status_many(order_ids: List[int], status: str, payment_method: str = None) -> List[int]:
+    """Update the status of several orders in one write. Returns the IDs that were updated."""
+    if not order_ids:
+        return []
+    try:
+        return _store.update_orders_fields(list(order_ids), _status_fields(status, payment_method))
+    except Exception as e:
+        print(f"Error updating orders: {e}")
+        return []
+
+
+def get_orders_by_status(status: str) -> List[Dict]:
+    """
+    Get live orders with the given status (served from the status index).
+    Pending orders are always live; settled ones only until they are archived (see load_live_orders).
+    """
+    try:
+        return _order_dicts(_store.get_orders_by_status(status))
+    except Exception as e:
+        print(f"Error loading orders: {e}")
+    return []
 
 
 def get_pending_orders() -> List[Dict]:
     """Get all pending (unpaid) orders."""
-    orders = load_orders()
-    return [o for o in orders if o.get('status') == 'Pending']
+    return get_orders_by_status('Pending')
+
 
+def get_paid_orders(start_date: Union[str, date] = None, end_date: Union[str, date] = None) -> List[Dict]:
+    """Get paid orders from the whole history, or placed between the dates (for analytics)."""
+    if start_date is None and end_date is None and not order_partitions.enabled():
+        return get_orders_by_status('Paid')
+    return [order for order in load_orders(start_date, end_date) if order.get('status') == 'Paid']
 
-def get_paid_orders() -> List[Dict]:
-    """Get all paid orders (for analytics)."""
-    orders = load_orders()
-    return [o for o in orders if o.get('status') == 'Paid']
+
+def get_orders_by_table(table_id: int, open_only: bool = False) -> List[Dict]:
+    """Get all orders for a specific table (only unpaid ones if open_only)."""
+    try:
+        return _order_dicts(_store.get_orders_by_table(table_id, open_only))
+    except Exception as e:
+        print(f"Error loading orders: {e}")
+    return []
+
+
+def get_table_total(table_id: int) -> float:
+    """Running total a table owes across its unpaid orders."""
+    return get_open_tables().get(table_id, 0.0)
+
+
+def get_open_tables() -> Dict[int, float]:
+    """All tables with unpaid orders, mapped to the amount they owe."""
+    try:
+        return _store.get_open_table_totals()
+    except Exception as e:
+        print(f"Error loading orders: {e}")
+    return {}
 
 
-def get_orders_by_table(table_id: int) -> List[Dict]:
-    """Get all orders for a specific table."""
-    orders = load_orders()
-    return [o for o in orders if o.get('table_id') == table_id]
+def close_table(table_id: int, payment_method: str) -> List[int]:
+    """Mark every unpaid order of a table as Paid in one write. Returns the paid order IDs."""
+    fields = {"status": "Paid", "payment_method": payment_method,
+              "paid_timestamp": datetime.now().isoformat()}
+    try:
+        return _store.close_table(table_id, fields)
+    except Exception as e:
+        print(f"Error closing table: {e}")
+        return []
 
 
 def get_order_by_id(order_id: int) -> Optional[Dict]:
-    """Get a specific order by ID."""
-    orders = load_orders()
-    for order in orders:
-        if order['order_id'] == order_id:
-            return order
+    """Get a specific order by ID (from the hot shard, else its partition)."""
+    try:
+        return _order_dict(_store.get_order_by_id(order_id))
+    except Exception as e:
+        print(f"Error loading orders: {e}")
     return None
 
 
+def get_change_seq() -> int:
+    """Current order change sequence number (0 before the first write)."""
+    try:
+        return _store.get_change_seq()
+    except Exception as e:
+        print(f"Error loading orders: {e}")
+    return 0
+
+
+def changes_since(seq: int = 0) -> Tuple[int, List[Dict]]:
+    """
+    Orders inserted or updated after change sequence number `seq`, oldest
+    change first, and the number to pass on the next call. Start from
+    get_change_seq() to only see what changes from now on.
+    Orders moved to a partition or deleted by a full rewrite are not reported.
+    """
+    try:
+        seq, changed = _store.changes_since(seq)
+        return seq, _order_dicts(changed)
+    except Exception as e:
+        print(f"Error loading orders: {e}")
+    return seq, []
 
 
 # =============================================================================
 # CATEGORY MANAGEMENT
 # =============================================================================
 
-CATEGORIES_FILE = config.DATA_DIR / "categories.json"
-categories_lock = filelock.FileLock(str(CATEGORIES_FILE) + ".lock")
-
-
-def load_categories() -> List[Dict]:
-    """Load all categories from JSON file."""
+def get_categories_snapshot() -> List[Dict]:
+    """Cached, shared categories list. Read-only: use load_categories() to get a copy you can modify."""
     try:
-        with categories_lock:
-            if CATEGORIES_FILE.exists():
-                with open(CATEGORIES_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+        return _cached_catalog("categories", _store.load_categories)
     except Exception as e:
         print(f"Error loading categories: {e}")
     return []
 
 
+def load_categories() -> List[Dict]:
+    """Load all categories from JSON file."""
+    return copy.deepcopy(get_categories_snapshot())
+
+
 def save_categories(categories: List[Dict]) -> bool:
-    """Save all categories to JSON file."""
+    """Save all categories to JSON file and publish them to every session."""
     try:
-        with categories_lock:
-            with open(CATEGORIES_FILE, 'w', encoding='utf-8') as f:
-                json.dump(categories, f, ensure_ascii=False, indent=4)
+        with _store.lock("categories"):
+            _store.save_categories(categories)
+            _publish_catalog("categories", categories)
         return True
     except Exception as e:
+        invalidate_catalog_cache("categories")
         print(f"Error saving categories: {e}")
         return False
 
 
 def get_active_categories() -> List[Dict]:
     """Get all active categories sorted by order."""
-    categories = load_categories()
-    active = [c for c in categories if c.get('active', True)]
-    return sorted(active, key=lambda x: x.get('order', 999))
+    return records.plain(get_catalog_snapshot().active_categories)
 
 
 def add_category(category: Dict) -> bool:
     """Add a new category."""
-    categories = load_categories()
-    categories.append(category)
-    return save_categories(categories)
+    try:
+        with transaction("categories") as categories:
+            categories.append(category)
+        return True
+    except Exception as e:
+        print(f"Error saving categories: {e}")
+        return False
 
 
 def update_category(category_id: str, updated_category: Dict) -> bool:
     """Update an existing category."""
-    categories = load_categories()
-    for i, cat in enumerate(categories):
-        if cat['id'] == category_id:
-            categories[i] = updated_category
-            return save_categories(categories)
-    return False
+    try:
+        with transaction("categories") as categories:
+            for i, cat in enumerate(categories):
+                if cat['id'] == category_id:
+                    categories[i] = updated_category
+                    return True
+        return False
+    except Exception as e:
+        print(f"Error saving categories: {e}")
+        return False
 
 
 def delete_category(category_id: str) -> bool:
     """Delete a category by ID."""
-    categories = load_categories()
-    for i, cat in enumerate(categories):
-        if cat['id'] == category_id:
-            del categories[i]
-            return save_categories(categories)
-    return False
+    try:
+        with transaction("categories") as categories:
+            for i, cat in enumerate(categories):
+                if cat['id'] == category_id:
+                    del categories[i]
+                    return True
+        return False
+    except Exception as e:
+        print(f"Error saving categories: {e}")
+        return False
+
+
+def reorder_categories(category_ids: List[str]) -> bool:
+    """
+    Renumber the categories' display order in one write: the given IDs first,
+    in that order, then any others in their current order.
+    """
+    try:
+        with transaction("categories") as categories:
+            rank = {category_id: n for n, category_id in enumerate(category_ids)}
+            ordered = sorted(categories, key=lambda c: (rank.get(c['id'], len(rank)), c.get('order', 999)))
+            for n, category in enumerate(ordered, start=1):
+                category['order'] = n
+        return True
+    except Exception as e:
+        print(f"Error saving categories: {e}")
+        return False
 
 
 def get_next_category_order() -> int:
     """Get the next order number for a new category."""
-    categories = load_categories()
+    categories = get_categories_snapshot()
     if not categories:
         return 1
     return max(c.get('order', 0) for c in categories) + 1
 
 
+# =============================================================================
+# SETTINGS
+# =============================================================================
+
+DEFAULT_SETTINGS = {"logo": None, "restaurant_name": "Restaurant", "theme": "dark_luxury"}
+
+settings_lock = filelock.FileLock(str(config.SETTINGS_FILE) + ".lock")
+
+
+def _read_settings() -> Dict:
+    if config.SETTINGS_FILE.exists():
+        return serialization.read(config.SETTINGS_FILE)
+    return dict(DEFAULT_SETTINGS)
+
+
+def load_settings() -> Dict:
+    """App settings (restaurant name, logo, credentials), cached; a copy you can modify."""
+    try:
+        return copy.deepcopy(_cached_catalog("settings", _read_settings))
+    except Exception as e:
+        print(f"Error loading settings: {e}")
+    return dict(DEFAULT_SETTINGS)
+
+
+def save_settings(settings: Dict) -> bool:
+    """Save the app settings and publish them to every session."""
+    try:
+        with settings_lock:
+            serialization.write_atomic(config.SETTINGS_FILE, settings)
+            _publish_catalog("settings", settings)
+        return True
+    except Exception as e:
+        invalidate_catalog_cache("settings")
+        print(f"Error saving settings: {e}")
+        return False
+
+
+# =============================================================================
+# TRANSACTIONS
+# =============================================================================
+
+@contextmanager
+def transaction(name: str):
+    """
+    Read-modify-write unit of work on "menu", "deals", "categories" or "orders":
+
+        with transaction("menu") as menu:
+            menu["Burgers"].append(item)
+
+    Holds the store's lock for the whole block, loads the data once and
+    writes it back once if it was modified; nothing is written if the block
+    raises. "orders" yields the live orders (see load_live_orders) as a list.
+    """
+    if name == "orders":
+        with _orders_transaction() as orders:
+            yield orders
+        return
+    if name not in ("menu", "deals", "categories"):
+        raise ValueError(f"Unknown store: {name}")
+    with _store.lock(name):
+        original = getattr(_store, f"load_{name}")()
+        data = copy.deepcopy(original)
+        yield data
+        if data != original:
+            try:
+                getattr(_store, f"save_{name}")(data)
+                _publish_catalog(name, data)
+            except Exception:
+                invalidate_catalog_cache(name)
+                raise
+
+
+@contextmanager
+def _orders_transaction():
+    """
+    Write only the difference: changed or new orders are upserted and
+    missing ones deleted, so the JSON backend can journal field changes.
+    """
+    with _store.lock("orders"):
+        original = {order['order_id']: order for order in _store.load_live_orders()}
+        orders = copy.deepcopy(list(original.values()))
+        yield orders
+        kept = {order['order_id'] for order in orders}
+        changed = [order for order in orders if original.get(order['order_id']) != order]
+        deleted = [order_id for order_id in original if order_id not in kept]
+        if changed or deleted:
+            _store.apply_order_changes(changed, deleted)
+
+
+# =============================================================================
+# ANALYTICS SNAPSHOT
+# =============================================================================
+
+columns_lock = filelock.FileLock(str(config.ORDER_COLUMNS_DIR) + ".lock")
+
+
+def _orders_version() -> str:
+    """Changes whenever any order is written (cheap: stat calls or one SQLite lookup)."""
+    return f"{config.STORAGE_BACKEND}:{_store.catalog_version('orders')}"
+
+
+def _refresh_order_columns(order_columns, key: str):
+    """
+    Bring the order snapshot up to `key`: merge in the orders changed since
+    its last build, or rebuild it from the whole history if that doesn't
+    account for every order (orders deleted, or no earlier build).
+    """
+    previous, seq = order_columns.latest()
+    if previous is not None and seq is not None:
+        new_seq, changed = _store.changes_since(seq)
+        changed_ids = list({order['order_id'] for order in changed})
+        if len(previous) - previous.count_present(changed_ids) + len(changed_ids) == _store.order_count():
+            order_columns.update(previous, changed, key, new_seq)
+            return
+    # Read the sequence number first: changes made during the build are merged in next time
+    seq = _store.get_change_seq()
+    order_columns.build(_store.load_orders(), key, seq)
+
+
+def get_order_columns():
+    """
+    Memory-mapped columnar snapshot of the whole order history (see
+    utils/order_columns.py), brought up to date once per change of the orders
+    (by merging in the changed orders) and shared by every process. Returns
+    None if it can't be built (e.g. NumPy missing).
+    """
+    try:
+        from utils import order_columns
+        key = _orders_version()
+        columns = order_columns.load(key)
+        if columns is None:
+            with columns_lock:
+                columns = order_columns.load(key)
+                if columns is None:
+                    _refresh_order_columns(order_columns, key)
+                    columns = order_columns.load(key)
+        return columns
+    except Exception as e:
+        print(f"Error loading order columns: {e}")
+    return None
+
+
+def get_order_frames(start_date: Union[str, date] = None, end_date: Union[str, date] = None,
+                     status: str = None, **criteria):
+    """
+    (orders, lines) DataFrames of the orders placed between the dates with the
+    given status (and any other query_orders criteria), sliced from the
+    columnar snapshot. None if it's unavailable.
+    """
+    columns = get_order_columns()
+    if columns is None:
+        return None
+    return columns.frames(columns.select(start_date, end_date, status, **criteria))
+
+
 # =============================================================================
 # ORDER SEARCH
 # =============================================================================
 
 def search_orders(order_id: int = None, status: str = None) -> List[Dict]:
     """Search orders by various criteria."""
-    orders = load_orders()
-    results = orders
-    
-    if order_id is not None:
-        results = [o for o in results if o.get('order_id') == order_id]
-    
-    if status is not None:
-        results = [o for o in results if o.get('status') == status]
-    
-    return results
+    try:
+        return _order_dicts(_store.search_orders(order_id, status))
+    except Exception as e:
+        print(f"Error loading orders: {e}")
+    return []
+
+
+def _order_matches(order: Dict, status, payment_method, table_id, min_total, max_total, item) -> bool:
+    total = order.get('total_price') or 0
+    return ((status is None or order.get('status') == status)
+            and (payment_method is None or order.get('payment_method') == payment_method)
+            and (table_id is None or order.get('table_id') == table_id)
+            and (min_total is None or total >= min_total)
+            and (max_total is None or total <= max_total)
+            and (item is None or any(item in (line.get('item_id'), line.get('name'))
+                                     for line in order.get('items') or [])))
+
+
+def _cursor_key(cursor: str) -> Tuple[datetime, int]:
+    timestamp, order_id = cursor.rsplit("|", 1)
+    return (datetime.fromisoformat(timestamp) if timestamp else datetime.max), int(order_id)
+
+
+def _order_key(order: Dict) -> Tuple[datetime, int]:
+    timestamp = order.get('timestamp')
+    return (datetime.fromisoformat(timestamp) if timestamp else datetime.max), order['order_id']
+
+
+def query_orders(start_date: Union[str, date] = None, end_date: Union[str, date] = None,
+                 status: str = None, payment_method: str = None, table_id: int = None,
+                 min_total: float = None, max_total: float = None, item: str = None,
+                 limit: int = 50, cursor: str = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of the orders matching every given criterion (see count_orders),
+    newest first, and the cursor to pass for the next page (None on the last
+    page). `item` matches an order line's item_id or name.
+
+    Uses the columnar snapshot: the date range is a binary search on its
+    sorted timestamps, the other criteria vectorized column filters, and only
+    the page's orders are fetched. Cursors are (timestamp, order_id) keys, so
+    pages stay consistent while new orders arrive.
+    """
+    start_date, end_date = _iso_date(start_date), _iso_date(end_date)
+    try:
+        columns = get_order_columns()
+        if columns is None:
+            # No NumPy: filter the orders in the date range
+            matching = [o for o in load_orders(start_date, end_date)
+                        if _order_matches(o, status, payment_method, table_id, min_total, max_total, item)]
+            if cursor:
+                before = _cursor_key(cursor)
+                matching = [o for o in matching if _order_key(o) < before]
+            matching.sort(key=_order_key, reverse=True)
+            page = matching[:limit]
+            next_cursor = None
+            if len(matching) > limit:
+                next_cursor = f"{page[-1].get('timestamp') or ''}|{page[-1]['order_id']}"
+        else:
+            mask = columns.select(start_date, end_date, status, payment_method, table_id,
+                                  min_total, max_total, item)
+            before = None
+            if cursor:
+                before = columns.position(*cursor.rsplit("|", 1))
+            rows = columns.newest(mask, limit + 1, before)
+            page = [order for order in (get_order_by_id(int(order_id))
+                                        for order_id in columns.headers["order_id"][rows[:limit]])
+                    if order is not None]
+            next_cursor = columns.cursor(rows[limit - 1]) if len(rows) > limit else None
+        return page, next_cursor
+    except Exception as e:
+        print(f"Error querying orders: {e}")
+        return [], None
+
+
+def count_orders(start_date: Union[str, date] = None, end_date: Union[str, date] = None,
+                 status: str = None, payment_method: str = None, table_id: int = None,
+                 min_total: float = None, max_total: float = None, item: str = None) -> int:
+    """Number of orders query_orders would page through for these criteria."""
+    start_date, end_date = _iso_date(start_date), _iso_date(end_date)
+    try:
+        columns = get_order_columns()
+        if columns is None:
+            return sum(_order_matches(o, status, payment_method, table_id, min_total, max_total, item)
+                       for o in load_orders(start_date, end_date))
+        return int(columns.select(start_date, end_date, status, payment_method, table_id,
+                                  min_total, max_total, item).sum())
+    except Exception as e:
+        print(f"Error querying orders: {e}")
+        return 0
+
+
+# Expire, archive and compact orders in the background
+start_order_maintenance()
+start_data_watcher()
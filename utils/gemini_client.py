@@ -7,6 +7,7 @@ import google.generativeai as genai
 from typing import List, Dict, Optional
 import config
 import logging
+from utils.catalog import Catalog
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -122,6 +123,7 @@ class RestaurantChatbot:
     def __init__(self, menu_data: Dict, table_id: int, deals: List[Dict]):
         self.table_id = table_id
         self.menu_data = menu_data
+        self.catalog = Catalog(menu_data)
         self.deals = deals
         self.system_prompt = get_system_prompt(table_id, menu_data, deals)
         self.chat = None
@@ -239,14 +241,7 @@ Just tell me what sounds good, or ask me anything! I'm here to help!"""
     
     def add_to_order(self, item_id: str, quantity: int):
         """Add an item to the current order."""
-        item = None
-        for category, items in self.menu_data.items():
-            for menu_item in items:
-                if menu_item['item_id'] == item_id:
-                    item = menu_item
-                    break
-            if item:
-                break
+        item = self.catalog.get(item_id)
         
         if item:
             self.order_items.append({
@@ -0,0 +1,75 @@
+"""
+Group commit for bursty writes.
+Threads submit write operations; one of them becomes the leader, collects
+everything queued within a short window and applies the whole batch with a
+single durable write, then hands leadership to the next waiting thread.
+Each caller still gets its own operation's result (or exception).
+"""
+import threading
+import time
+from typing import Any, Callable, List
+
+
+class _Write:
+    __slots__ = ("op", "result", "done", "wake")
+
+    def __init__(self, op: Callable[[], Any]):
+        self.op = op
+        self.result = None
+        self.done = False
+        self.wake = threading.Event()
+
+
+class GroupCommit:
+    """Coalesces concurrent operations into batches passed to apply_batch."""
+
+    def __init__(self, apply_batch: Callable[[List[Callable[[], Any]]], List[Any]], window: float = 0.0):
+        """
+        apply_batch: applies a list of operations with one durable write and
+        returns one result per operation (an Exception instance for a failed
+        one); window: seconds the leader waits for more operations to join.
+        """
+        self.apply_batch = apply_batch
+        self.window = window
+        self._mutex = threading.Lock()
+        self._queue: List[_Write] = []
+        self._busy = False
+        self.batches = 0
+        self.operations = 0
+
+    def submit(self, op: Callable[[], Any]) -> Any:
+        """Run op as part of the next batch and return its result (re-raising its exception)."""
+        write = _Write(op)
+        with self._mutex:
+            self._queue.append(write)
+            leader = not self._busy
+            self._busy = True
+        if not leader:
+            write.wake.wait()
+        if not write.done:
+            # First in line, or promoted by the previous leader
+            self._lead()
+        if isinstance(write.result, Exception):
+            raise write.result
+        return write.result
+
+    def _lead(self):
+        if self.window:
+            time.sleep(self.window)
+        with self._mutex:
+            batch, self._queue = self._queue, []
+        try:
+            results = self.apply_batch([write.op for write in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        self.batches += 1
+        self.operations += len(batch)
+        for write, result in zip(batch, results):
+            write.result = result
+            write.done = True
+            write.wake.set()
+        with self._mutex:
+            if self._queue:
+                self._queue[0].wake.set()
+            else:
+                self._busy = False
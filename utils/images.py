@@ -0,0 +1,291 @@
+"""
+Resized variants of uploaded images (logo and item, deal and category photos).
+Uploads are stored as they come, at full camera resolution; each one gets a
+"thumb", "card" and "hero" variant in compact WebP without metadata (EXIF,
+GPS, ICC), written by a background thread so the admin page isn't held up.
+Pages ask for an image at the width they show it (variant_path, image_src)
+and get the smallest variant that is sharp at that width, or the original
+until its variants exist. Without Pillow the originals are used.
+
+Uploads are stored under the hash of their content (store_image), so the
+same picture uploaded again, or for another item, is stored once.
+sweep_images removes images no record references any more.
+
+    python -m utils.images              # create missing variants for every stored image
+    python -m utils.images --sweep      # remove unreferenced images and their variants
+"""
+import argparse
+import base64
+import hashlib
+import mimetypes
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path, PureWindowsPath
+from typing import Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from utils.database import read_catalogs
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Variant -> width in pixels, smallest first. Widths cover 2x (HiDPI) displays:
+# thumb for the 60px cart and 100px category tiles, card for menu/deal cards and the logo.
+VARIANTS = {"thumb": 240, "card": 800, "hero": 1600}
+WEBP_QUALITY = 80
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+PIXEL_RATIO = 2
+# Length of the content hash in stored file names (hex digits of SHA-256)
+HASH_LENGTH = 24
+# Unreferenced images younger than this are kept: an upload is stored before its form is saved
+SWEEP_GRACE_SECONDS = 3600
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-variants")
+_pending = set()
+# Images whose variants couldn't be made (e.g. not an image): not retried in this process
+_failed = set()
+_pending_lock = threading.Lock()
+
+
+def _image_name(image: str) -> str:
+    return PureWindowsPath(image).name if "\\" in image else Path(image).name
+
+
+def local_path(image: Optional[str]) -> Optional[Path]:
+    """
+    The file of a stored image path, or None for URLs and missing files.
+    Paths saved on another machine (e.g. a Windows path) are looked up in IMAGES_DIR by name.
+    """
+    if not image or image.startswith(("http://", "https://", "data:")):
+        return None
+    path = Path(image)
+    if path.exists():
+        return path
+    path = config.IMAGES_DIR / _image_name(image)
+    return path if path.exists() else None
+
+
+def _variant_file(path: Path, variant: str) -> Path:
+    return config.IMAGE_VARIANTS_DIR / f"{path.stem}.{variant}.webp"
+
+
+def _has_variants(path: Path) -> bool:
+    return all(_variant_file(path, variant).exists() for variant in VARIANTS)
+
+
+def store_image(data: bytes, suffix: str) -> str:
+    """
+    Store an uploaded image under the hash of its content and return its path.
+    An identical image that is already stored is reused, not written again.
+    """
+    suffix = suffix.lower()
+    if suffix == ".jpeg":
+        suffix = ".jpg"
+    path = config.IMAGES_DIR / f"{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{suffix}"
+    if path.exists():
+        # Restart the sweep's grace period: the form using it may not be saved yet
+        os.utime(path)
+    else:
+        config.IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, path)
+    if not _has_variants(path):
+        schedule_variants(str(path))
+    return str(path)
+
+
+def make_variants(path: Path) -> Dict[str, str]:
+    """Write every variant of an image (replacing old ones). Returns variant -> file."""
+    if Image is None:
+        return {}
+    config.IMAGE_VARIANTS_DIR.mkdir(parents=True, exist_ok=True)
+    written = {}
+    with Image.open(path) as original:
+        # Apply the EXIF orientation before the metadata is dropped
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = "A" in image.getbands() or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        for variant, width in VARIANTS.items():
+            resized = image
+            if image.width > width:
+                resized = image.resize((width, max(1, round(image.height * width / image.width))),
+                                       Image.LANCZOS)
+            target = _variant_file(path, variant)
+            tmp_file = target.with_suffix(".tmp")
+            # No exif/icc_profile arguments: the variant carries no metadata
+            resized.save(tmp_file, "WEBP", quality=WEBP_QUALITY, method=4)
+            os.replace(tmp_file, target)
+            written[variant] = str(target)
+    return written
+
+
+def schedule_variants(image: Optional[str]):
+    """Create an image's variants on the background thread (once at a time per image)."""
+    path = local_path(image)
+    if path is None or Image is None:
+        return
+    with _pending_lock:
+        if path in _pending or path in _failed:
+            return
+        _pending.add(path)
+
+    def run():
+        try:
+            make_variants(path)
+        except Exception as e:
+            _failed.add(path)
+            print(f"Error creating image variants of {path.name}: {e}")
+        finally:
+            with _pending_lock:
+                _pending.discard(path)
+
+    _executor.submit(run)
+
+
+def variant_path(image: Optional[str], width: int) -> Optional[str]:
+    """
+    The smallest variant of a local image that is sharp at `width` CSS pixels,
+    else the original (whose variants are then created in the background).
+    URLs are returned as they are; None if a local image is missing.
+    """
+    path = local_path(image)
+    if path is None:
+        return image if image and image.startswith(("http://", "https://", "data:")) else None
+    needed = width * PIXEL_RATIO
+    for variant, variant_width in VARIANTS.items():
+        if variant_width >= needed or variant == "hero":
+            target = _variant_file(path, variant)
+            if target.exists():
+                return str(target)
+            break
+    schedule_variants(str(path))
+    return str(path)
+
+
+def variant_pending(image: Optional[str], path: Optional[str]) -> bool:
+    """
+    True if `path`, returned by variant_path for `image`, is the original
+    standing in for a variant that is still to be made.
+    """
+    if Image is None or not path or path.startswith(("http://", "https://", "data:")):
+        return False
+    original = local_path(image)
+    return original is not None and path == str(original) and original not in _failed
+
+
+@lru_cache(maxsize=256)
+def _data_uri(path: str, signature: tuple) -> str:
+    mime_type, _ = mimetypes.guess_type(path)
+    with open(path, "rb") as f:
+        data = base64.b64encode(f.read()).decode()
+    return f"data:{mime_type or 'image/png'};base64,{data}"
+
+
+def image_src(image: Optional[str], width: int) -> str:
+    """src for an <img> shown `width` CSS pixels wide: the URL, or the best local variant inlined."""
+    path = variant_path(image, width)
+    if not path or path.startswith(("http://", "https://", "data:")):
+        return path or ""
+    stat = os.stat(path)
+    return _data_uri(path, (stat.st_mtime_ns, stat.st_size))
+
+
+def image_references() -> Counter:
+    """
+    Reference count of every stored image (by file name) in the menu, deals,
+    categories and settings. Raises if any of them can't be read.
+    """
+    menu, deals, categories, settings = read_catalogs()
+    images = [item.get('image') for items in menu.values() for item in items]
+    images += [deal.get('image') for deal in deals]
+    images += [category.get('image') for category in categories]
+    images.append(settings.get('logo'))
+    return Counter(_image_name(image) for image in images
+                   if image and not image.startswith(("http://", "https://", "data:")))
+
+
+def sweep_images(grace_seconds: int = SWEEP_GRACE_SECONDS, dry_run: bool = False) -> Optional[List[str]]:
+    """
+    Remove stored images with no references (older than grace_seconds) and
+    variants whose original is gone. Returns the names of the removed files,
+    or None without removing anything if a catalog couldn't be read.
+    """
+    try:
+        references = image_references()
+    except Exception as e:
+        print(f"Error reading the catalogs, no images removed: {e}")
+        return None
+    cutoff = time.time() - grace_seconds
+    removed = []
+    kept = set()
+    for path in sorted(config.IMAGES_DIR.glob("*")):
+        if not path.is_file() or path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        try:
+            if references[path.name] or path.stat().st_mtime > cutoff:
+                kept.add(path.stem)
+                continue
+            if not dry_run:
+                path.unlink()
+            removed.append(path.name)
+        except OSError as e:
+            kept.add(path.stem)
+            print(f"Error removing image {path.name}: {e}")
+    for path in sorted(config.IMAGE_VARIANTS_DIR.glob("*.webp")):
+        if path.name.rsplit(".", 2)[0] in kept:
+            continue
+        try:
+            if not dry_run:
+                path.unlink()
+            removed.append(f"variants/{path.name}")
+        except OSError as e:
+            print(f"Error removing image variant {path.name}: {e}")
+    return removed
+
+
+def create_missing_variants():
+    if Image is None:
+        print("Pillow is not installed")
+        return
+    count = 0
+    for path in sorted(config.IMAGES_DIR.glob("*")):
+        if path.suffix.lower() in IMAGE_SUFFIXES and not _has_variants(path):
+            try:
+                make_variants(path)
+                count += 1
+            except Exception as e:
+                print(f"Error creating image variants of {path.name}: {e}")
+    print(f"Created variants for {count} image(s) in {config.IMAGE_VARIANTS_DIR}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image variants and cleanup of unreferenced images")
+    parser.add_argument("--sweep", action="store_true", help="remove images no record references")
+    parser.add_argument("--dry-run", action="store_true", help="with --sweep, only list what would be removed")
+    args = parser.parse_args()
+    if not args.sweep:
+        create_missing_variants()
+        return
+    removed = sweep_images(dry_run=args.dry_run)
+    if removed is None:
+        sys.exit(1)
+    for name in removed:
+        print(("would remove " if args.dry_run else "removed ") + name)
+    print(f"{len(removed)} unreferenced file(s) in {config.IMAGES_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,557 @@
+"""
+JSON-file storage engine: menu.json, deals.json, categories.json and
+orders.json (plus the optional order journal and partition files) in
+config.DATA_DIR, guarded by FileLocks so several sessions and processes
+can share them. The default backend of utils/database.py.
+"""
+import copy
+import sys
+import filelock
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from utils import order_journal, order_partitions, serialization
+from utils.sequence import Sequence
+from utils.group_commit import GroupCommit
+from utils.order_index import OrderIndex
+
+# File locks for thread safety
+menu_lock = filelock.FileLock(str(config.MENU_FILE) + ".lock")
+orders_lock = filelock.FileLock(str(config.ORDERS_FILE) + ".lock")
+deals_lock = filelock.FileLock(str(config.DEALS_FILE) + ".lock")
+categories_lock = filelock.FileLock(str(config.CATEGORIES_FILE) + ".lock")
+
+CATALOG_FILES = {"menu": config.MENU_FILE, "deals": config.DEALS_FILE, "categories": config.CATEGORIES_FILE}
+
+
+def _read_lock(lock: filelock.FileLock):
+    """The lock a reader takes: none with LOCK_FREE_READS, else the writers' lock."""
+    return nullcontext() if config.LOCK_FREE_READS else lock
+
+
+def _read_file(path: Path, lock: filelock.FileLock, default):
+    with _read_lock(lock):
+        if path.exists():
+            return serialization.read(path)
+    return default
+
+
+def lock(name: str):
+    """The writers' lock of "menu", "deals", "categories" or "orders"."""
+    if name == "orders":
+        return _locked_orders()
+    return {"menu": menu_lock, "deals": deals_lock, "categories": categories_lock}[name]
+
+
+def catalog_version(name: str):
+    """Cheap change marker of a data set: stat calls only."""
+    if name == "orders":
+        manifest = config.ORDERS_PARTITION_DIR / order_partitions.MANIFEST_FILE
+        return (serialization.file_signature(config.ORDERS_FILE), order_journal.signature(), serialization.file_signature(manifest))
+    return serialization.file_signature(CATALOG_FILES[name])
+
+
+# =============================================================================
+# MENU, DEALS & CATEGORIES
+# =============================================================================
+
+def load_menu() -> Dict[str, List[Dict]]:
+    """Load the complete menu."""
+    return _read_file(config.MENU_FILE, menu_lock, {})
+
+
+def save_menu(menu: Dict[str, List[Dict]]):
+    """Replace the complete menu (caller holds lock("menu"))."""
+    serialization.write_atomic(config.MENU_FILE, menu)
+
+
+def load_deals() -> List[Dict]:
+    """Load all deals."""
+    return _read_file(config.DEALS_FILE, deals_lock, [])
+
+
+def save_deals(deals: List[Dict]):
+    """Replace all deals (caller holds lock("deals"))."""
+    serialization.write_atomic(config.DEALS_FILE, deals)
+
+
+def load_categories() -> List[Dict]:
+    """Load all categories."""
+    return _read_file(config.CATEGORIES_FILE, categories_lock, [])
+
+
+def save_categories(categories: List[Dict]):
+    """Replace all categories (caller holds lock("categories"))."""
+    serialization.write_atomic(config.CATEGORIES_FILE, categories)
+
+
+# =============================================================================
+# ORDERS
+# =============================================================================
+
+def _read_orders_snapshot() -> List[Dict]:
+    """Read orders.json (caller holds orders_lock)."""
+    if config.ORDERS_FILE.exists():
+        return serialization.read(config.ORDERS_FILE)
+    return []
+
+
+def _write_orders_snapshot(orders: List[Dict]):
+    """Write orders.json (caller holds orders_lock)."""
+    serialization.write_atomic(config.ORDERS_FILE, orders)
+
+
+class _OrderIndex(OrderIndex):
+    """
+    The JSON backend's order index over orders.json and the order journal.
+    Validated with stat calls; the snapshot is only re-parsed when it was
+    replaced, and journal records written by other processes are applied
+    incrementally.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.snapshot_signature = None
+        # Inode of the journal the offset points into (a reset journal gets a new one)
+        self.journal_inode = None
+        self.journal_offset = 0
+
+    def refresh(self):
+        """Bring the index up to date. Only stats the files when nothing changed."""
+        if self._is_current():
+            return
+        if config.LOCK_FREE_READS:
+            with self.mutex:
+                self._refresh_lock_free()
+        else:
+            with orders_lock, self.mutex:
+                self.refresh_locked()
+
+    def _refresh_lock_free(self):
+        """
+        Refresh without orders_lock. The snapshot is only ever replaced by a
+        rename and the journal only appended to or replaced by a rename, so each
+        read sees a complete version. The journal is reset only after the
+        snapshot was replaced, so a stable snapshot signature means the
+        snapshot and journal tail match.
+        """
+        while True:
+            self.refresh_locked()
+            if serialization.file_signature(config.ORDERS_FILE) == self.snapshot_signature:
+                return
+
+    def _is_current(self) -> bool:
+        if serialization.file_signature(config.ORDERS_FILE) != self.snapshot_signature:
+            return False
+        return not config.ORDERS_JOURNAL or order_journal.signature() == (self.journal_inode, self.journal_offset)
+
+    def refresh_locked(self):
+        """Refresh while the caller holds orders_lock (or from _refresh_lock_free)."""
+        signature = serialization.file_signature(config.ORDERS_FILE)
+        journal_replaced = config.ORDERS_JOURNAL and order_journal.signature()[0] != self.journal_inode
+        if signature != self.snapshot_signature or journal_replaced:
+            self.reset(_read_orders_snapshot())
+            self.snapshot_signature = signature
+            self.journal_inode, self.journal_offset = None, 0
+        if config.ORDERS_JOURNAL:
+            records, offset, inode = order_journal.read(self.journal_offset)
+            if inode != self.journal_inode and self.journal_offset:
+                # Replaced since the check above: start over on the next refresh
+                self.snapshot_signature = None
+                return
+            self.journal_inode, self.journal_offset = inode, offset
+            self.apply(records)
+
+    def mark_current(self):
+        """Record the files just written as indexed: orders.json and the reset journal (caller holds orders_lock)."""
+        self.snapshot_signature = serialization.file_signature(config.ORDERS_FILE)
+        self.journal_inode, self.journal_offset = order_journal.signature()
+
+    def apply(self, records: List[Dict]):
+        """
+        Apply journal records (see utils/order_journal.py). Replay is idempotent,
+        so a crash between writing the snapshot and resetting the journal
+        can't duplicate orders.
+        """
+        for rec in records:
+            if rec.get("op") == "create":
+                self.put(rec["order"])
+            elif rec.get("op") == "update" and rec["order_id"] in self.by_id:
+                self.put({**self.by_id[rec["order_id"]], **rec["fields"]})
+
+    def persist(self, orders: List[Dict], records: List[Dict]):
+        """
+        Durably write created or updated orders in one write, then index them.
+        Caller holds orders_lock and has called refresh_locked().
+        """
+        if not orders:
+            return
+        try:
+            if config.ORDERS_JOURNAL:
+                self.journal_inode, self.journal_offset = order_journal.append(records)
+            else:
+                merged = dict(self.by_id)
+                for order in orders:
+                    merged[order['order_id']] = order
+                _write_orders_snapshot(list(merged.values()))
+                self.snapshot_signature = serialization.file_signature(config.ORDERS_FILE)
+        except Exception:
+            # Orders staged by a batch may already be indexed: reload on next access
+            self.snapshot_signature = None
+            raise
+        for order in orders:
+            self.put(order)
+
+
+_order_index = _OrderIndex()
+
+
+def _highest_order_id() -> int:
+    """Seed for the order ID counter: the highest ID in the history (1000 if empty)."""
+    _order_index.refresh()
+    return max(max(_order_index.by_id, default=1000), order_partitions.highest_order_id())
+
+
+_order_ids = Sequence(config.ORDERS_SEQUENCE_FILE, _highest_order_id, config.ORDER_ID_BLOCK_SIZE)
+
+
+def _highest_change_seq() -> int:
+    """Seed for the change sequence: the highest change_seq in the hot shard (caller holds orders_lock)."""
+    _order_index.refresh_locked()
+    return _order_index.last_change_seq
+
+
+# Stamped on every write as the order's change_seq (JSON backend; SQLite uses its "orders" version)
+_change_seqs = Sequence(config.ORDERS_CHANGES_FILE, _highest_change_seq)
+
+
+def _stamp_changes(orders: List[Dict], records: List[Dict], seq: int) -> List[Dict]:
+    """Tag written orders with change_seq and return their journal records carrying it too."""
+    for order in orders:
+        order['change_seq'] = seq
+    stamped = []
+    for rec in records:
+        if rec.get("op") == "update":
+            rec = order_journal.update_record(rec["order_id"], {**rec["fields"], "change_seq": seq})
+        else:
+            rec = order_journal.create_record({**rec["order"], "change_seq": seq})
+        stamped.append(rec)
+    return stamped
+
+
+def _commit_order_writes(ops: List) -> List:
+    """
+    Apply a batch of order write operations with one lock round-trip and one
+    durable write. Each op runs against the up-to-date index (including the
+    batch's earlier ops) and returns (orders, journal records, result).
+    """
+    results = []
+    staged: Dict[int, Dict] = {}
+    records: List[Dict] = []
+    with orders_lock, _order_index.mutex:
+        _order_index.refresh_locked()
+        seq = _change_seqs.next()
+        for op in ops:
+            try:
+                orders, op_records, result = op()
+            except Exception as e:
+                results.append(e)
+                continue
+            op_records = _stamp_changes(orders, op_records, seq)
+            for order in orders:
+                _order_index.put(order)
+                staged[order['order_id']] = order
+            records.extend(op_records)
+            results.append(result)
+        _order_index.persist(list(staged.values()), records)
+    return results
+
+
+# Concurrent order writes in this process are coalesced into group commits
+_order_writes = GroupCommit(_commit_order_writes, config.ORDER_COMMIT_WINDOW_MS / 1000)
+
+
+
+@contextmanager
+def _locked_orders():
+    with orders_lock, _order_index.mutex:
+        _order_index.refresh_locked()
+        yield
+
+
+def _partitioned_orders(start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+    """Settled orders from the partitions overlapping [start, end] (ISO dates)."""
+    if not order_partitions.enabled():
+        return []
+    periods = order_partitions.periods_between(
+        order_partitions.period_key(start) if start else None,
+        order_partitions.period_key(end) if end else None)
+    return [order for period in periods for order in order_partitions.read(period)
+            if order_partitions.in_range(order, start, end)]
+
+
+def load_orders(start_date: str = None, end_date: str = None) -> List[Dict]:
+    """
+    Load the order history, or only orders placed between the ISO dates
+    (inclusive). With ORDERS_PARTITION set, only overlapping partitions are opened.
+    """
+    _order_index.refresh()
+    live = list(_order_index.by_id.values())
+    if start_date is not None or end_date is not None:
+        live = [order for order in live if order_partitions.in_range(order, start_date, end_date)]
+    # An order in both places (roll-over interrupted mid-way) is served from the hot shard
+    return [order for order in _partitioned_orders(start_date, end_date)
+            if order['order_id'] not in _order_index.by_id] + live
+
+
+def load_live_orders() -> List[Dict]:
+    """The orders in orders.json: every Pending order plus the settled ones not yet archived."""
+    _order_index.refresh()
+    return list(_order_index.by_id.values())
+
+
+def save_orders(orders: List[Dict]):
+    """Replace orders.json (the hot shard; partitions are left as they are)."""
+    with orders_lock, _order_index.mutex:
+        # A full save counts as a change of every order
+        seq = _change_seqs.next()
+        _write_orders_snapshot([{**order, 'change_seq': seq} for order in orders])
+        if config.ORDERS_JOURNAL:
+            # A full save supersedes everything journaled so far
+            order_journal.reset()
+        # The caller may still hold (and modify) these dicts: re-read on next access
+        _order_index.snapshot_signature = None
+
+
+def apply_order_changes(upserts: List[Dict], deleted_ids: List[int]):
+    """
+    Write changed orders and delete removed ones. Creations and field changes
+    become journal records; deletions or removed fields rewrite orders.json.
+    """
+    with _locked_orders():
+        original = _order_index.by_id
+        rewrite = any(order_id in original for order_id in deleted_ids)
+        # Index copies, so the caller's dicts can't change indexed orders later
+        changed, records = copy.deepcopy(upserts), []
+        for order in changed:
+            previous = original.get(order['order_id'])
+            if previous is None:
+                records.append(order_journal.create_record(order))
+            else:
+                if previous.keys() - order.keys():
+                    rewrite = True
+                fields = {k: v for k, v in order.items() if k not in previous or previous[k] != v}
+                records.append(order_journal.update_record(order['order_id'], fields))
+        if not changed and not rewrite:
+            return
+        records = _stamp_changes(changed, records, _change_seqs.next())
+
+        if rewrite:
+            merged = {order_id: order for order_id, order in original.items() if order_id not in deleted_ids}
+            merged.update((order['order_id'], order) for order in changed)
+            orders = list(merged.values())
+            _write_orders_snapshot(orders)
+            if config.ORDERS_JOURNAL:
+                order_journal.reset()
+            _order_index.reset(orders)
+            _order_index.mark_current()
+        else:
+            _order_index.persist(changed, records)
+
+
+def next_order_id() -> int:
+    """Allocate the next order ID from the order ID counter (never reused)."""
+    return _order_ids.next()
+
+
+def insert_order(order: Dict) -> Dict:
+    """Insert a new order, assigning its ID from the order ID counter."""
+    order['order_id'] = _order_ids.next()
+
+    def insert():
+        if order['order_id'] in _order_index.by_id:
+            return [], [], max(_order_index.by_id)
+        return [order], [order_journal.create_record(order)], None
+
+    while True:
+        highest = _order_writes.submit(insert)
+        if highest is None:
+            return order
+        # The counter is behind the data (e.g. orders.json restored from a backup)
+        _order_ids.advance_past(highest)
+        order['order_id'] = _order_ids.next()
+
+
+def update_order_fields(order_id: int, fields: Dict[str, Any]) -> bool:
+    """Update fields of a single order. Returns False if it isn't in orders.json."""
+    def update():
+        current = _order_index.by_id.get(order_id)
+        if current is None:
+            return [], [], False
+        return [{**current, **fields}], [order_journal.update_record(order_id, fields)], True
+
+    return _order_writes.submit(update)
+
+
+def update_orders_fields(order_ids: List[int], fields: Dict[str, Any]) -> List[int]:
+    """Apply the same fields to several orders in one write. Returns the IDs found in orders.json."""
+    def update():
+        found = [_order_index.by_id[order_id] for order_id in dict.fromkeys(order_ids)
+                 if order_id in _order_index.by_id]
+        return ([{**order, **fields} for order in found],
+                [order_journal.update_record(order['order_id'], fields) for order in found],
+                [order['order_id'] for order in found])
+
+    return _order_writes.submit(update)
+
+
+def close_table(table_id: int, fields: Dict[str, Any]) -> List[int]:
+    """Apply the same fields to every Pending order of a table in one write. Returns their IDs."""
+    def close():
+        open_orders = _order_index.for_table(table_id, open_only=True)
+        return ([{**order, **fields} for order in open_orders],
+                [order_journal.update_record(order['order_id'], fields) for order in open_orders],
+                [order['order_id'] for order in open_orders])
+
+    return _order_writes.submit(close)
+
+
+def get_order_by_id(order_id: int) -> Optional[Dict]:
+    """Get a specific order by ID (from the hot shard, else its partition)."""
+    _order_index.refresh()
+    order = _order_index.by_id.get(order_id)
+    if order is None and order_partitions.enabled():
+        order = order_partitions.find(order_id)
+    return order
+
+
+def get_orders_by_status(status: str) -> List[Dict]:
+    """Orders in orders.json with the given status (served from the status index)."""
+    _order_index.refresh()
+    return _order_index.with_status(status)
+
+
+def get_orders_by_table(table_id: int, open_only: bool = False) -> List[Dict]:
+    """Orders in orders.json for a table (only Pending ones if open_only)."""
+    _order_index.refresh()
+    return _order_index.for_table(table_id, open_only)
+
+
+def get_open_table_totals() -> Dict[Any, float]:
+    """Amount owed per table across its Pending orders."""
+    _order_index.refresh()
+    return dict(_order_index.table_totals)
+
+
+def expire_pending_orders(before: str, fields: Dict[str, Any]) -> List[int]:
+    """Apply the same fields to every Pending order placed before the ISO timestamp in one write. Returns their IDs."""
+    def expire():
+        stale = [order for order in _order_index.with_status('Pending')
+                 if order.get('timestamp') and order['timestamp'] < before]
+        return ([{**order, **fields} for order in stale],
+                [order_journal.update_record(order['order_id'], fields) for order in stale],
+                [order['order_id'] for order in stale])
+
+    return _order_writes.submit(expire)
+
+
+def search_orders(order_id: int = None, status: str = None) -> List[Dict]:
+    """Search orders by ID and/or status, including the partitions."""
+    if order_id is not None:
+        order = get_order_by_id(order_id)
+        return [order] if order and (status is None or order.get('status') == status) else []
+    if status is None:
+        return load_orders()
+    results = get_orders_by_status(status)
+    if status == 'Pending':
+        return results
+    return [o for o in _partitioned_orders()
+            if o.get('status') == status and o['order_id'] not in _order_index.by_id] + results
+
+
+def order_count() -> int:
+    """Number of orders in orders.json plus those in the partitions (from the manifest)."""
+    _order_index.refresh()
+    count = len(_order_index.by_id)
+    if order_partitions.enabled():
+        count += sum(info["count"] for info in order_partitions.read_manifest().values())
+    return count
+
+
+def get_change_seq() -> int:
+    """Current order change sequence number (0 before the first write)."""
+    _order_index.refresh()
+    return _order_index.last_change_seq
+
+
+def changes_since(seq: int) -> Tuple[int, List[Dict]]:
+    """
+    Orders in orders.json inserted or updated after change sequence number
+    `seq`, oldest change first, and the sequence number to pass on the next call.
+    """
+    _order_index.refresh()
+    changed = _order_index.changed_since(seq)
+    if changed:
+        seq = max(seq, changed[-1].get('change_seq', 0))
+    return seq, changed
+
+
+# =============================================================================
+# MAINTENANCE
+# =============================================================================
+
+def compact_orders() -> bool:
+    """Fold the order journal into orders.json. Returns True if anything was folded."""
+    if not config.ORDERS_JOURNAL:
+        return False
+    with _locked_orders():
+        if not _order_index.journal_offset:
+            return False
+        # The snapshot is durable once written, so the journal it folds in can go
+        _write_orders_snapshot(list(_order_index.by_id.values()))
+        order_journal.reset()
+        _order_index.mark_current()
+    return True
+
+
+def archive_orders(before: str = None) -> int:
+    """
+    Move settled orders placed before the ISO timestamp `before` (the
+    configured archive cutoff by default) from orders.json into their partition
+    files, which are the archive. Pending orders always stay in the hot shard.
+    Returns the number of orders moved.
+    """
+    if not order_partitions.enabled():
+        return 0
+    before = before or order_partitions.archive_cutoff()
+    with _locked_orders():
+        cold: Dict[str, List[Dict]] = {}
+        for order in _order_index.by_id.values():
+            timestamp = order.get('timestamp')
+            if order.get('status') != 'Pending' and timestamp and timestamp < before:
+                cold.setdefault(order_partitions.period_key(timestamp), []).append(order)
+        if not cold:
+            return 0
+
+        # Partitions first: a crash before orders.json is rewritten only leaves duplicates
+        manifest = order_partitions.read_manifest()
+        for period, orders in cold.items():
+            merged = {order['order_id']: order for order in order_partitions.read(period)}
+            merged.update((order['order_id'], order) for order in orders)
+            order_partitions.write(period, sorted(merged.values(), key=lambda o: o['order_id']))
+            manifest[period] = {"min_id": min(merged), "max_id": max(merged), "count": len(merged)}
+        order_partitions.write_manifest(manifest)
+
+        moved = {order['order_id'] for orders in cold.values() for order in orders}
+        live = [order for order in _order_index.by_id.values() if order['order_id'] not in moved]
+        _write_orders_snapshot(live)
+        if config.ORDERS_JOURNAL:
+            order_journal.reset()
+        _order_index.reset(live)
+        _order_index.mark_current()
+    return len(moved)
@@ -0,0 +1,264 @@
+"""
+In-memory storage engine: menu, deals, categories and orders live in this
+process only, seeded from the JSON data files on first use. Nothing is
+written back, so it suits demos, benchmarks and trying changes without
+touching data/. Selected with STORAGE_BACKEND=memory.
+"""
+import copy
+import sys
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import json_store, order_partitions
+from utils.order_index import OrderIndex
+
+_locks = {name: threading.RLock() for name in ("menu", "deals", "categories", "orders")}
+# Nothing here lives in a file another process could change
+CATALOG_FILES: Dict[str, Path] = {}
+_catalogs: Dict[str, Any] = {}
+_versions: Dict[str, int] = {}
+# Part of every version marker, so markers from another process never match this one's data
+_instance = uuid.uuid4().hex
+
+_orders = OrderIndex()
+_orders_loaded = False
+_next_id = 0
+
+
+def lock(name: str) -> threading.RLock:
+    """Lock held by writers of a data set (this process only)."""
+    return _locks[name]
+
+
+def catalog_version(name: str) -> Tuple[str, int]:
+    """Changes whenever the data set is written."""
+    return (_instance, _versions.get(name, 0))
+
+
+def _bump_version(name: str) -> int:
+    _versions[name] = _versions.get(name, 0) + 1
+    return _versions[name]
+
+
+# =============================================================================
+# MENU, DEALS & CATEGORIES
+# =============================================================================
+
+def _catalog(name: str, loader):
+    if name not in _catalogs:
+        with _locks[name]:
+            if name not in _catalogs:
+                _catalogs[name] = loader()
+    return _catalogs[name]
+
+
+def _replace_catalog(name: str, data):
+    # Copied, so the caller can't change the stored version later
+    _catalogs[name] = copy.deepcopy(data)
+    _bump_version(name)
+
+
+def load_menu() -> Dict[str, List[Dict]]:
+    return _catalog("menu", json_store.load_menu)
+
+
+def save_menu(menu: Dict[str, List[Dict]]):
+    _replace_catalog("menu", menu)
+
+
+def load_deals() -> List[Dict]:
+    return _catalog("deals", json_store.load_deals)
+
+
+def save_deals(deals: List[Dict]):
+    _replace_catalog("deals", deals)
+
+
+def load_categories() -> List[Dict]:
+    return _catalog("categories", json_store.load_categories)
+
+
+def save_categories(categories: List[Dict]):
+    _replace_catalog("categories", categories)
+
+
+# =============================================================================
+# ORDERS
+# =============================================================================
+
+def _index() -> OrderIndex:
+    """The order index, seeded from the JSON order history on first use."""
+    global _orders_loaded, _next_id
+    if not _orders_loaded:
+        with _orders.mutex:
+            if not _orders_loaded:
+                _orders.reset(json_store.load_orders())
+                _next_id = max(_orders.by_id, default=1000) + 1
+                _versions["orders"] = _orders.last_change_seq
+                _orders_loaded = True
+    return _orders
+
+
+def load_orders(start_date: str = None, end_date: str = None) -> List[Dict]:
+    """All orders, or those placed between the ISO dates (inclusive)."""
+    orders = list(_index().by_id.values())
+    if start_date is None and end_date is None:
+        return orders
+    return [order for order in orders if order_partitions.in_range(order, start_date, end_date)]
+
+
+def load_live_orders() -> List[Dict]:
+    """Pending orders plus the settled ones younger than ORDERS_ARCHIVE_AFTER_DAYS (all if it's unset)."""
+    cutoff = order_partitions.age_cutoff()
+    orders = load_orders()
+    if cutoff is None:
+        return orders
+    return [order for order in orders if order.get('status') == 'Pending' or (order.get('timestamp') or '') >= cutoff]
+
+
+def _reserve_ids(orders: List[Dict]):
+    """Keep new order IDs above the given orders' IDs (caller holds the index mutex)."""
+    global _next_id
+    _next_id = max([_next_id] + [order['order_id'] + 1 for order in orders])
+
+
+def save_orders(orders: List[Dict]):
+    """Replace all orders."""
+    index = _index()
+    with index.mutex:
+        seq = _bump_version("orders")
+        index.reset([{**copy.deepcopy(order), 'change_seq': seq} for order in orders])
+        _reserve_ids(orders)
+
+
+def apply_order_changes(upserts: List[Dict], deleted_ids: List[int]):
+    index = _index()
+    with index.mutex:
+        seq = _bump_version("orders")
+        changed = [{**copy.deepcopy(order), 'change_seq': seq} for order in upserts]
+        if any(order_id in index.by_id for order_id in deleted_ids):
+            kept = [order for order_id, order in index.by_id.items() if order_id not in deleted_ids]
+            index.reset(kept)
+        for order in changed:
+            index.put(order)
+        _reserve_ids(changed)
+
+
+def next_order_id() -> int:
+    """Allocate the next order ID (never reused within this process)."""
+    global _next_id
+    index = _index()
+    with index.mutex:
+        order_id = _next_id
+        _next_id += 1
+        return order_id
+
+
+def insert_order(order: Dict) -> Dict:
+    index = _index()
+    with index.mutex:
+        order['order_id'] = next_order_id()
+        order['change_seq'] = _bump_version("orders")
+        index.put(order)
+    return order
+
+
+def update_order_fields(order_id: int, fields: Dict[str, Any]) -> bool:
+    index = _index()
+    with index.mutex:
+        current = index.by_id.get(order_id)
+        if current is None:
+            return False
+        index.put({**current, **fields, 'change_seq': _bump_version("orders")})
+        return True
+
+
+def update_orders_fields(order_ids: List[int], fields: Dict[str, Any]) -> List[int]:
+    index = _index()
+    with index.mutex:
+        found = [index.by_id[order_id] for order_id in dict.fromkeys(order_ids) if order_id in index.by_id]
+        if found:
+            seq = _bump_version("orders")
+            for order in found:
+                index.put({**order, **fields, 'change_seq': seq})
+        return [order['order_id'] for order in found]
+
+
+def close_table(table_id: int, fields: Dict[str, Any]) -> List[int]:
+    index = _index()
+    with index.mutex:
+        open_orders = index.for_table(table_id, open_only=True)
+        if open_orders:
+            seq = _bump_version("orders")
+            for order in open_orders:
+                index.put({**order, **fields, 'change_seq': seq})
+        return [order['order_id'] for order in open_orders]
+
+
+def expire_pending_orders(before: str, fields: Dict[str, Any]) -> List[int]:
+    index = _index()
+    with index.mutex:
+        stale = [order for order in index.with_status('Pending')
+                 if order.get('timestamp') and order['timestamp'] < before]
+        if stale:
+            seq = _bump_version("orders")
+            for order in stale:
+                index.put({**order, **fields, 'change_seq': seq})
+        return [order['order_id'] for order in stale]
+
+
+def get_order_by_id(order_id: int) -> Optional[Dict]:
+    return _index().by_id.get(order_id)
+
+
+def get_orders_by_status(status: str) -> List[Dict]:
+    return _index().with_status(status)
+
+
+def get_orders_by_table(table_id: int, open_only: bool = False) -> List[Dict]:
+    return _index().for_table(table_id, open_only)
+
+
+def get_open_table_totals() -> Dict[Any, float]:
+    return dict(_index().table_totals)
+
+
+def search_orders(order_id: int = None, status: str = None) -> List[Dict]:
+    if order_id is not None:
+        order = get_order_by_id(order_id)
+        return [order] if order and (status is None or order.get('status') == status) else []
+    if status is not None:
+        return get_orders_by_status(status)
+    return load_orders()
+
+
+def order_count() -> int:
+    return len(_index().by_id)
+
+
+def get_change_seq() -> int:
+    return _index().last_change_seq
+
+
+def changes_since(seq: int) -> Tuple[int, List[Dict]]:
+    changed = _index().changed_since(seq)
+    if changed:
+        seq = max(seq, changed[-1].get('change_seq', 0))
+    return seq, changed
+
+
+# =============================================================================
+# MAINTENANCE
+# =============================================================================
+
+def compact_orders() -> bool:
+    return False
+
+
+def archive_orders(before: str = None) -> int:
+    return 0
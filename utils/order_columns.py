@@ -0,0 +1,314 @@
+"""
+Memory-mapped columnar snapshot of the order history for analytics.
+Order headers and order lines are stored as fixed-width NumPy record arrays
+(.npy, opened with mmap_mode="r") plus a JSON string table, so the admin
+Analytics and Order History tabs can slice the history without parsing JSON
+or building per-order dicts, and every worker process shares the same pages
+through the OS cache.
+Orders are stored sorted by (timestamp, order_id), so a date range is found
+by binary search and pages of query results are cut by position (see
+database.query_orders).
+When the orders change, utils/database.py merges the orders changed since
+the last build into a new build (update), and only rebuilds from the whole
+history when that can't account for every order (e.g. orders were deleted).
+Each build gets new file names and is published by atomically replacing
+current.json, which also records the change sequence number it covers.
+"""
+import json
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from utils import serialization
+
+HEADER_DTYPE = np.dtype([
+    ("order_id", "i8"),
+    ("table_id", "i8"),             # -1 if not an integer
+    ("total_price", "f8"),
+    ("status", "i4"),               # string table index, -1 for None
+    ("payment_method", "i4"),
+    ("timestamp", "M8[us]"),        # NaT for None
+    ("paid_timestamp", "M8[us]"),
+    ("line_start", "i8"),           # first row of this order in the lines array
+    ("line_count", "i4"),
+])
+
+LINE_DTYPE = np.dtype([
+    ("order_row", "i8"),            # row of the order in the headers array
+    ("item_id", "i4"),              # string table index
+    ("name", "i4"),
+    ("quantity", "i4"),
+    ("price", "f8"),
+])
+
+CURRENT_FILE = "current.json"
+# Bumped when the layout changes, so older builds are rebuilt rather than misread
+FORMAT = 2
+
+
+class OrderColumns:
+    """Read-only columnar view of one snapshot build."""
+
+    def __init__(self, headers: np.ndarray, lines: np.ndarray, strings: List[str]):
+        self.headers = headers
+        self.lines = lines
+        # Index -1 (missing) lands on the trailing None
+        self.strings = np.array(strings + [None], dtype=object)
+        self._codes = {s: i for i, s in enumerate(strings)}
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
+    def count_present(self, order_ids: List[int]) -> int:
+        """How many of the order IDs are in the snapshot."""
+        return int(np.isin(self.headers["order_id"], order_ids).sum()) if order_ids else 0
+
+    def _time_range(self, start_date: Union[str, date, None], end_date: Union[str, date, None]) -> Tuple[int, int]:
+        """Rows [lo, hi) placed between the dates (inclusive): a binary search on the sorted timestamps."""
+        timestamps = self.headers["timestamp"]
+        lo, hi = 0, len(timestamps)
+        if start_date is not None:
+            lo = int(np.searchsorted(timestamps, np.datetime64(str(start_date)[:10], "us")))
+        if end_date is not None:
+            end = date.fromisoformat(str(end_date)[:10]) + timedelta(days=1)
+            hi = int(np.searchsorted(timestamps, np.datetime64(end.isoformat(), "us")))
+        elif start_date is not None:
+            # Orders without a timestamp (NaT) sort last and are never in a date range
+            hi = int(np.searchsorted(timestamps, np.datetime64("NaT")))
+        return lo, max(lo, hi)
+
+    def select(self, start_date: Union[str, date] = None, end_date: Union[str, date] = None,
+               status: str = None, payment_method: str = None, table_id: int = None,
+               min_total: float = None, max_total: float = None, item: str = None) -> np.ndarray:
+        """
+        Boolean mask of the orders matching every given criterion: placed
+        between the dates (inclusive), status, payment method, table, total
+        within [min_total, max_total], and a line whose item_id or name is `item`.
+        """
+        lo, hi = self._time_range(start_date, end_date)
+        headers = self.headers[lo:hi]
+        match = np.ones(hi - lo, dtype=bool)
+        if status is not None:
+            match &= headers["status"] == self._codes.get(status, -2)
+        if payment_method is not None:
+            match &= headers["payment_method"] == self._codes.get(payment_method, -2)
+        if table_id is not None:
+            match &= headers["table_id"] == table_id
+        if min_total is not None:
+            match &= headers["total_price"] >= min_total
+        if max_total is not None:
+            match &= headers["total_price"] <= max_total
+        if item is not None and hi > lo:
+            # The range's lines are contiguous too
+            first = int(headers["line_start"][0])
+            last = int(headers["line_start"][-1] + headers["line_count"][-1])
+            lines = self.lines[first:last]
+            code = self._codes.get(item, -2)
+            rows = lines["order_row"][(lines["item_id"] == code) | (lines["name"] == code)]
+            has_item = np.zeros(hi - lo, dtype=bool)
+            has_item[rows - lo] = True
+            match &= has_item
+        mask = np.zeros(len(self.headers), dtype=bool)
+        mask[lo:hi] = match
+        return mask
+
+    def cursor(self, row: int) -> str:
+        """Sort key of a row as "timestamp|order_id" (see position)."""
+        timestamp = self.headers["timestamp"][row]
+        return f"{'' if np.isnat(timestamp) else timestamp}|{self.headers['order_id'][row]}"
+
+    def position(self, timestamp: str, order_id: Union[str, int]) -> int:
+        """Row at which an order with this timestamp and ID is (or would be) in the sort order."""
+        timestamps = self.headers["timestamp"]
+        key = np.datetime64(timestamp or "NaT", "us")
+        lo = int(np.searchsorted(timestamps, key, side="left"))
+        hi = int(np.searchsorted(timestamps, key, side="right"))
+        return lo + int(np.searchsorted(self.headers["order_id"][lo:hi], int(order_id)))
+
+    def newest(self, mask: np.ndarray, limit: int, before: int = None) -> np.ndarray:
+        """Rows of up to `limit` selected orders, newest first, from those above row `before`."""
+        rows = np.flatnonzero(mask[:before])
+        return rows[::-1][:limit]
+
+    def frames(self, mask: np.ndarray = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """DataFrames of the selected order headers and of their lines."""
+        headers, lines = self.headers, self.lines
+        if mask is not None:
+            # Lines are stored in header order, so each order's mask repeats over its lines
+            lines = lines[np.repeat(mask, headers["line_count"])]
+            headers = headers[mask]
+        orders = pd.DataFrame({
+            "order_id": headers["order_id"],
+            "table_id": headers["table_id"],
+            "total_price": headers["total_price"],
+            "status": self.strings[headers["status"]],
+            "payment_method": self.strings[headers["payment_method"]],
+            "timestamp": headers["timestamp"],
+            "paid_timestamp": headers["paid_timestamp"],
+        })
+        order_lines = pd.DataFrame({
+            "order_id": self.headers["order_id"][lines["order_row"]],
+            "item_id": self.strings[lines["item_id"]],
+            "name": self.strings[lines["name"]],
+            "quantity": lines["quantity"],
+            "price": lines["price"],
+        })
+        return orders, order_lines
+
+
+def _code(table: Dict[str, int], value) -> int:
+    if value is None:
+        return -1
+    value = str(value)
+    code = table.get(value)
+    if code is None:
+        code = table[value] = len(table)
+    return code
+
+
+def _encode(orders: List[Dict], strings: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Header and line arrays of the orders, in the given order (new strings are added to `strings`)."""
+    columns: Dict[str, list] = {name: [] for name in HEADER_DTYPE.names}
+    line_columns: Dict[str, list] = {name: [] for name in LINE_DTYPE.names}
+    for row, order in enumerate(orders):
+        items = order.get('items') or []
+        table_id = order.get('table_id')
+        columns["order_id"].append(order['order_id'])
+        columns["table_id"].append(table_id if isinstance(table_id, int) else -1)
+        columns["total_price"].append(order.get('total_price') or 0)
+        columns["status"].append(_code(strings, order.get('status')))
+        columns["payment_method"].append(_code(strings, order.get('payment_method')))
+        columns["timestamp"].append(order.get('timestamp') or "NaT")
+        columns["paid_timestamp"].append(order.get('paid_timestamp') or "NaT")
+        columns["line_start"].append(len(line_columns["order_row"]))
+        columns["line_count"].append(len(items))
+        for item in items:
+            line_columns["order_row"].append(row)
+            line_columns["item_id"].append(_code(strings, item.get('item_id')))
+            line_columns["name"].append(_code(strings, item.get('name')))
+            line_columns["quantity"].append(item.get('quantity') or 0)
+            line_columns["price"].append(item.get('price') or 0)
+
+    # Whole-column conversions (including one ISO-8601 parse per timestamp column)
+    headers = np.zeros(len(orders), dtype=HEADER_DTYPE)
+    for name, values in columns.items():
+        headers[name] = np.array(values, dtype=HEADER_DTYPE[name])
+    lines = np.zeros(len(line_columns["order_row"]), dtype=LINE_DTYPE)
+    for name, values in line_columns.items():
+        lines[name] = np.array(values, dtype=LINE_DTYPE[name])
+    return headers, lines
+
+
+def _sort(headers: np.ndarray, lines: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Headers in time order (matching how NumPy sorts the parsed timestamps,
+    NaT last) and each order's lines gathered behind them in the same order.
+    """
+    headers = headers[np.lexsort((headers["order_id"], headers["timestamp"]))]
+    counts = headers["line_count"].astype("i8")
+    starts = np.cumsum(counts) - counts
+    # Row of every line in `lines`: its order's old line_start plus its position within the order
+    rows = np.repeat(headers["line_start"] - starts, counts) + np.arange(int(counts.sum()))
+    lines = lines[rows]
+    lines["order_row"] = np.repeat(np.arange(len(headers)), counts)
+    headers["line_start"] = starts
+    return headers, lines
+
+
+def build(orders: List[Dict], key: str, seq: int = None):
+    """
+    Write a snapshot of the orders and publish it as the current build for
+    `key`, covering the changes up to change sequence number `seq`.
+    """
+    strings: Dict[str, int] = {}
+    headers, lines = _encode(orders, strings)
+    _publish(*_sort(headers, lines), strings, key, seq)
+
+
+def update(columns: OrderColumns, changed: List[Dict], key: str, seq: int):
+    """Publish a build of `columns` with the changed (new or updated) orders replaced or added."""
+    strings = dict(columns._codes)
+    headers, lines = _encode(changed, strings)
+    headers["line_start"] += len(columns.lines)
+    kept = ~np.isin(columns.headers["order_id"], headers["order_id"])
+    # Lines of replaced orders stay in the concatenation but no header points at them
+    headers, lines = _sort(np.concatenate([columns.headers[kept], headers]),
+                           np.concatenate([columns.lines, lines]))
+    _publish(headers, lines, strings, key, seq)
+
+
+def _publish(headers: np.ndarray, lines: np.ndarray, strings: Dict[str, int], key: str, seq: Optional[int]):
+    directory = config.ORDER_COLUMNS_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    current = _read_current()
+    number = (current or {}).get("build", 0) + 1
+
+    np.save(directory / f"headers-{number}.npy", headers)
+    np.save(directory / f"lines-{number}.npy", lines)
+    with open(directory / f"strings-{number}.json", 'w', encoding='utf-8') as f:
+        json.dump(list(strings), f, ensure_ascii=False)
+    serialization.write_atomic(directory / CURRENT_FILE,
+                               {"build": number, "key": key, "format": FORMAT, "seq": seq}, "compact")
+
+    # Keep the previous build for readers that are still opening it
+    for path in directory.glob("*-*.*"):
+        try:
+            if int(path.stem.rsplit("-", 1)[1]) < number - 1:
+                path.unlink()
+        except (ValueError, OSError):
+            pass
+
+
+def _read_current() -> Optional[Dict]:
+    path = config.ORDER_COLUMNS_DIR / CURRENT_FILE
+    if path.exists():
+        return serialization.read(path)
+    return None
+
+
+def _map(path: Path) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # An empty array can't be memory-mapped
+        return np.load(path)
+
+
+# (build number, OrderColumns) of the build this process has mapped
+_mapped: Optional[Tuple[int, OrderColumns]] = None
+
+
+def load(key: str) -> Optional[OrderColumns]:
+    """The current snapshot if it was built for `key` (the orders' version), else None."""
+    current = _read_current()
+    if current is None or current.get("key") != key or current.get("format") != FORMAT:
+        return None
+    return _open(current["build"])
+
+
+def latest() -> Tuple[Optional[OrderColumns], Optional[int]]:
+    """The current snapshot whatever it was built for, and the change sequence number it covers."""
+    current = _read_current()
+    if current is None or current.get("format") != FORMAT:
+        return None, None
+    return _open(current["build"]), current.get("seq")
+
+
+def _open(number: int) -> OrderColumns:
+    global _mapped
+    if _mapped is None or _mapped[0] != number:
+        directory = config.ORDER_COLUMNS_DIR
+        headers = _map(directory / f"headers-{number}.npy")
+        lines = _map(directory / f"lines-{number}.npy")
+        with open(directory / f"strings-{number}.json", 'r', encoding='utf-8') as f:
+            strings = json.load(f)
+        _mapped = (number, OrderColumns(headers, lines, strings))
+    return _mapped[1]
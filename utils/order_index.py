@@ -0,0 +1,116 @@
+"""
+In-process order indexes: order_id -> order map plus status, table and
+change-sequence indexes, so Pending, per-table and change-feed lookups
+don't scan the order history. Used by the JSON and in-memory backends.
+"""
+import threading
+from typing import Any, Dict, List
+
+from utils.records import Order
+
+
+class OrderIndex:
+    """
+    In-memory indexes over a set of orders. Records are replaced, never
+    mutated, so orders handed out stay stable; treat them as read-only.
+    """
+
+    def __init__(self):
+        self.by_id: Dict[int, Dict] = {}
+        # status -> ordered set of order_ids (dict keys keep insertion order)
+        self.by_status: Dict[str, Dict[int, None]] = {}
+        # table_id -> all / still-pending order_ids, and the amount each table owes
+        self.by_table: Dict[Any, Dict[int, None]] = {}
+        self.open_by_table: Dict[Any, Dict[int, None]] = {}
+        self.table_totals: Dict[Any, float] = {}
+        # order_ids ordered by change_seq (see changes_since), and the highest change_seq seen
+        self.by_change: Dict[int, None] = {}
+        self.last_change_seq = 0
+        self._changes_sorted = True
+        # Serializes changes to the index within this process
+        self.mutex = threading.RLock()
+
+    def reset(self, orders: List[Dict]):
+        self.by_id = {}
+        self.by_status = {}
+        self.by_table = {}
+        self.open_by_table = {}
+        self.table_totals = {}
+        self.by_change = {}
+        self.last_change_seq = 0
+        for order in sorted(orders, key=lambda order: order.get('change_seq', 0)):
+            self.put(order)
+        self._changes_sorted = True
+
+    def put(self, order: Dict):
+        # Stored as a compact record (see utils/records.py)
+        order = Order.from_dict(order)
+        previous = self.by_id.get(order['order_id'])
+        if previous is not None:
+            self._unlink(previous)
+        self.by_id[order['order_id']] = order
+        self._link(order)
+        # Move to the end of the change order
+        self.by_change.pop(order['order_id'], None)
+        self.by_change[order['order_id']] = None
+        change_seq = order.get('change_seq', 0)
+        if change_seq < self.last_change_seq:
+            # e.g. an old journal record replayed after a crash: re-sort on next use
+            self._changes_sorted = False
+        self.last_change_seq = max(self.last_change_seq, change_seq)
+
+    def _link(self, order: Dict):
+        order_id, table_id = order['order_id'], order.get('table_id')
+        self.by_status.setdefault(order.get('status'), {})[order_id] = None
+        self.by_table.setdefault(table_id, {})[order_id] = None
+        if order.get('status') == 'Pending':
+            self.open_by_table.setdefault(table_id, {})[order_id] = None
+            self.table_totals[table_id] = round(
+                self.table_totals.get(table_id, 0) + order.get('total_price', 0), 2)
+
+    def _unlink(self, order: Dict):
+        order_id, table_id = order['order_id'], order.get('table_id')
+        self.by_status.get(order.get('status'), {}).pop(order_id, None)
+        self.by_table.get(table_id, {}).pop(order_id, None)
+        open_ids = self.open_by_table.get(table_id, {})
+        if order_id in open_ids:
+            del open_ids[order_id]
+            if open_ids:
+                self.table_totals[table_id] = round(
+                    self.table_totals[table_id] - order.get('total_price', 0), 2)
+            else:
+                # Reset rather than subtract so float drift can't accumulate
+                del self.open_by_table[table_id]
+                self.table_totals.pop(table_id, None)
+
+    def with_status(self, status: str) -> List[Dict]:
+        return self._lookup(self.by_status.get(status, {}))
+
+    def for_table(self, table_id, open_only: bool = False) -> List[Dict]:
+        return self._lookup((self.open_by_table if open_only else self.by_table).get(table_id, {}))
+
+    def changed_since(self, seq: int) -> List[Dict]:
+        """Orders with a change_seq above seq, oldest change first. Costs O(changes), not O(orders)."""
+        changed = []
+        # Writers hold the mutex, so the change order can be walked without copying it
+        with self.mutex:
+            if not self._changes_sorted:
+                self.by_change = dict.fromkeys(sorted(
+                    self.by_change, key=lambda order_id: self.by_id[order_id].get('change_seq', 0)))
+                self._changes_sorted = True
+            # Walk back from the newest change until reaching seq
+            for order_id in reversed(self.by_change):
+                order = self.by_id.get(order_id)
+                if order is None:
+                    continue
+                if order.get('change_seq', 0) <= seq:
+                    break
+                changed.append(order)
+        changed.reverse()
+        return changed
+
+    def _lookup(self, ids) -> List[Dict]:
+        # list() copies the keys in one step, so a writer thread changing the
+        # index concurrently can't break the iteration
+        orders = (self.by_id.get(order_id) for order_id in list(ids))
+        return [order for order in orders if order is not None]
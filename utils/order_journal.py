@@ -0,0 +1,83 @@
+"""
+Append-only journal for order writes.
+Each order creation or status change is one JSON line; the snapshot in
+orders.json plus the journal tail is the current order history.
+The journal is only appended to, or replaced as a whole by a rename (never
+truncated in place), so readers tell a new journal from a grown one by its
+inode. Callers (utils/json_store.py) are responsible for holding orders_lock.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from utils import serialization
+from utils.records import encode as encode_record
+
+
+def append(records: List[Dict]) -> Tuple[int, int]:
+    """Durably append records to the journal. Returns its inode and new size in bytes."""
+    data = "".join(json.dumps(rec, ensure_ascii=False, default=encode_record) + "\n" for rec in records).encode('utf-8')
+    with open(config.ORDERS_JOURNAL_FILE, 'ab') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        return os.fstat(f.fileno()).st_ino, f.tell()
+
+
+def read(offset: int = 0) -> Tuple[List[Dict], int, Optional[int]]:
+    """
+    Read complete records starting at a byte offset.
+    Returns the records, the offset just past the last complete line (so a
+    half-written trailing line is picked up on the next read) and the inode
+    of the journal that was read (None if there is none).
+    """
+    try:
+        f = open(config.ORDERS_JOURNAL_FILE, 'rb')
+    except FileNotFoundError:
+        return [], 0, None
+    with f:
+        inode = os.fstat(f.fileno()).st_ino
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    records = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+    return records, offset + end, inode
+
+
+def reset():
+    """
+    Replace the journal with an empty one after its records were folded into
+    the snapshot. The new file has a new inode, so a reader holding an offset
+    into the old journal starts over instead of seeking into the new one.
+    """
+    tmp_file = config.ORDERS_JOURNAL_FILE.with_suffix(".tmp")
+    with open(tmp_file, 'wb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_file, config.ORDERS_JOURNAL_FILE)
+    serialization.fsync_dir(config.ORDERS_JOURNAL_FILE.parent)
+
+
+def signature() -> Tuple[Optional[int], int]:
+    """(inode, size in bytes) of the journal; (None, 0) if there is none."""
+    try:
+        stat = config.ORDERS_JOURNAL_FILE.stat()
+    except FileNotFoundError:
+        return None, 0
+    return stat.st_ino, stat.st_size
+
+
+def create_record(order: Dict) -> Dict:
+    """Journal record for a newly created order."""
+    return {"op": "create", "order": order}
+
+
+def update_record(order_id: int, fields: Dict) -> Dict:
+    """Journal record for changed fields of an existing order."""
+    return {"op": "update", "order_id": order_id, "fields": fields}
+
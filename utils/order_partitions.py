@@ -0,0 +1,129 @@
+"""
+Time-partitioned storage for settled orders, which doubles as the order archive.
+Settled orders older than ORDERS_ARCHIVE_AFTER_DAYS (without it, those from
+past periods) live in one file per day or month under data/orders/, with a manifest of
+the order_id range in each file, so history queries only open the
+partitions that overlap the requested dates.
+Writers (utils/json_store.py) hold orders_lock; readers need no lock since
+every file is replaced atomically.
+"""
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from utils import records, serialization
+
+# Length of the ISO timestamp prefix that names a partition
+PERIOD_LENGTHS = {"day": 10, "month": 7}
+
+MANIFEST_FILE = "manifest.json"
+
+# period -> (file signature, parsed orders); partitions rarely change once written
+_partition_cache: Dict[str, tuple] = {}
+
+
+def enabled() -> bool:
+    return config.ORDERS_PARTITION in PERIOD_LENGTHS
+
+
+def period_key(value: Union[str, date, datetime, None]) -> str:
+    """Partition name for an ISO timestamp or date, e.g. '2025-12' for monthly partitions."""
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = value.isoformat()
+    return value[:PERIOD_LENGTHS[config.ORDERS_PARTITION]]
+
+
+def in_range(order: Dict, start: Optional[str], end: Optional[str]) -> bool:
+    """True if the order was placed between the ISO dates (inclusive; either bound may be open)."""
+    day = (order.get('timestamp') or '')[:10]
+    return (start is None or day >= start) and (end is None or day <= end)
+
+
+def current_period() -> str:
+    return period_key(datetime.now())
+
+
+def age_cutoff() -> Optional[str]:
+    """ISO timestamp ORDERS_ARCHIVE_AFTER_DAYS ago, or None if archival by age is off."""
+    if config.ORDERS_ARCHIVE_AFTER_DAYS <= 0:
+        return None
+    return (datetime.now() - timedelta(days=config.ORDERS_ARCHIVE_AFTER_DAYS)).isoformat()
+
+
+def archive_cutoff() -> Optional[str]:
+    """
+    ISO timestamp before which settled orders belong in the archive rather
+    than the live set: ORDERS_ARCHIVE_AFTER_DAYS ago if that is set (the
+    period roll-over never moves younger orders), else the start of the
+    current period. None if neither is set.
+    """
+    cutoff = age_cutoff()
+    if cutoff is None and enabled():
+        cutoff = current_period()
+    return cutoff
+
+
+def _path(name: str) -> Path:
+    return config.ORDERS_PARTITION_DIR / name
+
+
+def _write(path: Path, data):
+    config.ORDERS_PARTITION_DIR.mkdir(parents=True, exist_ok=True)
+    serialization.write_atomic(path, data)
+
+
+def read_manifest() -> Dict[str, Dict]:
+    """period -> {"min_id", "max_id", "count"} for every partition."""
+    path = _path(MANIFEST_FILE)
+    if path.exists():
+        return serialization.read(path)
+    return {}
+
+
+def write_manifest(manifest: Dict[str, Dict]):
+    _write(_path(MANIFEST_FILE), dict(sorted(manifest.items())))
+
+
+def read(period: str) -> List[Dict]:
+    """Orders stored in one partition (cached until the file changes). Read-only."""
+    path = _path(f"{period}.json")
+    signature = serialization.file_signature(path)
+    if signature is None:
+        return []
+    entry = _partition_cache.get(period)
+    if entry is None or entry[0] != signature:
+        entry = (signature, records.decode_orders(serialization.read(path)))
+        _partition_cache[period] = entry
+    return entry[1]
+
+
+def write(period: str, orders: List[Dict]):
+    _write(_path(f"{period}.json"), orders)
+
+
+def periods_between(start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+    """Partitions overlapping the [start, end] period keys (either bound may be open)."""
+    return [period for period in sorted(read_manifest())
+            if (start is None or period >= start) and (end is None or period <= end)]
+
+
+def find(order_id: int) -> Optional[Dict]:
+    """Look up a settled order by ID, opening only partitions whose ID range covers it."""
+    for period, info in read_manifest().items():
+        if info["min_id"] <= order_id <= info["max_id"]:
+            for order in read(period):
+                if order["order_id"] == order_id:
+                    return order
+    return None
+
+
+def highest_order_id() -> int:
+    """Highest order ID stored in any partition (0 if there are none)."""
+    return max((info["max_id"] for info in read_manifest().values()), default=0)
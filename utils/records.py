@@ -0,0 +1,259 @@
+"""
+Compact record types for the data kept in memory: Order, OrderLine,
+MenuItem, Deal and Category. Each is a class with __slots__ instead of a
+dict, and repeated strings (statuses, payment methods, item IDs and names)
+are interned, so an order history held in memory takes a fraction of the
+space of the parsed JSON (see benchmarks/bench_records.py).
+
+Records read like the dicts they replace: record['status'],
+record.get('status'), `in`, keys(), dict(record), {**record} and == against
+a dict all work, so callers don't need to know which one they got (only
+items() is missing: Order.items holds the order's lines). to_dict() and
+copy.deepcopy() return plain dicts to modify or serialize, and
+utils/serialization.py encodes records directly.
+Keys outside a type's fields are kept in `extra`, so nothing is lost on
+the way from JSON to a record and back.
+"""
+import sys
+from typing import Any, Dict, List, Optional
+
+
+class _Missing:
+    """Value of a field the source dict didn't have (not the same as None)."""
+
+    def __repr__(self):
+        return "<missing>"
+
+    def __reduce__(self):
+        return "_MISSING"
+
+
+_MISSING = _Missing()
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _intern_list(value):
+    return [_intern(v) for v in value] if type(value) is list else value
+
+
+def plain(value: Any) -> Any:
+    """value with every record in it turned back into dicts (new containers)."""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: plain(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    return value
+
+
+def encode(value: Any) -> Dict:
+    """default= hook for the JSON and MessagePack encoders."""
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+class Record:
+    """Base of the record types: FIELDS plus a field -> decoder map in DECODE."""
+    __slots__ = ("extra",)
+    FIELDS: tuple = ()
+    DECODE: Dict[str, Any] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+        # (field, decoder or None) pairs, so from_dict does one lookup per field
+        cls._decoders = tuple((field, cls.DECODE.get(field)) for field in cls.FIELDS)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Record":
+        """The record for a dict (records of this type are returned as they are)."""
+        if type(data) is cls:
+            return data
+        record = object.__new__(cls)
+        get = data.get
+        present = 0
+        for field, decode in cls._decoders:
+            value = get(field, _MISSING)
+            if value is not _MISSING:
+                present += 1
+                if decode is not None and value is not None:
+                    value = decode(value)
+            setattr(record, field, value)
+        record.extra = {key: data[key] for key in data if key not in cls._field_set} if len(data) > present else None
+        return record
+
+    def to_dict(self) -> Dict:
+        data = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value is _MISSING:
+                continue
+            kind = type(value)
+            if kind is list:
+                # Lists of records (an order's lines) are the common case: skip plain()'s dispatch
+                value = [v.to_dict() if isinstance(v, Record) else plain(v) for v in value]
+            elif kind is dict or isinstance(value, Record):
+                value = plain(value)
+            data[field] = value
+        if self.extra:
+            data.update(plain(self.extra))
+        return data
+
+    # Read-only dict interface
+    def __getitem__(self, key):
+        if key in self._field_set:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self._field_set:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __contains__(self, key):
+        if key in self._field_set:
+            return getattr(self, key) is not _MISSING
+        return bool(self.extra) and key in self.extra
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            if getattr(self, field) is not _MISSING:
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(getattr(self, field) is not _MISSING for field in self.FIELDS) + len(self.extra or ())
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def __eq__(self, other):
+        if not isinstance(other, (Record, dict)):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        get = other.get
+        return all(get(key, _MISSING) == self[key] for key in self)
+
+    __hash__ = None
+
+    # Copies are plain dicts, so code that copies to modify keeps working
+    def __copy__(self):
+        return self.to_dict()
+
+    def __deepcopy__(self, memo):
+        return self.to_dict()
+
+    def __reduce__(self):
+        return (type(self).from_dict, (self.to_dict(),))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class OrderLine(Record):
+    FIELDS = ("item_id", "name", "quantity", "price")
+    __slots__ = FIELDS
+    DECODE = {"item_id": _intern, "name": _intern}
+
+    item_id: str
+    name: str
+    quantity: int
+    price: float
+
+
+def _order_lines(value):
+    return [OrderLine.from_dict(line) for line in value] if type(value) is list else value
+
+
+class Order(Record):
+    FIELDS = ("order_id", "table_id", "items", "total_price", "status", "payment_method",
+              "timestamp", "paid_timestamp", "change_seq")
+    __slots__ = FIELDS
+    DECODE = {"items": _order_lines, "status": _intern, "payment_method": _intern}
+
+    order_id: int
+    table_id: Any
+    items: List[OrderLine]
+    total_price: float
+    status: str
+    payment_method: Optional[str]
+    timestamp: str
+    paid_timestamp: Optional[str]
+    change_seq: int
+
+
+class MenuItem(Record):
+    FIELDS = ("item_id", "name", "price", "description", "image", "available", "featured")
+    __slots__ = FIELDS
+    DECODE = {"item_id": _intern, "image": _intern}
+
+    item_id: str
+    name: Dict[str, str]
+    price: float
+    description: Dict[str, str]
+    image: Optional[str]
+    available: bool
+    featured: bool
+
+
+class Deal(Record):
+    FIELDS = ("deal_id", "name", "description", "price", "discount_percent", "applicable_items",
+              "min_items", "image", "active", "order")
+    __slots__ = FIELDS
+    DECODE = {"deal_id": _intern, "applicable_items": _intern_list, "image": _intern}
+
+    deal_id: str
+    name: Dict[str, str]
+    description: Dict[str, str]
+    price: float
+    discount_percent: float
+    applicable_items: List[str]
+    min_items: int
+    image: Optional[str]
+    active: bool
+    order: int
+
+
+class Category(Record):
+    FIELDS = ("id", "name", "icon", "description", "active", "order", "image")
+    __slots__ = FIELDS
+    DECODE = {"id": _intern, "name": _intern, "icon": _intern}
+
+    id: str
+    name: str
+    icon: str
+    description: str
+    active: bool
+    order: int
+    image: Optional[str]
+
+
+def decode_orders(orders: List[Dict]) -> List[Order]:
+    return [Order.from_dict(order) for order in orders]
+
+
+def decode_menu(menu: Dict[str, List[Dict]]) -> Dict[str, List[MenuItem]]:
+    return {sys.intern(category): [MenuItem.from_dict(item) for item in items] for category, items in menu.items()}
+
+
+def decode_deals(deals: List[Dict]) -> List[Deal]:
+    return [Deal.from_dict(deal) for deal in deals]
+
+
+def decode_categories(categories: List[Dict]) -> List[Category]:
+    return [Category.from_dict(category) for category in categories]
@@ -0,0 +1,68 @@
+"""
+Monotonic ID allocator backed by a counter file next to the data.
+The counter is advanced under a FileLock, so IDs never collide across
+Streamlit sessions or processes; each process can reserve a block of
+IDs per file update and hand them out from memory.
+"""
+import os
+import threading
+import filelock
+from pathlib import Path
+from typing import Callable, Optional
+
+
+class Sequence:
+    """A named counter file holding the highest ID handed out so far."""
+
+    def __init__(self, path: Path, seed: Callable[[], int], block_size: int = 1):
+        """
+        path: counter file; seed: returns the highest ID already in use and is
+        only called when the counter file doesn't exist yet; block_size: IDs
+        reserved per file update.
+        """
+        self.path = Path(path)
+        self.lock = filelock.FileLock(str(self.path) + ".lock")
+        self.seed = seed
+        self.block_size = max(1, block_size)
+        self._mutex = threading.Lock()
+        self._next = 0
+        self._limit = 0
+        self._pid = None
+
+    def next(self) -> int:
+        """Allocate the next ID."""
+        with self._mutex:
+            # A forked worker must not reuse its parent's reserved block
+            if self._next >= self._limit or self._pid != os.getpid():
+                self._reserve()
+            value = self._next
+            self._next += 1
+            return value
+
+    def advance_past(self, value: int):
+        """Make sure every future ID is greater than value (e.g. after restoring data)."""
+        with self._mutex, self.lock:
+            if (self._read() or 0) < value:
+                self._write(value)
+            self._next = self._limit = 0
+
+    def _reserve(self):
+        with self.lock:
+            last = self._read()
+            if last is None:
+                last = self.seed()
+            start = last + 1
+            self._write(start + self.block_size - 1)
+        self._next, self._limit = start, start + self.block_size
+        self._pid = os.getpid()
+
+    def _read(self) -> Optional[int]:
+        try:
+            return int(self.path.read_text(encoding='utf-8').strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, value: int):
+        tmp_file = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_file.write_text(str(value), encoding='utf-8')
+        os.replace(tmp_file, self.path)
@@ -0,0 +1,107 @@
+"""
+Serialization of the data files (menu, deals, categories, orders).
+config.DATA_FORMAT picks how files are written:
+  "pretty"  - indented JSON, easy to read and edit by hand (default)
+  "compact" - JSON without whitespace
+  "orjson"  - compact JSON via orjson, if installed (else same as "compact")
+  "msgpack" - MessagePack binary, requires the msgpack package
+Loading detects the format from the content, so existing files stay
+readable after DATA_FORMAT changes and are converted on their next save.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from utils.records import encode as encode_record
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMATS = ("pretty", "compact", "orjson", "msgpack")
+
+
+def dumps(data: Any, fmt: str = None) -> bytes:
+    """Serialize data in the given format (config.DATA_FORMAT by default)."""
+    fmt = fmt or config.DATA_FORMAT
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("DATA_FORMAT=msgpack requires the msgpack package")
+        return msgpack.packb(data, use_bin_type=True, default=encode_record)
+    if fmt == "orjson" and orjson is not None:
+        return orjson.dumps(data, default=encode_record, option=orjson.OPT_NON_STR_KEYS)
+    if fmt in ("compact", "orjson"):
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=encode_record).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, indent=4, default=encode_record).encode('utf-8')
+
+
+def loads(raw: bytes) -> Any:
+    """Parse data in any of the supported formats."""
+    # JSON documents here are always an object or array; MessagePack
+    # containers start with a byte that can't begin JSON text
+    if raw.lstrip()[:1] in (b"{", b"[", b""):
+        if orjson is not None:
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                # e.g. NaN written by the stdlib encoder
+                pass
+        return json.loads(raw)
+    if msgpack is None:
+        raise RuntimeError("Data file is MessagePack but the msgpack package is not installed")
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+def read(path: Path) -> Any:
+    """Load a data file."""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def file_signature(path: Path):
+    """(inode, mtime, size) of a file, or None if it doesn't exist: changes whenever it is replaced or written."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def fsync_dir(directory: Path):
+    """Make renames and new files in a directory durable (no-op on Windows, which can't open directories)."""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path: Path, data: Any, fmt: str = None):
+    """
+    Publish a new version of a data file: write a temp file, then rename it
+    over the old one. Readers always see a complete file, so they need no lock.
+    The temp file and the rename are fsynced, so once this returns the new
+    version survives a crash (callers may then drop what it supersedes, e.g.
+    the order journal).
+    """
+    tmp_file = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_file, 'wb') as f:
+        f.write(dumps(data, fmt))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    fsync_dir(path.parent)
@@ -0,0 +1,580 @@
+"""
+SQLite storage engine for menu, deals, categories and orders.
+Backs the helpers in utils/database.py when STORAGE_BACKEND is "sqlite",
+so single-order writes touch one row instead of rewriting the whole history.
+"""
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from utils import order_journal, order_partitions, serialization
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS menu_sections (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS menu_items (
+    section TEXT NOT NULL REFERENCES menu_sections(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    item_id TEXT NOT NULL,
+    price REAL,
+    available INTEGER NOT NULL DEFAULT 1,
+    featured INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    PRIMARY KEY (section, position)
+);
+CREATE INDEX IF NOT EXISTS idx_menu_items_item_id ON menu_items(item_id);
+
+CREATE TABLE IF NOT EXISTS deals (
+    position INTEGER PRIMARY KEY,
+    deal_id TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 0,
+    sort_order INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deals_deal_id ON deals(deal_id);
+
+CREATE TABLE IF NOT EXISTS categories (
+    position INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1,
+    sort_order INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_categories_id ON categories(id);
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INTEGER PRIMARY KEY,
+    table_id INTEGER,
+    total_price REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    payment_method TEXT,
+    timestamp TEXT,
+    paid_timestamp TEXT,
+    extra TEXT,
+    change_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+CREATE INDEX IF NOT EXISTS idx_orders_table_id ON orders(table_id);
+CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders(timestamp);
+
+CREATE TABLE IF NOT EXISTS order_lines (
+    order_id INTEGER NOT NULL REFERENCES orders(order_id) ON DELETE CASCADE,
+    line_no INTEGER NOT NULL,
+    item_id TEXT,
+    name TEXT,
+    quantity INTEGER NOT NULL DEFAULT 1,
+    price REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (order_id, line_no)
+);
+CREATE INDEX IF NOT EXISTS idx_order_lines_item_id ON order_lines(item_id);
+
+CREATE TABLE IF NOT EXISTS catalog_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# Columns stored natively on the orders table; anything else goes to `extra`
+ORDER_COLUMNS = ("order_id", "table_id", "total_price", "status",
+                 "payment_method", "timestamp", "paid_timestamp", "change_seq")
+
+# One connection per thread (Streamlit runs each session in its own thread)
+_local = threading.local()
+
+# All data sets share the database file; catalog_version is one indexed lookup
+CATALOG_FILES: Dict[str, Path] = {}
+
+
+def get_connection() -> sqlite3.Connection:
+    """Return this thread's connection, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        config.DATA_DIR.mkdir(exist_ok=True)
+        conn = sqlite3.connect(str(config.DATABASE_FILE), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(SCHEMA)
+        _upgrade_schema(conn)
+        _local.conn = conn
+    return conn
+
+
+def _upgrade_schema(conn: sqlite3.Connection):
+    """Add columns introduced after a database was created."""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(orders)")}
+    if "change_seq" not in columns:
+        conn.execute("ALTER TABLE orders ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_change_seq ON orders(change_seq)")
+
+
+class _write_transaction:
+    """
+    Context manager for a BEGIN IMMEDIATE ... COMMIT block. Nested in an
+    open transaction of this thread (e.g. inside lock()), it joins that one
+    and the outermost block commits.
+    """
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn = get_connection()
+        self.outermost = not self.conn.in_transaction
+        if self.outermost:
+            self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.outermost:
+            return False
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
+
+
+def _bump_version(conn: sqlite3.Connection, name: str):
+    conn.execute("INSERT INTO catalog_versions (name, version) VALUES (?, 1) "
+                 "ON CONFLICT(name) DO UPDATE SET version = version + 1", (name,))
+
+
+def _next_change_seq(conn: sqlite3.Connection) -> int:
+    """Bump the "orders" version and return it as the change sequence number of this write."""
+    _bump_version(conn, "orders")
+    return conn.execute("SELECT version FROM catalog_versions WHERE name = 'orders'").fetchone()[0]
+
+
+def lock(name: str) -> _write_transaction:
+    """
+    Lock held by read-modify-write transactions on a data set ("menu", "orders", ...):
+    a write transaction around the whole block, so the read and the write are
+    atomic against every other writer (which all take SQLite's write lock too).
+    """
+    return _write_transaction()
+
+
+def catalog_version(name: str) -> int:
+    """Version counter of a catalog table ("menu", "deals", "categories") or "orders", bumped on every write."""
+    row = get_connection().execute(
+        "SELECT version FROM catalog_versions WHERE name = ?", (name,)).fetchone()
+    return row["version"] if row else 0
+
+
+# =============================================================================
+# MENU
+# =============================================================================
+
+def load_menu() -> Dict[str, List[Dict]]:
+    """Load the complete menu, preserving category and item order."""
+    conn = get_connection()
+    menu = {row["name"]: [] for row in conn.execute(
+        "SELECT name FROM menu_sections ORDER BY position")}
+    for row in conn.execute(
+            "SELECT section, data FROM menu_items ORDER BY section, position"):
+        menu[row["section"]].append(json.loads(row["data"]))
+    return menu
+
+
+def _insert_menu(conn: sqlite3.Connection, menu: Dict[str, List[Dict]]):
+    conn.execute("DELETE FROM menu_items")
+    conn.execute("DELETE FROM menu_sections")
+    for section_pos, (section, items) in enumerate(menu.items()):
+        conn.execute("INSERT INTO menu_sections (name, position) VALUES (?, ?)",
+                     (section, section_pos))
+        conn.executemany(
+            "INSERT INTO menu_items (section, position, item_id, price, available, featured, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(section, pos, item['item_id'], item.get('price'),
+              int(bool(item.get('available', True))), int(bool(item.get('featured', False))),
+              json.dumps(item, ensure_ascii=False))
+             for pos, item in enumerate(items)])
+
+
+def save_menu(menu: Dict[str, List[Dict]]):
+    """Replace the complete menu."""
+    with _write_transaction() as conn:
+        _insert_menu(conn, menu)
+        _bump_version(conn, "menu")
+
+
+# =============================================================================
+# DEALS & CATEGORIES
+# =============================================================================
+
+def load_deals() -> List[Dict]:
+    """Load all deals in stored order."""
+    rows = get_connection().execute("SELECT data FROM deals ORDER BY position")
+    return [json.loads(row["data"]) for row in rows]
+
+
+def _insert_deals(conn: sqlite3.Connection, deals: List[Dict]):
+    conn.execute("DELETE FROM deals")
+    conn.executemany(
+        "INSERT INTO deals (position, deal_id, active, sort_order, data) VALUES (?, ?, ?, ?, ?)",
+        [(pos, deal['deal_id'], int(bool(deal.get('active', False))), deal.get('order'),
+          json.dumps(deal, ensure_ascii=False))
+         for pos, deal in enumerate(deals)])
+
+
+def save_deals(deals: List[Dict]):
+    """Replace all deals."""
+    with _write_transaction() as conn:
+        _insert_deals(conn, deals)
+        _bump_version(conn, "deals")
+
+
+def load_categories() -> List[Dict]:
+    """Load all categories in stored order."""
+    rows = get_connection().execute("SELECT data FROM categories ORDER BY position")
+    return [json.loads(row["data"]) for row in rows]
+
+
+def _insert_categories(conn: sqlite3.Connection, categories: List[Dict]):
+    conn.execute("DELETE FROM categories")
+    conn.executemany(
+        "INSERT INTO categories (position, id, active, sort_order, data) VALUES (?, ?, ?, ?, ?)",
+        [(pos, cat['id'], int(bool(cat.get('active', True))), cat.get('order'),
+          json.dumps(cat, ensure_ascii=False))
+         for pos, cat in enumerate(categories)])
+
+
+def save_categories(categories: List[Dict]):
+    """Replace all categories."""
+    with _write_transaction() as conn:
+        _insert_categories(conn, categories)
+        _bump_version(conn, "categories")
+
+
+# =============================================================================
+# ORDERS
+# =============================================================================
+
+def _order_rows(order: Dict):
+    """Split an order dict into its orders row and order_lines rows."""
+    extra = {k: order[k] for k in order if k not in ORDER_COLUMNS and k != 'items'}
+    row = (order['order_id'], order.get('table_id'), order.get('total_price', 0),
+           order.get('status', 'Pending'), order.get('payment_method'),
+           order.get('timestamp'), order.get('paid_timestamp'),
+           json.dumps(extra, ensure_ascii=False) if extra else None,
+           order.get('change_seq', 0))
+    lines = [(order['order_id'], line_no, item.get('item_id'), item.get('name'),
+              item.get('quantity', 1), item.get('price', 0))
+             for line_no, item in enumerate(order.get('items', []))]
+    return row, lines
+
+
+def _write_order(conn: sqlite3.Connection, order: Dict):
+    row, lines = _order_rows(order)
+    conn.execute("DELETE FROM order_lines WHERE order_id = ?", (order['order_id'],))
+    conn.execute("INSERT OR REPLACE INTO orders (order_id, table_id, total_price, status, payment_method, "
+                 "timestamp, paid_timestamp, extra, change_seq) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+    conn.executemany("INSERT INTO order_lines VALUES (?, ?, ?, ?, ?, ?)", lines)
+
+
+def _fetch_orders(where: str = "", params: tuple = ()) -> List[Dict]:
+    """Fetch orders (with their lines) matching a WHERE clause, oldest first."""
+    conn = get_connection()
+    headers = conn.execute(f"SELECT * FROM orders {where} ORDER BY order_id", params).fetchall()
+    if not headers:
+        return []
+
+    lines: Dict[int, List[Dict]] = {}
+    line_rows = conn.execute(
+        f"SELECT * FROM order_lines WHERE order_id IN (SELECT order_id FROM orders {where}) "
+        "ORDER BY order_id, line_no", params)
+    for line in line_rows:
+        lines.setdefault(line["order_id"], []).append({
+            "item_id": line["item_id"],
+            "name": line["name"],
+            "quantity": line["quantity"],
+            "price": line["price"]
+        })
+
+    orders = []
+    for row in headers:
+        order = {
+            "order_id": row["order_id"],
+            "table_id": row["table_id"],
+            "items": lines.get(row["order_id"], []),
+            "total_price": row["total_price"],
+            "status": row["status"],
+            "payment_method": row["payment_method"],
+            "timestamp": row["timestamp"],
+            "paid_timestamp": row["paid_timestamp"],
+            "change_seq": row["change_seq"]
+        }
+        if row["extra"]:
+            order.update(json.loads(row["extra"]))
+        orders.append(order)
+    return orders
+
+
+def load_orders(start_date: str = None, end_date: str = None) -> List[Dict]:
+    """Load all orders, oldest first; only those placed between the ISO dates (inclusive) if given."""
+    clauses, params = [], []
+    if start_date:
+        clauses.append("timestamp >= ?")
+        params.append(start_date)
+    if end_date:
+        # 'T~' sorts after any time of day on end_date
+        clauses.append("timestamp < ?")
+        params.append(end_date + "T~")
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return _fetch_orders(where, tuple(params))
+
+
+def load_live_orders() -> List[Dict]:
+    """Pending orders plus the settled ones younger than ORDERS_ARCHIVE_AFTER_DAYS (all if it's unset)."""
+    cutoff = order_partitions.age_cutoff()
+    if cutoff is None:
+        return load_orders()
+    return _fetch_orders("WHERE status = 'Pending' OR timestamp >= ?", (cutoff,))
+
+
+def save_orders(orders: List[Dict]):
+    """Replace the complete order history."""
+    with _write_transaction() as conn:
+        conn.execute("DELETE FROM order_lines")
+        conn.execute("DELETE FROM orders")
+        seq = _next_change_seq(conn)
+        for order in orders:
+            _write_order(conn, {**order, "change_seq": seq})
+
+
+def apply_order_changes(upserts: List[Dict], deleted_ids: List[int]):
+    """Write changed orders and delete removed ones in one transaction."""
+    with _write_transaction() as conn:
+        for order_id in deleted_ids:
+            conn.execute("DELETE FROM order_lines WHERE order_id = ?", (order_id,))
+            conn.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
+        seq = _next_change_seq(conn)
+        for order in upserts:
+            _write_order(conn, {**order, "change_seq": seq})
+
+
+def insert_order(order: Dict) -> Dict:
+    """Insert a new order, assigning the next order ID inside the write transaction."""
+    with _write_transaction() as conn:
+        max_id = conn.execute("SELECT MAX(order_id) FROM orders").fetchone()[0]
+        order["order_id"] = (max_id or 1000) + 1
+        order["change_seq"] = _next_change_seq(conn)
+        _write_order(conn, order)
+    return order
+
+
+def next_order_id() -> int:
+    """Return the ID the next inserted order would receive."""
+    max_id = get_connection().execute("SELECT MAX(order_id) FROM orders").fetchone()[0]
+    return (max_id or 1000) + 1
+
+
+def update_order_fields(order_id: int, fields: Dict[str, Any]) -> bool:
+    """Update header fields of a single order. Returns False if it doesn't exist."""
+    columns = [k for k in fields if k in ORDER_COLUMNS and k not in ("order_id", "change_seq")]
+    if not columns:
+        return get_order_by_id(order_id) is not None
+    assignments = ", ".join(f"{col} = ?" for col in columns)
+    with _write_transaction() as conn:
+        if conn.execute("SELECT 1 FROM orders WHERE order_id = ?", (order_id,)).fetchone() is None:
+            return False
+        conn.execute(f"UPDATE orders SET {assignments}, change_seq = ? WHERE order_id = ?",
+                     tuple(fields[col] for col in columns) + (_next_change_seq(conn), order_id))
+        return True
+
+
+def update_orders_fields(order_ids: List[int], fields: Dict[str, Any]) -> List[int]:
+    """Update the same header fields of several orders in one transaction. Returns the IDs that exist."""
+    columns = [k for k in fields if k in ORDER_COLUMNS and k not in ("order_id", "change_seq")]
+    assignments = ", ".join(f"{col} = ?" for col in columns)
+    with _write_transaction() as conn:
+        ids = [order_id for order_id in dict.fromkeys(order_ids)
+               if conn.execute("SELECT 1 FROM orders WHERE order_id = ?", (order_id,)).fetchone()]
+        if ids and columns:
+            values = tuple(fields[col] for col in columns) + (_next_change_seq(conn),)
+            conn.executemany(f"UPDATE orders SET {assignments}, change_seq = ? WHERE order_id = ?",
+                             [values + (order_id,) for order_id in ids])
+    return ids
+
+
+def get_order_by_id(order_id: int) -> Optional[Dict]:
+    """Get a specific order by ID."""
+    orders = _fetch_orders("WHERE order_id = ?", (order_id,))
+    return orders[0] if orders else None
+
+
+def get_orders_by_status(status: str) -> List[Dict]:
+    """Get all orders with the given status."""
+    return _fetch_orders("WHERE status = ?", (status,))
+
+
+def get_orders_by_table(table_id: int, open_only: bool = False) -> List[Dict]:
+    """Get all orders for a specific table (only Pending ones if open_only)."""
+    if open_only:
+        return _fetch_orders("WHERE table_id = ? AND status = 'Pending'", (table_id,))
+    return _fetch_orders("WHERE table_id = ?", (table_id,))
+
+
+def get_open_table_totals() -> Dict[int, float]:
+    """Amount owed per table across its Pending orders."""
+    rows = get_connection().execute(
+        "SELECT table_id, ROUND(SUM(total_price), 2) AS owed FROM orders "
+        "WHERE status = 'Pending' GROUP BY table_id")
+    return {row["table_id"]: row["owed"] for row in rows}
+
+
+def close_table(table_id: int, fields: Dict[str, Any]) -> List[int]:
+    """Apply the same header fields to every Pending order of a table. Returns their IDs."""
+    with _write_transaction() as conn:
+        ids = [row["order_id"] for row in conn.execute(
+            "SELECT order_id FROM orders WHERE table_id = ? AND status = 'Pending'", (table_id,))]
+        if ids:
+            conn.execute("UPDATE orders SET status = ?, payment_method = ?, paid_timestamp = ?, change_seq = ? "
+                         "WHERE table_id = ? AND status = 'Pending'",
+                         (fields["status"], fields["payment_method"], fields["paid_timestamp"],
+                          _next_change_seq(conn), table_id))
+    return ids
+
+
+def expire_pending_orders(before: str, fields: Dict[str, Any]) -> List[int]:
+    """Apply the same header fields to every Pending order placed before the ISO timestamp. Returns their IDs."""
+    columns = [k for k in fields if k in ORDER_COLUMNS and k not in ("order_id", "change_seq")]
+    assignments = ", ".join(f"{col} = ?" for col in columns)
+    with _write_transaction() as conn:
+        ids = [row["order_id"] for row in conn.execute(
+            "SELECT order_id FROM orders WHERE status = 'Pending' AND timestamp < ?", (before,))]
+        if ids and columns:
+            conn.execute(f"UPDATE orders SET {assignments}, change_seq = ? "
+                         "WHERE status = 'Pending' AND timestamp < ?",
+                         tuple(fields[col] for col in columns) + (_next_change_seq(conn), before))
+    return ids
+
+
+def search_orders(order_id: int = None, status: str = None) -> List[Dict]:
+    """Search orders by ID and/or status."""
+    clauses, params = [], []
+    if order_id is not None:
+        clauses.append("order_id = ?")
+        params.append(order_id)
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(status)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return _fetch_orders(where, tuple(params))
+
+
+def order_count() -> int:
+    """Number of orders."""
+    return get_connection().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+
+def get_change_seq() -> int:
+    """Current order change sequence number (the "orders" version)."""
+    return catalog_version("orders")
+
+
+def changes_since(seq: int) -> Tuple[int, List[Dict]]:
+    """
+    Orders inserted or updated after change sequence number `seq`, oldest
+    change first, and the sequence number to pass on the next call.
+    """
+    # Writes commit in sequence order, so nothing at or below the returned number can still appear
+    current = catalog_version("orders")
+    orders = sorted(_fetch_orders("WHERE change_seq > ?", (seq,)), key=lambda order: order["change_seq"])
+    if orders:
+        current = max(current, orders[-1]["change_seq"])
+    return max(current, seq), orders
+
+
+# =============================================================================
+# MAINTENANCE
+# =============================================================================
+# Single-row writes need no journal compaction, and date ranges are served
+# from the timestamp index instead of partition files. Archived orders stay in
+# the orders table: the live set is bounded by the cutoff in load_live_orders.
+
+def compact_orders() -> bool:
+    return False
+
+
+def archive_orders(before: str = None) -> int:
+    return 0
+
+
+# =============================================================================
+# MIGRATION
+# =============================================================================
+
+def _read_json(path: Path, default):
+    if path.exists():
+        return serialization.read(path)
+    return default
+
+
+def _read_order_history() -> List[Dict]:
+    """All orders of the JSON backend: partitions, then orders.json, then journal records."""
+    merged: Dict[int, Dict] = {}
+    for period in order_partitions.periods_between():
+        merged.update((order['order_id'], order) for order in order_partitions.read(period))
+    merged.update((order['order_id'], order) for order in _read_json(config.ORDERS_FILE, []))
+    records, _, _ = order_journal.read()
+    for rec in records:
+        if rec.get("op") == "create":
+            merged[rec["order"]["order_id"]] = rec["order"]
+        elif rec.get("op") == "update" and rec["order_id"] in merged:
+            merged[rec["order_id"]] = {**merged[rec["order_id"]], **rec["fields"]}
+    return sorted(merged.values(), key=lambda order: order['order_id'])
+
+
+def migrate_from_json(overwrite: bool = False) -> Dict[str, int]:
+    """
+    One-shot import of menu.json, deals.json, categories.json and the order
+    history (partition files, orders.json and the order journal). Refuses to run against a database that already holds orders unless overwrite=True.
+    Returns the number of rows imported per table.
+    """
+    menu = _read_json(config.MENU_FILE, {})
+    deals = _read_json(config.DEALS_FILE, [])
+    categories = _read_json(config.CATEGORIES_FILE, [])
+    orders = _read_order_history()
+
+    with _write_transaction() as conn:
+        existing = conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        if existing and not overwrite:
+            raise RuntimeError(
+                f"{config.DATABASE_FILE} already contains {existing} orders; "
+                "pass overwrite=True to replace them")
+        _insert_menu(conn, menu)
+        _insert_deals(conn, deals)
+        _insert_categories(conn, categories)
+        for name in ("menu", "deals", "categories", "orders"):
+            _bump_version(conn, name)
+        conn.execute("DELETE FROM order_lines")
+        conn.execute("DELETE FROM orders")
+        for order in orders:
+            _write_order(conn, order)
+        # Continue the change sequence numbers carried over from the JSON files
+        conn.execute("UPDATE catalog_versions SET version = MAX(version, "
+                     "COALESCE((SELECT MAX(change_seq) FROM orders), 0)) WHERE name = 'orders'")
+
+    return {
+        "menu_items": sum(len(items) for items in menu.values()),
+        "deals": len(deals),
+        "categories": len(categories),
+        "orders": len(orders),
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.sqlite_store [--overwrite]
+    counts = migrate_from_json(overwrite="--overwrite" in sys.argv)
+    print(f"Migrated into {config.DATABASE_FILE}:")
+    for table, count in counts.items():
+        print(f"  {table}: {count}")
@@ -0,0 +1,120 @@
+"""
+Storage backend interface of utils/database.py.
+A backend is a module providing the functions of StorageBackend;
+config.STORAGE_BACKEND picks one of BACKENDS:
+  "json"   - JSON files in config.DATA_DIR (utils/json_store.py, default)
+  "sqlite" - SQLite database file (utils/sqlite_store.py)
+  "memory" - process-local dicts seeded from the JSON files, nothing is
+             written back (utils/memory_store.py; demos and benchmarks)
+utils/database.py adds caching, error handling and the business rules on
+top, so backends only store and query data. Data sets are "menu", "deals",
+"categories" and "orders".
+"""
+import importlib
+import sys
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Hashable, List, Optional, Protocol, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+
+BACKENDS = {
+    "json": "utils.json_store",
+    "sqlite": "utils.sqlite_store",
+    "memory": "utils.memory_store",
+}
+
+
+class StorageBackend(Protocol):
+    """
+    Functions every backend module provides. Returned records may be shared
+    with the backend's caches: treat them as read-only. Errors are raised,
+    not printed.
+    """
+
+    # "menu", "deals", "categories" -> the file holding it, for utils/data_watcher.py
+    # (empty if the data sets aren't plain files)
+    CATALOG_FILES: Dict[str, Path]
+
+    def lock(self, name: str) -> ContextManager:
+        """Lock held by writers of a data set, across sessions (and processes if the data is shared)."""
+
+    def catalog_version(self, name: str) -> Hashable:
+        """Cheap marker that changes whenever the data set is written."""
+
+    # Menu, deals and categories: whole-document load and save (caller holds lock(name))
+    def load_menu(self) -> Dict[str, List[Dict]]: ...
+
+    def save_menu(self, menu: Dict[str, List[Dict]]): ...
+
+    def load_deals(self) -> List[Dict]: ...
+
+    def save_deals(self, deals: List[Dict]): ...
+
+    def load_categories(self) -> List[Dict]: ...
+
+    def save_categories(self, categories: List[Dict]): ...
+
+    # Orders
+    def load_orders(self, start_date: str = None, end_date: str = None) -> List[Dict]:
+        """All orders, or those placed between the ISO dates (inclusive)."""
+
+    def load_live_orders(self) -> List[Dict]:
+        """Pending orders plus the settled ones not yet archived (everything if nothing is)."""
+
+    def save_orders(self, orders: List[Dict]):
+        """Replace the live orders."""
+
+    def apply_order_changes(self, upserts: List[Dict], deleted_ids: List[int]):
+        """Write changed orders and delete removed ones in one write."""
+
+    def next_order_id(self) -> int: ...
+
+    def insert_order(self, order: Dict) -> Dict:
+        """Store a new order, assigning its order_id. Returns the stored order."""
+
+    def update_order_fields(self, order_id: int, fields: Dict[str, Any]) -> bool:
+        """Update fields of one order. False if it doesn't exist."""
+
+    def update_orders_fields(self, order_ids: List[int], fields: Dict[str, Any]) -> List[int]:
+        """Apply the same fields to several orders in one write. Returns the IDs that exist."""
+
+    def close_table(self, table_id: int, fields: Dict[str, Any]) -> List[int]:
+        """Apply fields to every Pending order of a table in one write. Returns their IDs."""
+
+    def expire_pending_orders(self, before: str, fields: Dict[str, Any]) -> List[int]:
+        """Apply fields to every Pending order placed before the ISO timestamp in one write. Returns their IDs."""
+
+    def get_order_by_id(self, order_id: int) -> Optional[Dict]: ...
+
+    def get_orders_by_status(self, status: str) -> List[Dict]: ...
+
+    def get_orders_by_table(self, table_id: int, open_only: bool = False) -> List[Dict]: ...
+
+    def get_open_table_totals(self) -> Dict[Any, float]: ...
+
+    def search_orders(self, order_id: int = None, status: str = None) -> List[Dict]: ...
+
+    def get_change_seq(self) -> int: ...
+
+    def order_count(self) -> int:
+        """Number of orders in the whole history (live and archived)."""
+
+    def changes_since(self, seq: int) -> Tuple[int, List[Dict]]:
+        """Orders written after change sequence number seq, and the number to pass next time."""
+
+    # Background upkeep (no-ops where there's nothing to do)
+    def compact_orders(self) -> bool: ...
+
+    def archive_orders(self, before: str = None) -> int:
+        """Move settled orders placed before the ISO timestamp out of the live set. Returns how many moved."""
+
+
+def get_backend(name: str = None) -> StorageBackend:
+    """The backend module for `name` (config.STORAGE_BACKEND by default)."""
+    name = (name or config.STORAGE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {name} (expected one of {', '.join(BACKENDS)})")
+    return importlib.import_module(BACKENDS[name])